@@ -0,0 +1,337 @@
+"""
+Bootcamp F2025
+
+Main process which runs every worker as a coroutine of one event loop, sharing one connection
+"""
+
+import asyncio
+import os
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.common.modules.logger import logger_main_setup
+from modules.common.modules.read_yaml import read_yaml
+from modules.command import command
+from modules.heartbeat import heartbeat_receiver
+from modules.heartbeat import heartbeat_sender
+from modules.telemetry import stream_rate
+from modules.telemetry import telemetry
+from utilities.mavlink import async_reader
+
+
+# MAVLink connection
+CONNECTION_STRING = "tcp:localhost:12345"
+
+# =================================================================================================
+#                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
+# =================================================================================================
+# Messages kept for each coroutine reading the connection, the oldest are dropped once full
+HEARTBEAT_MESSAGES_MAX = 8
+TELEMETRY_MESSAGES_MAX = 32
+# Command only needs the newest telemetry, so stale frames are overwritten instead of queued
+TELEM_TO_COMMAND_QUEUE_MAX = 1
+TO_MAIN_QUEUE_MAX = 64
+
+# How long main runs unless the drone disconnects
+RUN_TIME_S = 100.0
+
+# Telemetry requests its messages from the drone, each this many times per TELEMETRY_PERIOD_S,
+# and requests again when a measured interval drifts by more than the tolerance
+TELEMETRY_MESSAGES_PER_PERIOD = 2
+TELEMETRY_RATE_TOLERANCE = 0.25
+TELEMETRY_RATE_CHECK_PERIOD_COUNT = 10
+
+# Any other constants
+HEARTBEAT_PERIOD_S = 1.0
+DISCONNECT_THRESHOLD = 5
+TELEMETRY_PERIOD_S = 1.0
+Z_SPEED_M_S = 1.0
+TURNING_SPEED_DEG_S = 5.0
+ANGLE_TOLERANCE_DEG = 5.0
+HEIGHT_TOLERANCE_M = 0.5
+TARGET_POSITION = command.Position(10, 20, 30)
+
+# =================================================================================================
+#                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
+# =================================================================================================
+
+
+# =================================================================================================
+#                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
+# =================================================================================================
+def put_latest(output_queue: asyncio.Queue, item: object) -> None:
+    """
+    Puts the item, dropping the oldest item if the queue is full.
+    """
+    if output_queue.full():
+        output_queue.get_nowait()
+
+    output_queue.put_nowait(item)
+
+
+async def heartbeat_sender_task(
+    instance: heartbeat_sender.HeartbeatSender,
+    heartbeat_period_s: float,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Sends a heartbeat every period.
+    """
+    while True:
+        try:
+            instance.run()
+            local_logger.info("Sent heartbeat", None)
+        except Exception as e:  # pylint: disable=broad-except
+            local_logger.error(f"Heartbeat send failed: {e}", True)
+        await asyncio.sleep(heartbeat_period_s)
+
+
+async def heartbeat_receiver_task(
+    instance: heartbeat_receiver.HeartbeatReceiver,
+    messages: asyncio.Queue,
+    output_queue: asyncio.Queue,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Forwards the connection state to main every period.
+    """
+    while True:
+        _ok, state = await instance.run_async(messages, local_logger)
+        put_latest(output_queue, ("heartbeat", state))
+
+
+async def telemetry_task(
+    instance: telemetry.Telemetry,
+    messages: asyncio.Queue,
+    output_queue: asyncio.Queue,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Forwards each complete telemetry frame to command.
+    """
+    while True:
+        success, data = await instance.run_async(messages)
+        if success:
+            local_logger.info(str(data), None)
+            put_latest(output_queue, data)
+
+
+async def command_task(
+    instance: command.Command,
+    input_queue: asyncio.Queue,
+    output_queue: asyncio.Queue,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Sends a command for each telemetry frame, and forwards what it did to main.
+    """
+    while True:
+        data = await input_queue.get()
+        try:
+            success, output = instance.run(
+                data,
+                TELEMETRY_PERIOD_S,
+                Z_SPEED_M_S,
+                ANGLE_TOLERANCE_DEG,
+                HEIGHT_TOLERANCE_M,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            local_logger.error(f"Command run failed: {e}", True)
+            put_latest(output_queue, ("command", f"Command failed: {e}"))
+            continue
+        if success:
+            local_logger.info(str(output), None)
+            put_latest(output_queue, ("command", output))
+
+
+def create_task_logger(name: str) -> "logger.Logger | None":
+    """
+    Logger of a coroutine, named like the logger of the worker it replaces.
+    """
+    result, local_logger = logger.Logger.create(f"{name}_{os.getpid()}", True)
+    if not result:
+        return None
+
+    return local_logger
+
+
+async def run_pipeline(
+    connection: mavutil.mavfile,
+    run_time_s: float,
+    main_logger: logger.Logger,
+) -> int:
+    """
+    Runs every worker as a coroutine until the run time is over or the drone disconnects.
+    """
+    loggers = {}
+    for name in ("heartbeat_sender", "heartbeat_receiver", "telemetry", "command"):
+        local_logger = create_task_logger(name)
+        if local_logger is None:
+            main_logger.error(f"Failed to create {name} logger", True)
+            return -1
+        loggers[name] = local_logger
+
+    # Create class objects, as the workers do
+    ok, sender = heartbeat_sender.HeartbeatSender.create(connection, HEARTBEAT_PERIOD_S)
+    if not ok:
+        return -1
+
+    ok, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        connection, HEARTBEAT_PERIOD_S, DISCONNECT_THRESHOLD, loggers["heartbeat_receiver"]
+    )
+    if not ok:
+        return -1
+
+    ok, stream_rates = stream_rate.StreamRate.create(
+        connection,
+        ["ATTITUDE", "LOCAL_POSITION_NED"],
+        TELEMETRY_PERIOD_S / TELEMETRY_MESSAGES_PER_PERIOD,
+        TELEMETRY_RATE_TOLERANCE,
+        TELEMETRY_PERIOD_S * TELEMETRY_RATE_CHECK_PERIOD_COUNT,
+        loggers["telemetry"],
+    )
+    if not ok:
+        return -1
+
+    ok, telemetry_instance = telemetry.Telemetry.create(
+        connection, TELEMETRY_PERIOD_S, loggers["telemetry"], stream_rates
+    )
+    if not ok:
+        return -1
+
+    ok, command_instance = command.Command.create(
+        connection, TARGET_POSITION, TURNING_SPEED_DEG_S, loggers["command"]
+    )
+    if not ok:
+        return -1
+
+    # Get Pylance to stop complaining
+    assert sender is not None
+    assert receiver is not None
+    assert telemetry_instance is not None
+    assert command_instance is not None
+
+    # One reader parses the connection for every coroutine
+    reader = async_reader.AsyncMavlinkReader(connection, asyncio.get_running_loop())
+    heartbeat_messages = reader.subscribe(["HEARTBEAT"], HEARTBEAT_MESSAGES_MAX)
+    telemetry_messages = reader.subscribe(
+        ["ATTITUDE", "LOCAL_POSITION_NED"], TELEMETRY_MESSAGES_MAX
+    )
+    telem_to_command_queue = asyncio.Queue(TELEM_TO_COMMAND_QUEUE_MAX)
+    to_main_queue = asyncio.Queue(TO_MAIN_QUEUE_MAX)
+
+    reader.start()
+    tasks = [
+        asyncio.create_task(
+            heartbeat_sender_task(sender, HEARTBEAT_PERIOD_S, loggers["heartbeat_sender"])
+        ),
+        asyncio.create_task(
+            heartbeat_receiver_task(
+                receiver, heartbeat_messages, to_main_queue, loggers["heartbeat_receiver"]
+            )
+        ),
+        asyncio.create_task(
+            telemetry_task(
+                telemetry_instance,
+                telemetry_messages,
+                telem_to_command_queue,
+                loggers["telemetry"],
+            )
+        ),
+        asyncio.create_task(
+            command_task(
+                command_instance, telem_to_command_queue, to_main_queue, loggers["command"]
+            )
+        ),
+    ]
+
+    main_logger.info("Started")
+
+    # Main's work: log the outputs of the coroutines
+    # Continue running until the run time is over or the drone disconnects
+    end_time = time.time() + run_time_s
+    while True:
+        remaining = end_time - time.time()
+        if remaining <= 0.0:
+            break
+        try:
+            source, output = await asyncio.wait_for(to_main_queue.get(), remaining)
+        except asyncio.TimeoutError:
+            break
+
+        if source == "heartbeat":
+            main_logger.info(f"Heartbeat state: {output}")
+            if output == "Disconnected":
+                break
+        else:
+            main_logger.info(f"Command: {output}")
+
+    # Stop the coroutines, each stops at its next await
+    reader.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    main_logger.info("Stopped")
+    main_logger.info(
+        f"Messages read: {reader.get_message_count()}, "
+        f"dropped by slow coroutines: {reader.get_dropped_count()}"
+    )
+
+    return 0
+
+
+# =================================================================================================
+#                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
+# =================================================================================================
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    # Configuration settings
+    result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
+    if not result:
+        print("ERROR: Failed to load configuration file")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert config is not None
+
+    # Setup main logger
+    result, main_logger, _ = logger_main_setup.setup_main_logger(config)
+    if not result:
+        print("ERROR: Failed to create main logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert main_logger is not None
+
+    # Create a connection to the drone
+    # Every coroutine shares it, only the reader receives from it
+    connection = mavutil.mavlink_connection(CONNECTION_STRING)
+    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
+
+    # =============================================================================================
+    #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
+    # =============================================================================================
+    result_pipeline = asyncio.run(run_pipeline(connection, RUN_TIME_S, main_logger))
+    if result_pipeline < 0:
+        return result_pipeline
+
+    # =============================================================================================
+    #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
+    # =============================================================================================
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
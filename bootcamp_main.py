@@ -4,7 +4,6 @@ Bootcamp F2025
 Main process to setup and manage all the other working processes
 """
 
-import multiprocessing as mp
 import time
 
 from pymavlink import mavutil
@@ -16,10 +15,23 @@ from modules.command import command
 from modules.command import command_worker
 from modules.heartbeat import heartbeat_receiver_worker
 from modules.heartbeat import heartbeat_sender_worker
+from modules.telemetry import stream_rate
 from modules.telemetry import telemetry_worker
+from utilities.mavlink import connection_manager
+from utilities.mavlink import mavlink_dispatcher
+from utilities.mavlink import mavlink_writer
+from utilities.workers import batch_queue
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_overflow
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
 from utilities.workers import worker_controller
+from utilities.workers import worker_host
 from utilities.workers import worker_manager
+from utilities.workers import worker_resources
+from utilities.workers import worker_scheduling
+from utilities.workers import worker_supervisor
+from utilities.workers import worker_watchdog
 
 
 # MAVLink connection
@@ -30,8 +42,29 @@ CONNECTION_STRING = "tcp:localhost:12345"
 # =================================================================================================
 # Set queue max sizes (<= 0 for infinity)
 TELEM_TO_COMMAND_QUEUE_MAX = 32
+# Command only needs the newest telemetry, so stale frames are overwritten instead of queued
+TELEM_TO_COMMAND_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.LATEST_VALUE
 HEARTBEAT_RECV_TO_MAIN_QUEUE_MAX = 64
 COMMAND_TO_MAIN_QUEUE_MAX = 64
+# Link loss and command failures skip ahead of normal traffic through a small urgent lane
+HEARTBEAT_RECV_TO_MAIN_URGENT_QUEUE_MAX = 4
+COMMAND_TO_MAIN_URGENT_QUEUE_MAX = 16
+# Set what producers do when a queue is full, so that workers never stall behind main
+HEARTBEAT_RECV_TO_MAIN_QUEUE_POLICY = queue_overflow.OverflowPolicy.DROP_OLDEST
+COMMAND_TO_MAIN_QUEUE_POLICY = queue_overflow.OverflowPolicy.BLOCK_WITH_TIMEOUT
+COMMAND_TO_MAIN_QUEUE_TIMEOUT_S = 0.1
+# Record queue occupancy and wait times, logged every period
+ENABLE_QUEUE_STATISTICS = True
+QUEUE_STATISTICS_PERIOD_S = 10.0
+# Log the CPU, memory, context switches and open files of each worker type with the statistics
+ENABLE_RESOURCE_SAMPLING = True
+
+# Most items main takes from a queue at once
+MAIN_READ_BATCH_SIZE = 16
+
+# Set how many telemetry frames move per queue call (1 for no batching)
+TELEMETRY_BATCH_SIZE = 1
+COMMAND_BATCH_SIZE = 8
 
 # Set worker counts
 HEARTBEAT_SENDER_COUNT = 1
@@ -39,6 +72,88 @@ HEARTBEAT_RECEIVER_COUNT = 1
 TELEMETRY_COUNT = 1
 COMMAND_COUNT = 1
 
+# Telemetry and command can be paused on their own to shed load on a degraded link,
+# while the heartbeat workers keep running
+SHEDDABLE_WORKER_GROUP = "sheddable"
+
+# Restart dead workers, backing off on repeated crashes and giving up on a crash loop
+SUPERVISOR_POLL_PERIOD_S = 0.1
+SUPERVISOR_INITIAL_BACKOFF_S = 0.5
+SUPERVISOR_MAX_BACKOFF_S = 8.0
+SUPERVISOR_RESTART_BUDGET = 5
+SUPERVISOR_BUDGET_WINDOW_S = 60.0
+
+# How workers are started: "fork", "spawn" or "forkserver"
+# Only fork lets workers inherit the connection, the others need workers that open their own
+WORKER_START_METHOD = "fork"
+# Imported once by the forkserver instead of by every worker it starts
+FORKSERVER_PRELOAD_MODULES = [
+    "pymavlink.mavutil",
+    "modules.command.command_worker",
+    "modules.heartbeat.heartbeat_receiver_worker",
+    "modules.heartbeat.heartbeat_sender_worker",
+    "modules.telemetry.telemetry_worker",
+]
+
+# Keep heartbeat and command latency steady next to the log-heavy telemetry worker
+# CPU sets depend on the companion computer, None for any CPU
+TELEMETRY_CPUS: "set[int] | None" = None
+LATENCY_CRITICAL_CPUS: "set[int] | None" = None
+TELEMETRY_NICE = 10
+# Realtime is opt-in, like RR, since a realtime worker in a busy loop starves the rest of the host
+# Needs CAP_SYS_NICE or an RLIMIT_RTPRIO, otherwise workers log it and keep normal scheduling
+LATENCY_CRITICAL_REALTIME_POLICY: "worker_scheduling.RealtimePolicy | None" = None
+LATENCY_CRITICAL_REALTIME_PRIORITY = 10
+
+# Heartbeat workers mostly sleep or wait on the connection,
+# so they can run as threads of one process instead of a process each
+HEARTBEAT_WORKERS_AS_THREADS = True
+
+# One dispatcher reads the connection and routes each message type to the workers using it,
+# instead of the heartbeat receiver and telemetry discarding each other's messages
+USE_MAVLINK_DISPATCHER = True
+# Messages kept for each worker, the oldest are dropped once full
+HEARTBEAT_SUBSCRIPTION_QUEUE_MAX = 8
+TELEMETRY_SUBSCRIPTION_QUEUE_MAX = 32
+# Large enough for any MAVLink frame
+SUBSCRIPTION_QUEUE_SLOT_SIZE = 512
+
+# One writer sends for the heartbeat sender and command, so that their frames never interleave
+# and form 1 sequence, with heartbeats written ahead of commands
+USE_MAVLINK_WRITER = True
+# Frames waiting to be written, senders wait once full so that no command is lost
+SEND_QUEUE_MAX = 32
+# Only the newest heartbeats are kept
+SEND_URGENT_QUEUE_MAX = 2
+
+# The dispatcher and writer reconnect a failed link, other workers keep the first connection
+# Another endpoint of the same drone to fail over to immediately, like a second port of
+# a telemetry proxy, None to only reconnect
+STANDBY_CONNECTION_STRING: "str | None" = None
+# A link silent for longer has failed, less than the heartbeat disconnect so that it
+# reconnects before main gives up
+LINK_SILENCE_TIMEOUT_S = 3.0
+RECONNECT_INITIAL_BACKOFF_S = 0.25
+RECONNECT_MAX_BACKOFF_S = 2.0
+
+# Telemetry requests ATTITUDE and LOCAL_POSITION_NED from the drone instead of taking whatever
+# rates it streams at, and requests again when a measured rate drifts
+REQUEST_TELEMETRY_RATES = True
+# Each type arrives this many times per TELEMETRY_PERIOD_S, more than 1 so that a frame
+# completes within the telemetry timeout when a message is late
+TELEMETRY_MESSAGES_PER_PERIOD = 2
+# Largest difference of a measured interval, as a fraction of the requested interval
+TELEMETRY_RATE_TOLERANCE = 0.25
+# Telemetry periods each rate is measured over before it is checked
+TELEMETRY_RATE_CHECK_PERIOD_COUNT = 10
+
+# Workers which are alive but made no progress for this many of their periods are stalled
+# Stalled workers are restarted, except workers in a host which are logged
+WATCHDOG_STALL_PERIOD_COUNT = 5.0
+
+# Longest wait for workers to exit before they are terminated
+SHUTDOWN_TIMEOUT_S = 2.0
+
 # Any other constants
 HEARTBEAT_PERIOD_S = 1.0
 DISCONNECT_THRESHOLD = 5
@@ -86,33 +201,224 @@ def main() -> int:
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Before anything shared with the workers is created, so it matches how they are started
+    if not worker_manager.set_start_method(
+        WORKER_START_METHOD, FORKSERVER_PRELOAD_MODULES, main_logger
+    ):
+        return -1
+
+    # Reconnects the link for the dispatcher and writer
+    result, link = connection_manager.ConnectionManager.create(
+        connection,
+        CONNECTION_STRING,
+        STANDBY_CONNECTION_STRING,
+        LINK_SILENCE_TIMEOUT_S,
+        RECONNECT_INITIAL_BACKOFF_S,
+        RECONNECT_MAX_BACKOFF_S,
+        main_logger,
+    )
+    if not result:
+        return -1
+
+    # Get Pylance to stop complaining
+    assert link is not None
+
     # Create a worker controller
     controller = worker_controller.WorkerController()
+    # Workers in a group also get the requests to this controller
+    # Pause a group with `controller.get_group_controller(SHEDDABLE_WORKER_GROUP).request_pause()`
 
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
+    # It also hosts batch queues so that many items can move in one call
+    mp_manager = batch_queue.create_manager()
 
     # Create queues
     telem_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager, TELEM_TO_COMMAND_QUEUE_MAX
+        mp_manager,
+        TELEM_TO_COMMAND_QUEUE_MAX,
+        TELEM_TO_COMMAND_QUEUE_BACKEND,
+        enable_statistics=ENABLE_QUEUE_STATISTICS,
+    )
+    # Queues to main share a notifier, so main wakes as soon as any of them has an item
+    main_notifier = queue_selector.QueueNotifier()
+    hb_recv_to_main_queue = priority_queue_wrapper.PriorityQueueWrapper(
+        queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, HEARTBEAT_RECV_TO_MAIN_URGENT_QUEUE_MAX, notifier=main_notifier
+        ),
+        queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            HEARTBEAT_RECV_TO_MAIN_QUEUE_MAX,
+            enable_statistics=ENABLE_QUEUE_STATISTICS,
+            overflow_policy=HEARTBEAT_RECV_TO_MAIN_QUEUE_POLICY,
+            notifier=main_notifier,
+        ),
+    )
+    command_to_main_queue = priority_queue_wrapper.PriorityQueueWrapper(
+        queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, COMMAND_TO_MAIN_URGENT_QUEUE_MAX, notifier=main_notifier
+        ),
+        queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            COMMAND_TO_MAIN_QUEUE_MAX,
+            enable_statistics=ENABLE_QUEUE_STATISTICS,
+            overflow_policy=COMMAND_TO_MAIN_QUEUE_POLICY,
+            overflow_timeout_s=COMMAND_TO_MAIN_QUEUE_TIMEOUT_S,
+            notifier=main_notifier,
+        ),
+    )
+    named_queues = {
+        "telem_to_command_queue": telem_to_command_queue,
+        "hb_recv_to_main_queue": hb_recv_to_main_queue,
+        "command_to_main_queue": command_to_main_queue,
+    }
+
+    # The heartbeat receiver and telemetry read their messages from the dispatcher
+    # in place of the connection
+    heartbeat_source = connection
+    telemetry_source = connection
+    subscriptions = []
+    if USE_MAVLINK_DISPATCHER:
+        heartbeat_subscription_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            HEARTBEAT_SUBSCRIPTION_QUEUE_MAX,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            SUBSCRIPTION_QUEUE_SLOT_SIZE,
+            enable_statistics=ENABLE_QUEUE_STATISTICS,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        )
+        telemetry_subscription_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            TELEMETRY_SUBSCRIPTION_QUEUE_MAX,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            SUBSCRIPTION_QUEUE_SLOT_SIZE,
+            enable_statistics=ENABLE_QUEUE_STATISTICS,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        )
+        named_queues["heartbeat_subscription_queue"] = heartbeat_subscription_queue
+        named_queues["telemetry_subscription_queue"] = telemetry_subscription_queue
+
+        heartbeat_source = mavlink_dispatcher.MavlinkSubscription(
+            ["HEARTBEAT"], heartbeat_subscription_queue
+        )
+        telemetry_source = mavlink_dispatcher.MavlinkSubscription(
+            ["ATTITUDE", "LOCAL_POSITION_NED"], telemetry_subscription_queue
+        )
+        subscriptions = [heartbeat_source, telemetry_source]
+
+    # The heartbeat sender, command, and telemetry rate requests send through the writer
+    # in place of the connection
+    heartbeat_sink = connection
+    command_sink = connection
+    telemetry_sink = connection
+    if USE_MAVLINK_WRITER:
+        send_queue = priority_queue_wrapper.PriorityQueueWrapper(
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None,
+                SEND_URGENT_QUEUE_MAX,
+                queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+                SUBSCRIPTION_QUEUE_SLOT_SIZE,
+                enable_statistics=ENABLE_QUEUE_STATISTICS,
+                overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+            ),
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None,
+                SEND_QUEUE_MAX,
+                queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+                SUBSCRIPTION_QUEUE_SLOT_SIZE,
+                enable_statistics=ENABLE_QUEUE_STATISTICS,
+            ),
+        )
+        # Time waiting to be written is the wait time of each lane
+        named_queues["send_urgent_queue"] = send_queue.urgent_lane
+        named_queues["send_queue"] = send_queue.normal_lane
+
+        heartbeat_sink = mavlink_writer.MavlinkSender(send_queue)
+        command_sink = mavlink_writer.MavlinkSender(send_queue)
+        telemetry_sink = mavlink_writer.MavlinkSender(send_queue)
+
+    telemetry_stream_rates = None
+    if REQUEST_TELEMETRY_RATES:
+        result, telemetry_stream_rates = stream_rate.StreamRate.create(
+            telemetry_sink,
+            ["ATTITUDE", "LOCAL_POSITION_NED"],
+            TELEMETRY_PERIOD_S / TELEMETRY_MESSAGES_PER_PERIOD,
+            TELEMETRY_RATE_TOLERANCE,
+            TELEMETRY_PERIOD_S * TELEMETRY_RATE_CHECK_PERIOD_COUNT,
+            main_logger,
+        )
+        if not result:
+            return -1
+
+    # Heartbeat and command run before telemetry, preferably on other CPUs
+    result, latency_critical_scheduling = worker_scheduling.WorkerScheduling.create(
+        LATENCY_CRITICAL_CPUS,
+        None,
+        LATENCY_CRITICAL_REALTIME_POLICY,
+        LATENCY_CRITICAL_REALTIME_PRIORITY,
+        main_logger,
     )
-    hb_recv_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager, HEARTBEAT_RECV_TO_MAIN_QUEUE_MAX
+    if not result:
+        return -1
+
+    result, telemetry_scheduling = worker_scheduling.WorkerScheduling.create(
+        TELEMETRY_CPUS, TELEMETRY_NICE, None, 1, main_logger
+    )
+    if not result:
+        return -1
+
+    # Every worker loop waits at most about its period, on the connection or a sleep
+    # Workers in a host can only log stalls, restarting 1 would stop the others in it
+    result, heartbeat_watchdog = worker_watchdog.WorkerWatchdog.create(
+        HEARTBEAT_PERIOD_S,
+        WATCHDOG_STALL_PERIOD_COUNT,
+        (
+            worker_watchdog.StallAction.LOG
+            if HEARTBEAT_WORKERS_AS_THREADS
+            else worker_watchdog.StallAction.RESTART
+        ),
+        main_logger,
     )
-    command_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager, COMMAND_TO_MAIN_QUEUE_MAX
+    if not result:
+        return -1
+
+    result, telemetry_watchdog = worker_watchdog.WorkerWatchdog.create(
+        TELEMETRY_PERIOD_S,
+        WATCHDOG_STALL_PERIOD_COUNT,
+        worker_watchdog.StallAction.RESTART,
+        main_logger,
     )
+    if not result:
+        return -1
+
+    result, command_watchdog = worker_watchdog.WorkerWatchdog.create(
+        TELEMETRY_PERIOD_S,
+        WATCHDOG_STALL_PERIOD_COUNT,
+        worker_watchdog.StallAction.RESTART,
+        main_logger,
+    )
+    if not result:
+        return -1
+
+    heartbeat_host = None
+    if HEARTBEAT_WORKERS_AS_THREADS:
+        heartbeat_host = worker_host.WorkerHost("heartbeat_host")
+
+    # The dispatcher and writer share the link, so must be threads of 1 process
+    link_host = worker_host.WorkerHost("link_host")
 
     # Create worker properties for each worker type (what inputs it takes, how many workers)
     # Heartbeat sender
     hb_sender_result, hb_sender_props = worker_manager.WorkerProperties.create(
         count=HEARTBEAT_SENDER_COUNT,
         target=heartbeat_sender_worker.heartbeat_sender_worker,
-        work_arguments=(connection, HEARTBEAT_PERIOD_S),
+        work_arguments=(heartbeat_sink, HEARTBEAT_PERIOD_S),
         input_queues=[],
         output_queues=[],
         controller=controller,
         local_logger=main_logger,
+        scheduling=latency_critical_scheduling,
+        host=heartbeat_host,
+        watchdog=heartbeat_watchdog,
     )
     if not hb_sender_result:
         return -1
@@ -122,7 +428,7 @@ def main() -> int:
         count=HEARTBEAT_RECEIVER_COUNT,
         target=heartbeat_receiver_worker.heartbeat_receiver_worker,
         work_arguments=(
-            connection,
+            heartbeat_source,
             HEARTBEAT_PERIOD_S,
             DISCONNECT_THRESHOLD,
         ),
@@ -130,6 +436,9 @@ def main() -> int:
         output_queues=[hb_recv_to_main_queue],
         controller=controller,
         local_logger=main_logger,
+        scheduling=latency_critical_scheduling,
+        host=heartbeat_host,
+        watchdog=heartbeat_watchdog,
     )
     if not hb_recv_result:
         return -1
@@ -138,11 +447,19 @@ def main() -> int:
     telemetry_result, telemetry_props = worker_manager.WorkerProperties.create(
         count=TELEMETRY_COUNT,
         target=telemetry_worker.telemetry_worker,
-        work_arguments=(connection, TELEMETRY_PERIOD_S),
+        work_arguments=(
+            telemetry_source,
+            TELEMETRY_PERIOD_S,
+            TELEMETRY_BATCH_SIZE,
+            telemetry_stream_rates,
+        ),
         input_queues=[],
         output_queues=[telem_to_command_queue],
         controller=controller,
         local_logger=main_logger,
+        group=SHEDDABLE_WORKER_GROUP,
+        scheduling=telemetry_scheduling,
+        watchdog=telemetry_watchdog,
     )
     if not telemetry_result:
         return -1
@@ -152,24 +469,86 @@ def main() -> int:
         count=COMMAND_COUNT,
         target=command_worker.command_worker,
         work_arguments=(
-            connection,
+            command_sink,
             TARGET_POSITION,
             TELEMETRY_PERIOD_S,
             Z_SPEED_M_S,
             ANGLE_TOLERANCE_DEG,
             HEIGHT_TOLERANCE_M,
+            COMMAND_BATCH_SIZE,
         ),
         input_queues=[telem_to_command_queue],
         output_queues=[command_to_main_queue],
         controller=controller,
         local_logger=main_logger,
+        group=SHEDDABLE_WORKER_GROUP,
+        scheduling=latency_critical_scheduling,
+        watchdog=command_watchdog,
     )
     if not command_result:
         return -1
 
+    worker_props = [hb_sender_props, hb_recv_props, telemetry_props, command_props]
+
+    # MAVLink dispatcher
+    if USE_MAVLINK_DISPATCHER:
+        result, dispatcher_watchdog = worker_watchdog.WorkerWatchdog.create(
+            mavlink_dispatcher.DISPATCHER_POLL_PERIOD_S,
+            WATCHDOG_STALL_PERIOD_COUNT,
+            worker_watchdog.StallAction.LOG,
+            main_logger,
+        )
+        if not result:
+            return -1
+
+        dispatcher_result, dispatcher_props = worker_manager.WorkerProperties.create(
+            count=1,
+            target=mavlink_dispatcher.mavlink_dispatcher_worker,
+            work_arguments=(link, subscriptions),
+            input_queues=[],
+            output_queues=[],
+            controller=controller,
+            local_logger=main_logger,
+            scheduling=latency_critical_scheduling,
+            host=link_host,
+            watchdog=dispatcher_watchdog,
+        )
+        if not dispatcher_result:
+            return -1
+
+        worker_props.append(dispatcher_props)
+
+    # MAVLink writer
+    if USE_MAVLINK_WRITER:
+        result, writer_watchdog = worker_watchdog.WorkerWatchdog.create(
+            mavlink_writer.WRITER_POLL_PERIOD_S,
+            WATCHDOG_STALL_PERIOD_COUNT,
+            worker_watchdog.StallAction.LOG,
+            main_logger,
+        )
+        if not result:
+            return -1
+
+        writer_result, writer_props = worker_manager.WorkerProperties.create(
+            count=1,
+            target=mavlink_writer.mavlink_writer_worker,
+            work_arguments=(link, send_queue),
+            input_queues=[],
+            output_queues=[],
+            controller=controller,
+            local_logger=main_logger,
+            scheduling=latency_critical_scheduling,
+            host=link_host,
+            watchdog=writer_watchdog,
+        )
+        if not writer_result:
+            return -1
+
+        worker_props.append(writer_props)
+
     # Create the workers (processes) and obtain their managers
     worker_managers: list[worker_manager.WorkerManager] = []
-    for props in (hb_sender_props, hb_recv_props, telemetry_props, command_props):
+    for props in worker_props:
         # Get Pylance to stop complaining
         assert props is not None
         ok, mgr = worker_manager.WorkerManager.create(
@@ -180,51 +559,125 @@ def main() -> int:
         assert mgr is not None
         worker_managers.append(mgr)
 
+    # Create the supervisor which restarts dead and stalled workers
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(
+        worker_managers,
+        SUPERVISOR_POLL_PERIOD_S,
+        SUPERVISOR_INITIAL_BACKOFF_S,
+        SUPERVISOR_MAX_BACKOFF_S,
+        SUPERVISOR_RESTART_BUDGET,
+        SUPERVISOR_BUDGET_WINDOW_S,
+        main_logger,
+    )
+    if not result:
+        return -1
+
+    # Get Pylance to stop complaining
+    assert supervisor is not None
+
+    resource_sampler = worker_resources.WorkerResourceSampler(worker_managers)
+
     # Start worker processes
     for mgr in worker_managers:
         mgr.start_workers()
 
+    supervisor.start()
+
     main_logger.info("Started")
 
     # Main's work: read from all queues that output to main, and log any commands that we make
     # Continue running for 100 seconds or until the drone disconnects
     end_time = time.time() + 100
+    next_statistics_time = time.time() + QUEUE_STATISTICS_PERIOD_S
     current_state = "Unknown"
     while time.time() < end_time:
-        try:
-            # Heartbeat state
-            state = hb_recv_to_main_queue.queue.get(timeout=HEARTBEAT_PERIOD_S * 2)
-            current_state = str(state)
-            main_logger.info(f"Heartbeat state: {current_state}")
+        # Periodically log which queues are backing up, and what each worker type uses
+        if time.time() >= next_statistics_time:
+            next_statistics_time += QUEUE_STATISTICS_PERIOD_S
+            for name, named_queue in named_queues.items():
+                result, statistics = named_queue.get_statistics()
+                if result:
+                    main_logger.info(f"{name}: {statistics}")
+            if ENABLE_RESOURCE_SAMPLING:
+                for usage in resource_sampler.sample():
+                    main_logger.info(str(usage))
+
+        # Wake on the first output from any worker, or to log statistics
+        wait_s = max(0.0, min(end_time, next_statistics_time) - time.time())
+        result, ready_queue = queue_selector.wait_any(
+            [hb_recv_to_main_queue, command_to_main_queue], wait_s
+        )
+        if not result:
+            continue
+
+        if ready_queue is hb_recv_to_main_queue:
+            # Heartbeat state, a disconnect is dequeued ahead of any queued states
+            for state in hb_recv_to_main_queue.get_many(MAIN_READ_BATCH_SIZE, HEARTBEAT_PERIOD_S):
+                if state is None:
+                    continue
+                current_state = str(state)
+                main_logger.info(f"Heartbeat state: {current_state}")
+                if current_state == "Disconnected":
+                    break
             if current_state == "Disconnected":
                 break
-            # Drain any command outputs without blocking
-            while True:
-                cmd_out = command_to_main_queue.queue.get_nowait()
+        else:
+            for cmd_out in command_to_main_queue.get_many(MAIN_READ_BATCH_SIZE, HEARTBEAT_PERIOD_S):
                 if cmd_out is None:
                     continue
                 main_logger.info(f"Command: {cmd_out}")
-        except:  # pylint: disable=bare-except
-            pass
 
-    # Stop the processes
+    # Stop the processes, without restarting them as they exit
+    supervisor.stop()
+    shutdown_start = time.monotonic()
     controller.request_exit()
 
     main_logger.info("Requested exit")
 
-    # Fill and drain queues from END TO START
-    telem_to_command_queue.fill_and_drain_queue()
-    hb_recv_to_main_queue.fill_and_drain_queue()
-    command_to_main_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared")
-
-    # Clean up worker processes
+    # Close queues from END TO START, waking workers blocked on them
+    telem_to_command_queue.close()
+    hb_recv_to_main_queue.close()
+    command_to_main_queue.close()
+    if USE_MAVLINK_DISPATCHER:
+        heartbeat_subscription_queue.close()
+        telemetry_subscription_queue.close()
+    if USE_MAVLINK_WRITER:
+        send_queue.close()
+
+    main_logger.info("Queues closed")
+
+    # Clean up worker processes, escalating for any that miss the deadline
+    shutdown_deadline = shutdown_start + SHUTDOWN_TIMEOUT_S
+    is_clean = True
     for mgr in worker_managers:
-        mgr.join_workers()
+        is_clean = mgr.join_workers(shutdown_deadline) and is_clean
+
+    worker_count = sum(mgr.get_worker_count() for mgr in worker_managers)
+    main_logger.info(
+        f"Shutdown took {time.monotonic() - shutdown_start:.3f}s, "
+        f"{controller.get_exit_acknowledged_count()}/{worker_count} workers acknowledged exit"
+    )
+    if not is_clean:
+        main_logger.warning("Some workers had to be terminated")
 
     main_logger.info("Stopped")
 
+    main_logger.info(
+        f"Telemetry frames superseded: {telem_to_command_queue.get_superseded_count()}"
+    )
+    for name, named_queue in named_queues.items():
+        main_logger.info(f"{name} items dropped on overflow: {named_queue.get_dropped_count()}")
+
+    main_logger.info(f"Link {link.get_flap_summary()}")
+
+    restart_reports = supervisor.get_restart_reports()
+    main_logger.info(f"Worker restarts: {len(restart_reports)}")
+    if len(restart_reports) > 0:
+        worst_report = max(restart_reports, key=lambda report: report.time_to_recover_s)
+        main_logger.info(f"Slowest recovery: {worst_report}")
+    for target_name in supervisor.get_crash_looping_targets():
+        main_logger.error(f"Crash looping: {target_name}")
+
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
     controller.clear_exit()
@@ -5,7 +5,6 @@ python -m documentation.main_multiprocess_example
 ```
 """
 
-import multiprocessing as mp
 import time
 
 from documentation.multiprocess_example.add_random import add_random_worker
@@ -14,7 +13,9 @@ from documentation.multiprocess_example.countup import countup_worker
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
+from utilities.workers import batch_queue
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_autoscaler
 from utilities.workers import worker_controller
 from utilities.workers import worker_manager
 
@@ -25,9 +26,19 @@ ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE = 5
 
 # Play with these numbers to see process bottlenecks
 COUNTUP_WORKER_COUNT = 2
-ADD_RANDOM_WORKER_COUNT = 2
 CONCATENATOR_WORKER_COUNT = 2
 
+# Add Random is the slow stage, so it starts with 1 worker and grows until it keeps up
+ADD_RANDOM_WORKER_COUNT = 1
+ADD_RANDOM_WORKER_MAX_COUNT = 6
+AUTOSCALE_PERIOD_S = 0.5
+AUTOSCALE_RUN_TIME_S = 15.0
+AUTOSCALE_UP_DEPTH = 4
+AUTOSCALE_UP_WAIT_S = 0.5
+AUTOSCALE_DOWN_DEPTH = 0
+AUTOSCALE_DOWN_UTILIZATION = 0.8
+AUTOSCALE_STABLE_CHECK_COUNT = 2
+
 
 # main() is required for early return
 def main() -> int:
@@ -60,17 +71,21 @@ def main() -> int:
     # caused by its implementation (background thread work)
     # so a queue from a SyncManager is used instead
     # See 2nd note: https://docs.python.org/3/library/multiprocessing.html#pipes-and-queues
-    mp_manager = mp.Manager()
+    # This manager's queues can also be closed, which wakes every waiting worker on exit
+    mp_manager = batch_queue.create_manager()
 
     # Queue maxsize should always be >= the larger of producers/consumers count
     # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
+    # Statistics show the throughput of each stage and drive the autoscaler
     countup_to_add_random_queue = queue_proxy_wrapper.QueueProxyWrapper(
         mp_manager,
         COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
+        enable_statistics=True,
     )
     add_random_to_concatenator_queue = queue_proxy_wrapper.QueueProxyWrapper(
         mp_manager,
         ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
+        enable_statistics=True,
     )
 
     # Worker properties
@@ -105,6 +120,7 @@ def main() -> int:
         output_queues=[add_random_to_concatenator_queue],
         controller=controller,
         local_logger=main_logger,
+        max_count=ADD_RANDOM_WORKER_MAX_COUNT,  # Scaled between count and this
     )
     if not result:
         print("Failed to create arguments for Add Random")
@@ -162,6 +178,23 @@ def main() -> int:
 
     worker_managers.append(add_random_manager)
 
+    result, add_random_autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+        manager=add_random_manager,
+        input_queue=countup_to_add_random_queue,
+        scale_up_depth=AUTOSCALE_UP_DEPTH,
+        scale_up_wait_s=AUTOSCALE_UP_WAIT_S,
+        scale_down_depth=AUTOSCALE_DOWN_DEPTH,
+        scale_down_utilization=AUTOSCALE_DOWN_UTILIZATION,
+        stable_check_count=AUTOSCALE_STABLE_CHECK_COUNT,
+        local_logger=main_logger,
+    )
+    if not result:
+        print("Failed to create autoscaler for Add Random")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert add_random_autoscaler is not None
+
     result, concatenator_manager = worker_manager.WorkerManager.create(
         worker_properties=concatenator_worker_properties,
         local_logger=main_logger,
@@ -181,8 +214,27 @@ def main() -> int:
 
     main_logger.info("Started", True)
 
-    # Run for some time and then pause
-    time.sleep(2)
+    # Add Random workers are added while Countup produces faster than they consume
+    # Once the rates match, the queue stays shallow and the count stays put
+    end_time = time.monotonic() + AUTOSCALE_RUN_TIME_S
+    while time.monotonic() < end_time:
+        time.sleep(AUTOSCALE_PERIOD_S)
+        add_random_count = add_random_autoscaler.check()
+
+        _, produced = countup_to_add_random_queue.get_statistics()
+        _, consumed = add_random_to_concatenator_queue.get_statistics()
+        # Get Pylance to stop complaining
+        assert produced is not None
+        assert consumed is not None
+
+        main_logger.info(
+            f"Add Random workers: {add_random_count}, "
+            f"Countup rate: {produced.put_rate_per_s:.1f}/s, "
+            f"Add Random rate: {consumed.put_rate_per_s:.1f}/s",
+            True,
+        )
+
+    # Pause
     controller.request_pause()
 
     main_logger.info("Paused", True)
@@ -198,9 +250,9 @@ def main() -> int:
 
     main_logger.info("Requested exit", True)
 
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
+    # Wake workers waiting on a queue
+    countup_to_add_random_queue.close()
+    add_random_to_concatenator_queue.close()
 
     main_logger.info("Queues cleared", True)
 
@@ -210,6 +262,8 @@ def main() -> int:
 
     main_logger.info("Stopped", True)
 
+    mp_manager.shutdown()
+
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
     controller.clear_exit()
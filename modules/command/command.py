@@ -6,6 +6,7 @@ import math
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_writer
 from ..common.modules.logger import logger
 from ..telemetry import telemetry
 
@@ -35,7 +36,7 @@ class Command:  # pylint: disable=too-many-instance-attributes
     @classmethod
     def create(
         cls,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
         target: Position,
         turning_speed_deg_s: float,
         local_logger: logger.Logger,
@@ -58,7 +59,7 @@ class Command:  # pylint: disable=too-many-instance-attributes
     def __init__(
         self,
         key: object,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
         target: Position,
         turning_speed_deg_s: float,
         local_logger: logger.Logger,
@@ -9,9 +9,11 @@ import pathlib
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_writer
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import command
+from ..telemetry import telemetry_codec
 from ..common.modules.logger import logger
 
 
@@ -19,12 +21,13 @@ from ..common.modules.logger import logger
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def command_worker(
-    connection: mavutil.mavfile,
+    connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
     target: command.Position,
     telemetry_period_s: float,
     z_speed_m_s: float,
     angle_tolerance_deg: float,
     height_tolerance_m: float,
+    batch_size: int,
     input_queue: queue_proxy_wrapper.QueueProxyWrapper,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
@@ -32,7 +35,13 @@ def command_worker(
     """
     Worker process.
 
-    args... describe what the arguments are
+    connection: MAVLink connection to the drone, or a sender to the writer worker.
+    target: Position to face and reach the altitude of.
+    telemetry_period_s, z_speed_m_s, angle_tolerance_deg, height_tolerance_m: Command settings.
+    batch_size: Maximum telemetry frames to take per queue call, processed in order.
+    input_queue: Telemetry data from the telemetry worker, encoded or not.
+    output_queue: Command outputs to main.
+    controller: How the main process communicates to this worker process.
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -70,24 +79,37 @@ def command_worker(
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
-        data = input_queue.queue.get()
-        if data is None:
-            continue
-        try:
-            success, output = instance.run(
-                data,
-                telemetry_period_s,
-                z_speed_m_s,
-                angle_tolerance_deg,
-                height_tolerance_m,
-            )
-        except Exception as e:  # pylint: disable=broad-except
-            local_logger.error(f"Command run failed: {e}", True)
-            success, output = False, None
-        if success:
-            # Log and forward the output
-            local_logger.info(str(output), None)
-            output_queue.queue.put(output)
+        # Gives up after a period, so that the loop makes progress while no telemetry arrives
+        batch = input_queue.get_many(max(batch_size, 1), telemetry_period_s)
+
+        for data in batch:
+            if data is None:
+                continue
+            # Telemetry arrives encoded and is only decoded here, when it is used
+            if isinstance(data, bytes):
+                decoded, data = telemetry_codec.decode(data)
+                if not decoded:
+                    local_logger.error("Failed to decode telemetry data", True)
+                    continue
+            try:
+                success, output = instance.run(
+                    data,
+                    telemetry_period_s,
+                    z_speed_m_s,
+                    angle_tolerance_deg,
+                    height_tolerance_m,
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                local_logger.error(f"Command run failed: {e}", True)
+                output_queue.put_urgent(f"Command failed: {e}")
+                continue
+            if success:
+                # Log and forward the output
+                local_logger.info(str(output), None)
+                output_queue.queue.put(output)
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
 
 
 # =================================================================================================
@@ -2,8 +2,11 @@
 Heartbeat receiving logic.
 """
 
+import asyncio
+
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_dispatcher
 from ..common.modules.logger import logger
 
 
@@ -20,7 +23,7 @@ class HeartbeatReceiver:
     @classmethod
     def create(
         cls,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
         heartbeat_period_s: float,
         disconnect_threshold: int,
         local_logger: logger.Logger,
@@ -42,7 +45,7 @@ class HeartbeatReceiver:
     def __init__(
         self,
         key: object,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
         heartbeat_period_s: float,
         disconnect_threshold: int,
     ) -> None:
@@ -71,6 +74,32 @@ class HeartbeatReceiver:
             local_logger.error(f"Exception while receiving heartbeat: {e}", True)
             msg = None
 
+        return True, self.__update_state(msg, local_logger)
+
+    async def run_async(
+        self,
+        messages: "asyncio.Queue",
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, str]":
+        """
+        Like run(), but waits for the heartbeat on a queue of messages read by the event loop
+        instead of blocking on the connection.
+
+        messages: HEARTBEAT messages, like from `AsyncMavlinkReader.subscribe()`.
+        """
+        try:
+            msg = await asyncio.wait_for(messages.get(), self.__period_s)
+        except asyncio.TimeoutError:
+            msg = None
+
+        return True, self.__update_state(msg, local_logger)
+
+    def __update_state(
+        self, msg: "mavutil.mavlink.MAVLink_message | None", local_logger: logger.Logger
+    ) -> str:
+        """
+        Counts a missed heartbeat if there is no message, and returns the connection state.
+        """
         if not msg or msg.get_type() != "HEARTBEAT":
             self.__missed_in_row += 1
             local_logger.warning("Missed heartbeat", True)
@@ -81,7 +110,7 @@ class HeartbeatReceiver:
             "Connected" if self.__missed_in_row < self.__disconnect_threshold else "Disconnected"
         )
         local_logger.info(f"State: {state}", True)
-        return True, state
+        return state
 
 
 # =================================================================================================
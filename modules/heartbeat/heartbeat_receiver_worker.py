@@ -7,6 +7,7 @@ import pathlib
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_dispatcher
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import heartbeat_receiver
@@ -17,7 +18,7 @@ from ..common.modules.logger import logger
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def heartbeat_receiver_worker(
-    connection: mavutil.mavfile,
+    connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
     heartbeat_period_s: float,
     disconnect_threshold: int,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
@@ -68,7 +69,14 @@ def heartbeat_receiver_worker(
         except Exception as e:  # pylint: disable=broad-except
             local_logger.error(f"Heartbeat receive failed: {e}", True)
             state = "Disconnected"
-        output_queue.queue.put(state)
+        # Link loss goes ahead of anything already queued so that main reacts promptly
+        if state == "Disconnected":
+            output_queue.put_urgent(state)
+        else:
+            output_queue.queue.put(state)
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
 
 
 # =================================================================================================
@@ -4,6 +4,8 @@ Heartbeat sending logic.
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_writer
+
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
@@ -18,7 +20,7 @@ class HeartbeatSender:
     @classmethod
     def create(
         cls,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
         period_s: float,
     ) -> "tuple[bool, HeartbeatSender | None]":
         """
@@ -36,7 +38,7 @@ class HeartbeatSender:
     def __init__(
         self,
         key: object,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
         period_s: float,
     ) -> None:
         assert key is HeartbeatSender.__private_key, "Use create() method"
@@ -4,10 +4,10 @@ Heartbeat worker that sends heartbeats periodically.
 
 import os
 import pathlib
-import time
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_writer
 from utilities.workers import worker_controller
 from . import heartbeat_sender
 from ..common.modules.logger import logger
@@ -17,7 +17,7 @@ from ..common.modules.logger import logger
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def heartbeat_sender_worker(
-    connection: mavutil.mavfile,
+    connection: mavutil.mavfile | mavlink_writer.MavlinkSender,
     heartbeat_period_s: float,
     controller: worker_controller.WorkerController,
 ) -> None:
@@ -61,7 +61,11 @@ def heartbeat_sender_worker(
             local_logger.info("Sent heartbeat", None)
         except Exception as e:  # pylint: disable=broad-except
             local_logger.error(f"Heartbeat send failed: {e}", True)
-        time.sleep(heartbeat_period_s)
+        # Sleeps until the next heartbeat, waking early on exit
+        controller.wait_for_exit(heartbeat_period_s)
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
 
 
 # =================================================================================================
@@ -0,0 +1,229 @@
+"""
+Requesting the rates that the drone streams telemetry messages at.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from utilities.mavlink import mavlink_writer
+from ..common.modules.logger import logger
+
+
+# Assume the target_system=1 and target_component=0, like command
+TARGET_SYSTEM = 1
+TARGET_COMPONENT = 0
+
+
+class StreamRate:  # pylint: disable=too-many-instance-attributes
+    """
+    Requests an interval for each telemetry message type with MAV_CMD_SET_MESSAGE_INTERVAL ,
+    instead of using whatever rates the autopilot streams at, then measures the interval
+    each type arrives at and requests it again when it drifts.
+
+    Used by the reader of the telemetry messages, which calls observe() for each message
+    and maintain() every loop.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        sender: mavutil.mavfile | mavlink_writer.MavlinkSender,
+        message_types: "list[str]",
+        interval_s: float,
+        tolerance: float,
+        check_period_s: float,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, StreamRate | None]":
+        """
+        Creates the requests, sent on the first maintain() .
+
+        sender: Connection to the drone, or a sender to the writer worker.
+        message_types: MAVLink message names to request.
+        interval_s: Requested time between messages of each type.
+        tolerance: Largest difference between the measured and requested interval,
+            as a fraction of the requested interval.
+        check_period_s: Time the interval is measured over, at least 2 intervals.
+        local_logger: Existing logger from process.
+
+        Returns the StreamRate object.
+        """
+        if interval_s <= 0.0:
+            local_logger.error("Message interval must be greater than zero", True)
+            return False, None
+
+        if tolerance <= 0.0:
+            local_logger.error("Rate tolerance must be greater than zero", True)
+            return False, None
+
+        if check_period_s < 2 * interval_s:
+            local_logger.error(
+                f"Rate check period {check_period_s}s must be at least 2 intervals of "
+                f"{interval_s}s",
+                True,
+            )
+            return False, None
+
+        message_ids = {}
+        for message_type in message_types:
+            message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}", None)
+            if message_id is None:
+                local_logger.error(f"Unknown message type {message_type}", True)
+                return False, None
+
+            message_ids[message_type] = message_id
+
+        return True, StreamRate(
+            cls.__create_key, sender, message_ids, interval_s, tolerance, check_period_s
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        sender: mavutil.mavfile | mavlink_writer.MavlinkSender,
+        message_ids: "dict[str, int]",
+        interval_s: float,
+        tolerance: float,
+        check_period_s: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is StreamRate.__create_key, "Use create() method"
+
+        self.__sender = sender
+        self.__message_ids = message_ids
+        self.__interval_s = interval_s
+        self.__tolerance = tolerance
+        self.__check_period_s = check_period_s
+
+        # None until the first request
+        self.__check_start_time: "float | None" = None
+        # Arrivals of each type since the check started
+        self.__counts = dict.fromkeys(message_ids, 0)
+        self.__first_times: "dict[str, float | None]" = dict.fromkeys(message_ids, None)
+        self.__last_times: "dict[str, float | None]" = dict.fromkeys(message_ids, None)
+        self.__request_count = 0
+        # Last maintain() or observe(), the reader is away for longer gaps than the check period
+        self.__last_call_time: "float | None" = None
+
+    def observe(self, message_type: str) -> None:
+        """
+        Records the arrival of a message, others than the requested types are ignored.
+        """
+        if message_type not in self.__counts:
+            return
+
+        now = time.monotonic()
+        self.__last_call_time = now
+        self.__counts[message_type] += 1
+        if self.__first_times[message_type] is None:
+            self.__first_times[message_type] = now
+        self.__last_times[message_type] = now
+
+    def maintain(self, local_logger: logger.Logger) -> None:
+        """
+        Requests every type the first time, then every check period, requests again each type
+        whose measured interval differs from the requested one by more than the tolerance.
+        A check which the reader was away for longer than the check period is restarted
+        instead, since it measures the gap.
+        """
+        now = time.monotonic()
+        last_call_time = self.__last_call_time
+        self.__last_call_time = now
+        if self.__check_start_time is None:
+            for message_type in self.__message_ids:
+                self.__request(message_type, local_logger)
+            self.__restart_check(now)
+            local_logger.info(
+                f"Requested {', '.join(self.__message_ids)} every {self.__interval_s}s", True
+            )
+            return
+
+        # Get Pylance to stop complaining
+        assert last_call_time is not None
+
+        if now - last_call_time > self.__check_period_s:
+            self.__restart_check(now)
+            return
+
+        if now - self.__check_start_time < self.__check_period_s:
+            return
+
+        for message_type in self.__message_ids:
+            measured_interval_s = self.get_measured_interval(message_type)
+            if measured_interval_s is None:
+                local_logger.warning(
+                    f"No {message_type} interval over {self.__check_period_s}s, requesting again",
+                    True,
+                )
+                self.__request(message_type, local_logger)
+                continue
+
+            drift = abs(measured_interval_s - self.__interval_s) / self.__interval_s
+            if drift > self.__tolerance:
+                local_logger.warning(
+                    f"{message_type} every {measured_interval_s:.3f}s instead of "
+                    f"{self.__interval_s}s, requesting again",
+                    True,
+                )
+                self.__request(message_type, local_logger)
+
+        self.__restart_check(now)
+
+    def get_measured_interval(self, message_type: str) -> "float | None":
+        """
+        Returns the mean time between messages of the type since the check started,
+        None if fewer than 2 arrived.
+        """
+        first_time = self.__first_times[message_type]
+        last_time = self.__last_times[message_type]
+        count = self.__counts[message_type]
+        if first_time is None or last_time is None or count < 2:
+            return None
+
+        return (last_time - first_time) / (count - 1)
+
+    def get_request_count(self) -> int:
+        """
+        Returns the number of requests sent, including the first of each type.
+        """
+        return self.__request_count
+
+    def __request(self, message_type: str, local_logger: logger.Logger) -> None:
+        """
+        Sends MAV_CMD_SET_MESSAGE_INTERVAL (511) for the type.
+        """
+        try:
+            self.__sender.mav.command_long_send(
+                TARGET_SYSTEM,
+                TARGET_COMPONENT,
+                mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,
+                0,  # confirmation
+                self.__message_ids[message_type],  # param1 message ID
+                self.__interval_s * 1e6,  # param2 interval in us
+                0,
+                0,
+                0,
+                0,
+                0,  # param7 response target, the default
+            )
+        # Catching all exceptions for library call
+        # pylint: disable-next=broad-exception-caught
+        except Exception as e:
+            local_logger.error(f"Failed to request {message_type} interval: {e}", True)
+            return
+
+        self.__request_count += 1
+
+    def __restart_check(self, now: float) -> None:
+        """
+        Measures from now, so that arrivals at the old rate are not counted.
+        """
+        self.__check_start_time = now
+        for message_type in self.__message_ids:
+            self.__counts[message_type] = 0
+            self.__first_times[message_type] = None
+            self.__last_times[message_type] = None
@@ -2,10 +2,13 @@
 Telemetry gathering logic.
 """
 
+import asyncio
 import time
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_dispatcher
+from . import stream_rate
 from ..common.modules.logger import logger
 
 
@@ -75,12 +78,16 @@ class Telemetry:
     @classmethod
     def create(
         cls,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
         timeout_s: float,
         local_logger: logger.Logger,
+        stream_rates: stream_rate.StreamRate | None = None,
     ) -> "tuple[bool, Telemetry | None]":
         """
         Falliable create (instantiation) method to create a Telemetry object.
+
+        stream_rates: Requests the rates of the messages read, None to take the rates
+            the drone streams at.
         """
         try:
             return True, Telemetry(
@@ -88,6 +95,7 @@ class Telemetry:
                 connection,
                 timeout_s,
                 local_logger,
+                stream_rates,
             )
         except:  # pylint: disable=bare-except
             local_logger.error("Failed to create Telemetry", True)
@@ -96,9 +104,10 @@ class Telemetry:
     def __init__(
         self,
         key: object,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
         timeout_s: float,
         local_logger: logger.Logger,
+        stream_rates: stream_rate.StreamRate | None,
     ) -> None:
         assert key is Telemetry.__private_key, "Use create() method"
 
@@ -106,6 +115,7 @@ class Telemetry:
         self.__connection = connection
         self.__timeout_s = timeout_s
         self.__logger = local_logger
+        self.__stream_rates = stream_rates
 
     def run(
         self,
@@ -118,6 +128,9 @@ class Telemetry:
         # Read MAVLink message LOCAL_POSITION_NED (32)
         # Read MAVLink message ATTITUDE (30)
         # Return the most recent of both, and use the most recent message's timestamp
+        if self.__stream_rates is not None:
+            self.__stream_rates.maintain(self.__logger)
+
         deadline = time.time() + self.__timeout_s
         latest_att = None
         latest_pos = None
@@ -131,11 +144,58 @@ class Telemetry:
             if not msg:
                 break
             mtype = msg.get_type()
+            if self.__stream_rates is not None:
+                self.__stream_rates.observe(mtype)
+            if mtype == "ATTITUDE":
+                latest_att = msg
+            elif mtype == "LOCAL_POSITION_NED":
+                latest_pos = msg
+
+        return self.__combine(latest_att, latest_pos)
+
+    async def run_async(
+        self,
+        messages: "asyncio.Queue",
+    ) -> "tuple[bool, TelemetryData | None]":
+        """
+        Like run(), but waits for the messages on a queue of messages read by the event loop
+        instead of blocking on the connection.
+
+        messages: ATTITUDE and LOCAL_POSITION_NED messages,
+            like from `AsyncMavlinkReader.subscribe()`.
+        """
+        if self.__stream_rates is not None:
+            self.__stream_rates.maintain(self.__logger)
+
+        deadline = time.time() + self.__timeout_s
+        latest_att = None
+        latest_pos = None
+        while latest_att is None or latest_pos is None:
+            timeout = deadline - time.time()
+            if timeout <= 0.0:
+                break
+            try:
+                msg = await asyncio.wait_for(messages.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            mtype = msg.get_type()
+            if self.__stream_rates is not None:
+                self.__stream_rates.observe(mtype)
             if mtype == "ATTITUDE":
                 latest_att = msg
             elif mtype == "LOCAL_POSITION_NED":
                 latest_pos = msg
 
+        return self.__combine(latest_att, latest_pos)
+
+    def __combine(
+        self,
+        latest_att: "mavutil.mavlink.MAVLink_attitude_message | None",
+        latest_pos: "mavutil.mavlink.MAVLink_local_position_ned_message | None",
+    ) -> "tuple[bool, TelemetryData | None]":
+        """
+        Combines the latest of both messages, fails if either is missing.
+        """
         if latest_att is None or latest_pos is None:
             # Timeout without both messages
             return False, None
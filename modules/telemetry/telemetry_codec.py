@@ -0,0 +1,69 @@
+"""
+Compact binary encoding of TelemetryData for crossing process boundaries.
+"""
+
+import struct
+
+from . import telemetry
+
+
+# Layout version, increment on any change to the layout below
+VERSION = 1
+
+# Attributes in encoding and constructor argument order
+# Bit i of the presence mask is set if attribute i is not None
+FIELD_NAMES = (
+    "time_since_boot",
+    "x",
+    "y",
+    "z",
+    "x_velocity",
+    "y_velocity",
+    "z_velocity",
+    "roll",
+    "pitch",
+    "yaw",
+    "roll_speed",
+    "pitch_speed",
+    "yaw_speed",
+)
+
+# Little endian: version, presence mask, time since boot in ms (MAVLink uint32), 12 doubles
+_LAYOUT = struct.Struct("<BHI12d")
+
+SIZE = _LAYOUT.size  # bytes
+
+
+def encode(data: telemetry.TelemetryData) -> bytes:
+    """
+    Packs telemetry data into SIZE bytes. Absent (None) fields are packed as 0 .
+    """
+    values = [getattr(data, name) for name in FIELD_NAMES]
+
+    mask = 0
+    for i, value in enumerate(values):
+        if value is None:
+            values[i] = 0
+        else:
+            mask |= 1 << i
+
+    return _LAYOUT.pack(VERSION, mask, *values)
+
+
+def decode(payload: bytes) -> "tuple[bool, telemetry.TelemetryData | None]":
+    """
+    Unpacks bytes produced by encode() .
+
+    Returns False if the payload has the wrong size or an unknown version.
+    """
+    if len(payload) != SIZE:
+        return False, None
+
+    version, mask, *values = _LAYOUT.unpack(payload)
+    if version != VERSION:
+        return False, None
+
+    # Fields are in constructor argument order
+    fields = [value if mask & (1 << i) else None for i, value in enumerate(values)]
+
+    return True, telemetry.TelemetryData(*fields)
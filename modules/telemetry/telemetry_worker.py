@@ -7,9 +7,12 @@ import pathlib
 
 from pymavlink import mavutil
 
+from utilities.mavlink import mavlink_dispatcher
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
+from . import stream_rate
 from . import telemetry
+from . import telemetry_codec
 from ..common.modules.logger import logger
 
 
@@ -17,15 +20,23 @@ from ..common.modules.logger import logger
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def telemetry_worker(
-    connection: mavutil.mavfile,
+    connection: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
     timeout_s: float,
+    batch_size: int,
+    stream_rates: stream_rate.StreamRate | None,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
 ) -> None:
     """
     Worker process.
 
-    args... describe what the arguments are
+    connection: MAVLink connection to the drone, or a subscription to its telemetry messages.
+    timeout_s: Time to wait for a complete telemetry frame.
+    batch_size: Frames to forward per queue call, 1 or less forwards each frame immediately.
+    stream_rates: Requests the rates of the telemetry messages, None to take the rates
+        the drone streams at.
+    output_queue: Encoded telemetry data to the command worker.
+    controller: How the main process communicates to this worker process.
     """
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -48,12 +59,15 @@ def telemetry_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (telemetry.Telemetry)
-    ok, instance = telemetry.Telemetry.create(connection, timeout_s, local_logger)
+    ok, instance = telemetry.Telemetry.create(connection, timeout_s, local_logger, stream_rates)
     if not ok:
         local_logger.error("Failed to create Telemetry instance", True)
         return
     assert instance is not None
 
+    # Frames waiting to be forwarded together when batching
+    batch = []
+
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
@@ -64,8 +78,29 @@ def telemetry_worker(
             success, data = False, None
         if success:
             # Log and forward data
+            # Forwarded as compact bytes, the consumer decodes them when used
             local_logger.info(str(data), None)
-            output_queue.queue.put(data)
+            payload = telemetry_codec.encode(data)
+            if batch_size <= 1:
+                output_queue.queue.put(payload)
+                continue
+
+            batch.append(payload)
+
+        # Forward once the batch is full, or early when the link goes quiet
+        if len(batch) >= batch_size or (not success and len(batch) > 0):
+            output_queue.put_many(batch)
+            batch = []
+
+    # Forward the frames gathered before exit, so that the last ones still reach command
+    # Gives up after a timeout, since command may have exited and stopped taking them
+    if len(batch) > 0:
+        put_count = output_queue.put_many(batch, timeout_s)
+        if put_count < len(batch):
+            local_logger.warning(f"Dropped {len(batch) - put_count} telemetry frames at exit", True)
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
 
 
 # =================================================================================================
@@ -0,0 +1,255 @@
+"""
+Benchmark the command latency and CPU time of the workers as processes,
+and as coroutines of one event loop, against a mock drone. To run:
+```
+python -m tests.benchmarks.benchmark_async_runtime
+```
+"""
+
+import asyncio
+import multiprocessing as mp
+import resource
+import select
+import statistics
+import time
+
+from pymavlink import mavutil
+
+import bootcamp_async_main
+from modules.command import command_worker
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_receiver_worker
+from modules.heartbeat import heartbeat_sender_worker
+from modules.telemetry import telemetry_worker
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+RUN_TIME_S = 10.0
+# A frame is the attitude and position of one moment, answered by one command
+FRAME_PERIOD_S = 0.1
+HEARTBEAT_PERIOD_S = 1.0
+CONNECT_TIMEOUT_S = 10.0
+SHUTDOWN_TIMEOUT_S = 2.0
+QUEUE_MAX_SIZE = 64
+
+
+def run_processes(port: int, run_time_s: float) -> None:
+    """
+    Runs each worker as a process, every one of them reading the connection.
+    """
+    connection = mavutil.mavlink_connection(f"tcp:localhost:{port}")
+    connection.wait_heartbeat(timeout=CONNECT_TIMEOUT_S)
+
+    result, local_logger = logger.Logger.create("benchmark_async_runtime", False)
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    controller = worker_controller.WorkerController()
+    with mp.Manager() as mp_manager:
+        telem_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, 1, queue_proxy_wrapper.QueueBackend.LATEST_VALUE
+        )
+        # Nothing reads the outputs to main, so the oldest are dropped
+        hb_recv_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        )
+        command_to_main_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            QUEUE_MAX_SIZE,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        )
+
+        properties = [
+            (
+                heartbeat_sender_worker.heartbeat_sender_worker,
+                (connection, bootcamp_async_main.HEARTBEAT_PERIOD_S),
+                [],
+                [],
+            ),
+            (
+                heartbeat_receiver_worker.heartbeat_receiver_worker,
+                (
+                    connection,
+                    bootcamp_async_main.HEARTBEAT_PERIOD_S,
+                    bootcamp_async_main.DISCONNECT_THRESHOLD,
+                ),
+                [],
+                [hb_recv_to_main_queue],
+            ),
+            (
+                telemetry_worker.telemetry_worker,
+                (connection, bootcamp_async_main.TELEMETRY_PERIOD_S, 1),
+                [],
+                [telem_to_command_queue],
+            ),
+            (
+                command_worker.command_worker,
+                (
+                    connection,
+                    bootcamp_async_main.TARGET_POSITION,
+                    bootcamp_async_main.TELEMETRY_PERIOD_S,
+                    bootcamp_async_main.Z_SPEED_M_S,
+                    bootcamp_async_main.ANGLE_TOLERANCE_DEG,
+                    bootcamp_async_main.HEIGHT_TOLERANCE_M,
+                    1,
+                ),
+                [telem_to_command_queue],
+                [command_to_main_queue],
+            ),
+        ]
+        managers = []
+        for target, work_arguments, input_queues, output_queues in properties:
+            result, props = worker_manager.WorkerProperties.create(
+                1, target, work_arguments, input_queues, output_queues, controller, local_logger
+            )
+            if not result:
+                return
+
+            # Get Pylance to stop complaining
+            assert props is not None
+
+            result, manager = worker_manager.WorkerManager.create(props, local_logger)
+            if not result:
+                return
+
+            # Get Pylance to stop complaining
+            assert manager is not None
+
+            managers.append(manager)
+
+        for manager in managers:
+            manager.start_workers()
+
+        time.sleep(run_time_s)
+
+        controller.request_exit()
+        telem_to_command_queue.close()
+        hb_recv_to_main_queue.close()
+        command_to_main_queue.close()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT_S
+        for manager in managers:
+            manager.join_workers(deadline)
+
+
+def run_coroutines(port: int, run_time_s: float) -> None:
+    """
+    Runs each worker as a coroutine, with one reader for the connection.
+    """
+    connection = mavutil.mavlink_connection(f"tcp:localhost:{port}")
+    connection.wait_heartbeat(timeout=CONNECT_TIMEOUT_S)
+
+    result, local_logger = logger.Logger.create("benchmark_async_runtime", False)
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    asyncio.run(bootcamp_async_main.run_pipeline(connection, run_time_s, local_logger))
+
+
+def run_drone(drone: mavutil.mavfile, run_time_s: float) -> "tuple[int, list[float]]":
+    """
+    Sends a heartbeat every period, and once the ground station is up,
+    a frame every period with only 1 frame waiting for its command at a time.
+
+    Returns the number of frames sent, and the latency of each command in milliseconds.
+    """
+    frame_count = 0
+    latencies_ms = []
+    # Time the frame waiting for its command was sent
+    frame_sent_time = None
+    is_ground_station_up = False
+
+    next_heartbeat_time = time.monotonic()
+    next_frame_time = next_heartbeat_time
+    end_time = next_heartbeat_time + run_time_s
+    while time.monotonic() < end_time:
+        now = time.monotonic()
+        if now >= next_heartbeat_time:
+            drone.mav.heartbeat_send(
+                mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+            )
+            next_heartbeat_time += HEARTBEAT_PERIOD_S
+
+        if now >= next_frame_time:
+            if is_ground_station_up:
+                time_boot_ms = int(now * 1000) & 0xFFFFFFFF
+                drone.mav.attitude_send(time_boot_ms, 0, 0, 0, 0, 0, 0)
+                drone.mav.local_position_ned_send(time_boot_ms, 0, 0, 0, 0, 0, 0)
+                frame_sent_time = time.monotonic()
+                frame_count += 1
+            next_frame_time += FRAME_PERIOD_S
+
+        wait_s = max(0.0, min(next_heartbeat_time, next_frame_time) - time.monotonic())
+        select.select([drone.fd], [], [], wait_s)
+        while True:
+            msg = drone.recv_msg()
+            if msg is None:
+                break
+
+            if msg.get_type() == "HEARTBEAT":
+                is_ground_station_up = True
+            elif msg.get_type() == "COMMAND_LONG" and frame_sent_time is not None:
+                latencies_ms.append((time.monotonic() - frame_sent_time) * 1000)
+                frame_sent_time = None
+
+    return frame_count, latencies_ms
+
+
+def main() -> int:
+    """
+    Runs both ways and prints a table.
+    """
+    print(
+        f"{RUN_TIME_S}s each, a frame every {FRAME_PERIOD_S * 1000:.0f}ms "
+        f"and a heartbeat every {HEARTBEAT_PERIOD_S}s"
+    )
+    print(
+        f"{'layout':<12}{'frames':>8}{'answered':>10}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'CPU s':>8}{'CPU %':>8}"
+    )
+    for name, target in (("processes", run_processes), ("coroutines", run_coroutines)):
+        drone = mavutil.mavlink_connection("tcpin:localhost:0", source_system=1, source_component=0)
+        port = drone.listen.getsockname()[1]
+
+        usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        ground_station = mp.Process(target=target, args=(port, RUN_TIME_S))
+        start_time = time.monotonic()
+        ground_station.start()
+        frame_count, latencies_ms = run_drone(drone, RUN_TIME_S)
+        ground_station.join()
+        # Lifetime of the ground station, including starting and stopping its workers
+        elapsed_s = time.monotonic() - start_time
+        drone.close()
+        # Includes every worker, which the ground station process waited for
+        usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        cpu_s = (usage_after.ru_utime - usage_before.ru_utime) + (
+            usage_after.ru_stime - usage_before.ru_stime
+        )
+        latencies_ms.sort()
+        p50_ms = statistics.median(latencies_ms) if len(latencies_ms) > 0 else float("nan")
+        p99_ms = latencies_ms[int(len(latencies_ms) * 0.99)] if len(latencies_ms) > 0 else p50_ms
+        print(
+            f"{name:<12}{frame_count:>8}{len(latencies_ms):>10}{p50_ms:>9.2f}{p99_ms:>9.2f}"
+            f"{cpu_s:>8.2f}{cpu_s / elapsed_s * 100:>8.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,202 @@
+"""
+Benchmark the time until messages resume after the drone drops the link,
+reconnecting and failing over to a standby. To run:
+```
+python -m tests.benchmarks.benchmark_connection_manager
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+from utilities.mavlink import mavlink_dispatcher
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+FLAP_COUNT = 10
+# Time between drops
+FLAP_PERIOD_S = 1.0
+# Time a dropped endpoint closes every connection
+OUTAGE_S = 0.5
+STREAM_RATE_HZ = 50
+# The drone streams, so the link is never silent while up
+SILENCE_TIMEOUT_S = 5.0
+RECONNECT_INITIAL_BACKOFF_S = 0.25
+RECONNECT_MAX_BACKOFF_S = 2.0
+SUBSCRIPTION_QUEUE_MAX = 64
+SUBSCRIPTION_QUEUE_SLOT_SIZE = 512
+
+
+def run_ground_station(
+    ports: "list[int]",
+    summary: "mp.sharedctypes.SynchronizedArray",
+    ready: "mp.synchronize.Event",
+    done: "mp.synchronize.Event",
+) -> None:
+    """
+    Runs the dispatcher until the drone is done, then reports the link flaps.
+
+    ports: Of the drone, the second is the standby if any.
+    """
+    result, local_logger = logger.Logger.create("benchmark_connection_manager", False)
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    connection_strings = [f"tcp:localhost:{port}" for port in ports]
+    connection = mavutil.mavlink_connection(connection_strings[0])
+    result, link = connection_manager.ConnectionManager.create(
+        connection,
+        connection_strings[0],
+        connection_strings[1] if len(connection_strings) > 1 else None,
+        SILENCE_TIMEOUT_S,
+        RECONNECT_INITIAL_BACKOFF_S,
+        RECONNECT_MAX_BACKOFF_S,
+        local_logger,
+    )
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert link is not None
+
+    # Nobody reads it, the oldest messages are dropped
+    subscription = mavlink_dispatcher.MavlinkSubscription(
+        ["ATTITUDE"],
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            SUBSCRIPTION_QUEUE_MAX,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            SUBSCRIPTION_QUEUE_SLOT_SIZE,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        ),
+    )
+    controller = worker_controller.WorkerController()
+    dispatcher = mp.Process(
+        target=mavlink_dispatcher.mavlink_dispatcher_worker,
+        args=(link, [subscription], controller),
+    )
+    dispatcher.start()
+
+    ready.set()
+    done.wait()
+
+    controller.request_exit()
+    dispatcher.join()
+
+    flap_summary = link.get_flap_summary()
+    summary[0] = flap_summary.flap_count
+    summary[1] = flap_summary.resume_count
+    summary[2] = flap_summary.get_mean_resume_s()
+    summary[3] = flap_summary.resume_max_s
+
+
+def open_drone(port: int) -> mavutil.mavfile:
+    """
+    Listens for the ground station on the port.
+    """
+    return mavutil.mavlink_connection(
+        f"tcpin:localhost:{port}", source_system=1, source_component=0
+    )
+
+
+def drop_drone(drone: mavutil.mavfile, is_refused: bool) -> None:
+    """
+    Closes the connection of the ground station, and any new one if refused.
+    The listener stays open, since the ground station inherited it when forked
+    and it cannot be bound again.
+    """
+    if is_refused:
+        drone.recv()
+    if drone.port is None:
+        return
+
+    drone.port.close()
+    drone.port = None
+    drone.fd = drone.listen.fileno()
+
+
+def run_drone(drones: "list[mavutil.mavfile]") -> None:
+    """
+    Streams to every endpoint, and drops each endpoint in turn every period for the outage.
+    With a standby, the endpoint dropped is the one in use, since the other took over
+    at the previous drop.
+    """
+    period_s = 1 / STREAM_RATE_HZ
+    outage_end_times = [0.0] * len(drones)
+    flap = 0
+    next_flap_time = time.monotonic() + FLAP_PERIOD_S
+    end_time = next_flap_time + FLAP_COUNT * FLAP_PERIOD_S
+    while time.monotonic() < end_time:
+        now = time.monotonic()
+        if flap < FLAP_COUNT and now >= next_flap_time:
+            index = flap % len(drones)
+            drop_drone(drones[index], False)
+            outage_end_times[index] = now + OUTAGE_S
+            flap += 1
+            next_flap_time += FLAP_PERIOD_S
+
+        for index, drone in enumerate(drones):
+            if now < outage_end_times[index]:
+                drop_drone(drone, True)
+                continue
+
+            # Accepts the ground station after a drop
+            drone.recv_msg()
+            drone.mav.attitude_send(0, 0, 0, 0, 0, 0, 0)
+
+        time.sleep(period_s)
+
+
+def main() -> int:
+    """
+    Runs with and without a standby and prints a table.
+    """
+    print(
+        f"{FLAP_COUNT} drops of {OUTAGE_S}s, {FLAP_PERIOD_S}s apart, {STREAM_RATE_HZ} Hz stream, "
+        f"reconnect backoff {RECONNECT_INITIAL_BACKOFF_S}s to {RECONNECT_MAX_BACKOFF_S}s"
+    )
+    print(f"{'layout':<12}{'flaps':>6}{'resumed':>9}{'mean ms':>9}{'max ms':>9}")
+    for name, endpoint_count in (("reconnect", 1), ("standby", 2)):
+        drones = [open_drone(0) for _ in range(endpoint_count)]
+        ports = [drone.listen.getsockname()[1] for drone in drones]
+        summary = mp.RawArray("d", 4)
+        ready = mp.Event()
+        done = mp.Event()
+
+        ground_station = mp.Process(target=run_ground_station, args=(ports, summary, ready, done))
+        ground_station.start()
+        # The standby is connected once the ground station is ready
+        while not ready.is_set():
+            for drone in drones:
+                drone.recv_msg()
+            time.sleep(0.01)
+
+        run_drone(drones)
+        done.set()
+        ground_station.join()
+        for drone in drones:
+            drone.close()
+
+        print(
+            f"{name:<12}{int(summary[0]):>6}{int(summary[1]):>9}"
+            f"{summary[2] * 1000:>9.1f}{summary[3] * 1000:>9.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
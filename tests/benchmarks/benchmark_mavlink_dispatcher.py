@@ -0,0 +1,249 @@
+"""
+Benchmark the messages delivered to the heartbeat and telemetry readers, and the CPU time used,
+with both reading the connection and with a dispatcher routing messages to them. To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_dispatcher
+```
+"""
+
+import multiprocessing as mp
+import resource
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+from utilities.mavlink import mavlink_dispatcher
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+RUN_TIME_S = 5.0
+# Time for the readers to catch up after the drone stops
+DRAIN_TIME_S = 0.5
+# Rate of each streamed message type, the heartbeat is 1 Hz
+STREAM_RATES_HZ = [50, 200]
+HEARTBEAT_PERIOD_S = 1.0
+READ_TIMEOUT_S = 0.1
+RECONNECT_BACKOFF_S = 0.1
+SUBSCRIPTION_QUEUE_MAX = 64
+SUBSCRIPTION_QUEUE_SLOT_SIZE = 512
+
+HEARTBEAT_TYPES = ["HEARTBEAT"]
+TELEMETRY_TYPES = ["ATTITUDE", "LOCAL_POSITION_NED"]
+# Counted per reader, in this order
+COUNTED_TYPES = HEARTBEAT_TYPES + TELEMETRY_TYPES
+
+
+def count_messages(
+    source: mavutil.mavfile | mavlink_dispatcher.MavlinkSubscription,
+    message_type: "str | None",
+    wanted_types: "list[str]",
+    counts: "mp.sharedctypes.SynchronizedArray",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Reads like the heartbeat receiver, with a type, or like telemetry, without one,
+    and counts the messages it wants.
+    """
+    while not controller.is_exit_requested():
+        message = source.recv_match(type=message_type, blocking=True, timeout=READ_TIMEOUT_S)
+        if message is None:
+            continue
+
+        if message.get_type() in wanted_types:
+            counts[COUNTED_TYPES.index(message.get_type())] += 1
+
+
+def create_subscription(message_types: "list[str]") -> mavlink_dispatcher.MavlinkSubscription:
+    """
+    Subscription with a queue like the one in bootcamp_main.
+    """
+    return mavlink_dispatcher.MavlinkSubscription(
+        message_types,
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            SUBSCRIPTION_QUEUE_MAX,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            SUBSCRIPTION_QUEUE_SLOT_SIZE,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        ),
+    )
+
+
+def run_ground_station(
+    port: int,
+    is_dispatched: bool,
+    counts: "mp.sharedctypes.SynchronizedArray",
+    ready: "mp.synchronize.Event",
+    done: "mp.synchronize.Event",
+) -> None:
+    """
+    Runs the readers until the drone is done.
+    """
+    connection_string = f"tcp:localhost:{port}"
+    connection = mavutil.mavlink_connection(connection_string)
+    controller = worker_controller.WorkerController()
+
+    workers = []
+    heartbeat_source = connection
+    telemetry_source = connection
+    if is_dispatched:
+        result, local_logger = logger.Logger.create("benchmark_mavlink_dispatcher", False)
+        if not result:
+            return
+
+        # Get Pylance to stop complaining
+        assert local_logger is not None
+
+        # The link is never silent or closed while running
+        result, link = connection_manager.ConnectionManager.create(
+            connection,
+            connection_string,
+            None,
+            RUN_TIME_S,
+            RECONNECT_BACKOFF_S,
+            RECONNECT_BACKOFF_S,
+            local_logger,
+        )
+        if not result:
+            return
+
+        heartbeat_source = create_subscription(HEARTBEAT_TYPES)
+        telemetry_source = create_subscription(TELEMETRY_TYPES)
+        workers.append(
+            mp.Process(
+                target=mavlink_dispatcher.mavlink_dispatcher_worker,
+                args=(link, [heartbeat_source, telemetry_source], controller),
+            )
+        )
+
+    workers.append(
+        mp.Process(
+            target=count_messages,
+            args=(heartbeat_source, "HEARTBEAT", HEARTBEAT_TYPES, counts, controller),
+        )
+    )
+    workers.append(
+        mp.Process(
+            target=count_messages,
+            args=(telemetry_source, None, TELEMETRY_TYPES, counts, controller),
+        )
+    )
+    for worker in workers:
+        worker.start()
+
+    ready.set()
+    done.wait()
+    time.sleep(DRAIN_TIME_S)
+
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+
+def run_drone(drone: mavutil.mavfile, stream_rate_hz: int) -> "list[int]":
+    """
+    Streams the telemetry types and 2 types no reader wants, with a heartbeat every period.
+
+    Returns the number of each counted type sent.
+    """
+    mav = drone.mav
+    stream = [
+        mav.attitude_encode(0, 0, 0, 0, 0, 0, 0),
+        mav.local_position_ned_encode(0, 0, 0, 0, 0, 0, 0),
+        mav.sys_status_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        mav.gps_raw_int_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ]
+    heartbeat = mav.heartbeat_encode(
+        mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+    )
+    sent_counts = [0] * len(COUNTED_TYPES)
+
+    period_s = 1 / stream_rate_hz
+    start_time = time.monotonic()
+    next_heartbeat_time = start_time
+    next_stream_time = start_time
+    while next_stream_time < start_time + RUN_TIME_S:
+        time.sleep(max(0.0, next_stream_time - time.monotonic()))
+        messages = list(stream)
+        if next_stream_time >= next_heartbeat_time:
+            messages.append(heartbeat)
+            next_heartbeat_time += HEARTBEAT_PERIOD_S
+
+        for message in messages:
+            mav.send(message)
+            if message.get_type() in COUNTED_TYPES:
+                sent_counts[COUNTED_TYPES.index(message.get_type())] += 1
+
+        next_stream_time += period_s
+
+    return sent_counts
+
+
+def main() -> int:
+    """
+    Runs each layout at each rate and prints a table.
+    """
+    print(f"{RUN_TIME_S}s each, 4 streamed types and a heartbeat every {HEARTBEAT_PERIOD_S}s")
+    print(
+        f"{'layout':<12}{'rate Hz':>8}{'msgs/s':>8}{'heartbeat %':>13}{'attitude %':>12}"
+        f"{'position %':>12}{'CPU %':>8}"
+    )
+    for stream_rate_hz in STREAM_RATES_HZ:
+        for name, is_dispatched in (("competing", False), ("dispatcher", True)):
+            drone = mavutil.mavlink_connection(
+                "tcpin:localhost:0", source_system=1, source_component=0
+            )
+            port = drone.listen.getsockname()[1]
+            counts = mp.RawArray("Q", len(COUNTED_TYPES))
+            ready = mp.Event()
+            done = mp.Event()
+
+            usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            start_time = time.monotonic()
+            ground_station = mp.Process(
+                target=run_ground_station, args=(port, is_dispatched, counts, ready, done)
+            )
+            ground_station.start()
+
+            # Accepts the ground station, and blocks instead of dropping when its socket is full
+            while drone.port is None:
+                drone.recv_msg()
+                time.sleep(0.01)
+            drone.port.setblocking(True)
+            ready.wait()
+
+            sent_counts = run_drone(drone, stream_rate_hz)
+            done.set()
+            ground_station.join()
+            elapsed_s = time.monotonic() - start_time
+            drone.close()
+            # Includes the readers and dispatcher, which the ground station waited for
+            usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+            cpu_s = (usage_after.ru_utime - usage_before.ru_utime) + (
+                usage_after.ru_stime - usage_before.ru_stime
+            )
+            delivered_percents = [
+                count / max(sent_count, 1) * 100 for count, sent_count in zip(counts, sent_counts)
+            ]
+            # Streamed types, the ones nobody wants, and the heartbeats
+            message_rate = (stream_rate_hz * 4) + 1 / HEARTBEAT_PERIOD_S
+            print(
+                f"{name:<12}{stream_rate_hz:>8}{message_rate:>8.0f}"
+                f"{delivered_percents[0]:>13.1f}{delivered_percents[1]:>12.1f}"
+                f"{delivered_percents[2]:>12.1f}{cpu_s / elapsed_s * 100:>8.1f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
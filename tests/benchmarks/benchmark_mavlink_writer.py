@@ -0,0 +1,218 @@
+"""
+Benchmark the heartbeat latency, sequence gaps seen by the drone, and CPU time used,
+with every worker writing the connection and with a writer sending for them. To run:
+```
+python -m tests.benchmarks.benchmark_mavlink_writer
+```
+"""
+
+import multiprocessing as mp
+import resource
+import statistics
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+from utilities.mavlink import mavlink_writer
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+RUN_TIME_S = 3.0
+# Time for the drone to read what is left after the senders stop
+DRAIN_TIME_S = 0.5
+HEARTBEAT_PERIOD_S = 0.05
+COMMAND_SENDER_COUNT = 2
+# Commands each sender sends back to back, every period
+COMMAND_BURST_SIZES = [1, 20]
+COMMAND_PERIOD_S = 0.01
+SEND_QUEUE_MAX = 32
+SEND_URGENT_QUEUE_MAX = 2
+SEND_QUEUE_SLOT_SIZE = 512
+READ_TIMEOUT_S = 0.1
+RECONNECT_BACKOFF_S = 0.1
+
+
+def get_time_us() -> int:
+    """
+    Monotonic time, comparable between processes, that fits in the custom mode of a heartbeat.
+    """
+    return (time.monotonic_ns() // 1000) & 0xFFFFFFFF
+
+
+def send_heartbeats(connection: mavutil.mavfile | mavlink_writer.MavlinkSender) -> None:
+    """
+    Sends heartbeats with their send time, like the heartbeat sender.
+    """
+    end_time = time.monotonic() + RUN_TIME_S
+    while time.monotonic() < end_time:
+        connection.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, get_time_us(), 0
+        )
+        time.sleep(HEARTBEAT_PERIOD_S)
+
+
+def send_commands(
+    connection: mavutil.mavfile | mavlink_writer.MavlinkSender, burst_size: int
+) -> None:
+    """
+    Sends bursts of commands, like the command worker does on each telemetry frame.
+    """
+    end_time = time.monotonic() + RUN_TIME_S
+    while time.monotonic() < end_time:
+        for _ in range(burst_size):
+            connection.mav.command_long_send(
+                1, 0, mavutil.mavlink.MAV_CMD_CONDITION_YAW, 0, 5, 5, 1, 1, 0, 0, 0
+            )
+        time.sleep(COMMAND_PERIOD_S)
+
+
+def run_ground_station(port: int, burst_size: int, is_written: bool) -> None:
+    """
+    Runs the senders, and the writer if used, until they are done.
+    """
+    connection_string = f"tcp:localhost:{port}"
+    connection = mavutil.mavlink_connection(connection_string, source_system=255)
+    controller = worker_controller.WorkerController()
+
+    sink = connection
+    writer = None
+    if is_written:
+        result, local_logger = logger.Logger.create("benchmark_mavlink_writer", False)
+        if not result:
+            return
+
+        # Get Pylance to stop complaining
+        assert local_logger is not None
+
+        # Only written, so never reconnected without a dispatcher
+        result, link = connection_manager.ConnectionManager.create(
+            connection,
+            connection_string,
+            None,
+            RUN_TIME_S,
+            RECONNECT_BACKOFF_S,
+            RECONNECT_BACKOFF_S,
+            local_logger,
+        )
+        if not result:
+            return
+
+        send_queue = priority_queue_wrapper.PriorityQueueWrapper(
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None,
+                SEND_URGENT_QUEUE_MAX,
+                queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+                SEND_QUEUE_SLOT_SIZE,
+                overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+            ),
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None,
+                SEND_QUEUE_MAX,
+                queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+                SEND_QUEUE_SLOT_SIZE,
+            ),
+        )
+        sink = mavlink_writer.MavlinkSender(send_queue)
+        writer = mp.Process(
+            target=mavlink_writer.mavlink_writer_worker, args=(link, send_queue, controller)
+        )
+        writer.start()
+
+    senders = [mp.Process(target=send_heartbeats, args=(sink,))]
+    for _ in range(COMMAND_SENDER_COUNT):
+        senders.append(mp.Process(target=send_commands, args=(sink, burst_size)))
+
+    for sender in senders:
+        sender.start()
+
+    for sender in senders:
+        sender.join()
+
+    if writer is not None:
+        time.sleep(DRAIN_TIME_S)
+        controller.request_exit()
+        writer.join()
+
+
+def run_drone(drone: mavutil.mavfile) -> "tuple[int, list[float]]":
+    """
+    Reads until the ground station has been quiet for a while after it started sending.
+
+    Returns the number of messages and the latencies of the heartbeats in milliseconds.
+    """
+    message_count = 0
+    latencies_ms = []
+    last_message_time = time.monotonic() + RUN_TIME_S
+    while time.monotonic() - last_message_time < DRAIN_TIME_S * 2:
+        message = drone.recv_match(blocking=True, timeout=READ_TIMEOUT_S)
+        if message is None:
+            continue
+
+        last_message_time = time.monotonic()
+        message_count += 1
+        if message.get_type() == "HEARTBEAT":
+            latency_us = (get_time_us() - message.custom_mode) & 0xFFFFFFFF
+            latencies_ms.append(latency_us / 1000)
+
+    return message_count, latencies_ms
+
+
+def main() -> int:
+    """
+    Runs each layout at each burst size and prints a table.
+    """
+    print(
+        f"{RUN_TIME_S}s each, heartbeat every {HEARTBEAT_PERIOD_S}s, "
+        f"{COMMAND_SENDER_COUNT} command senders bursting every {COMMAND_PERIOD_S}s"
+    )
+    print(
+        f"{'layout':<8}{'burst':>6}{'msgs':>8}{'seq gaps':>10}{'HB p50 ms':>11}"
+        f"{'HB max ms':>11}{'CPU %':>8}"
+    )
+    for burst_size in COMMAND_BURST_SIZES:
+        for name, is_written in (("direct", False), ("writer", True)):
+            drone = mavutil.mavlink_connection(
+                "tcpin:localhost:0", source_system=1, source_component=0
+            )
+            port = drone.listen.getsockname()[1]
+
+            usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            start_time = time.monotonic()
+            ground_station = mp.Process(
+                target=run_ground_station, args=(port, burst_size, is_written)
+            )
+            ground_station.start()
+
+            message_count, latencies_ms = run_drone(drone)
+            ground_station.join()
+            elapsed_s = time.monotonic() - start_time
+            # Includes the senders and writer, which the ground station waited for
+            usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            # Sequence numbers skipped, a frame from each sender repeats or skips numbers
+            sequence_gap_count = drone.mav_loss
+            drone.close()
+
+            cpu_s = (usage_after.ru_utime - usage_before.ru_utime) + (
+                usage_after.ru_stime - usage_before.ru_stime
+            )
+            latency_p50_ms = statistics.median(latencies_ms) if len(latencies_ms) > 0 else 0.0
+            latency_max_ms = max(latencies_ms, default=0.0)
+            print(
+                f"{name:<8}{burst_size:>6}{message_count:>8}{sequence_gap_count:>10}"
+                f"{latency_p50_ms:>11.2f}{latency_max_ms:>11.2f}{cpu_s / elapsed_s * 100:>8.1f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,99 @@
+"""
+Benchmark the latency of the pipe backend against the other backends. To run:
+```
+python -m tests.benchmarks.benchmark_pipe_queue
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+ROUND_TRIP_COUNT = 5_000
+QUEUE_MAX_SIZE = 1
+# Roughly the size of a TelemetryData: timestamp and 12 floats
+PAYLOAD = tuple(float(i) for i in range(12))
+BACKENDS = [
+    queue_proxy_wrapper.QueueBackend.MANAGER,
+    queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+    queue_proxy_wrapper.QueueBackend.PIPE,
+]
+
+
+def echo(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Sends every item back until sentinel.
+    """
+    while True:
+        item = input_queue.queue.get()
+        output_queue.queue.put(item)
+        if item is None:
+            return
+
+
+def percentile(sorted_values: "list[int]", fraction: float) -> int:
+    """
+    Nearest rank percentile of already sorted values.
+    """
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_backend(
+    mp_manager: "mp.managers.SyncManager", backend: queue_proxy_wrapper.QueueBackend
+) -> "tuple[float, float, float]":
+    """
+    Ping pong with an echo process, one message in flight at a time.
+
+    Returns p50, p99 and max one way latency (half the round trip) in microseconds.
+    """
+    request_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    response_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    worker = mp.Process(target=echo, args=(request_queue, response_queue))
+    worker.start()
+
+    latencies_ns = []
+    for _ in range(ROUND_TRIP_COUNT):
+        start_ns = time.perf_counter_ns()
+        request_queue.queue.put(PAYLOAD)
+        response_queue.queue.get()
+        latencies_ns.append((time.perf_counter_ns() - start_ns) // 2)
+
+    request_queue.queue.put(None)
+    response_queue.queue.get()
+    worker.join()
+
+    latencies_ns.sort()
+    return (
+        percentile(latencies_ns, 0.50) / 1000,
+        percentile(latencies_ns, 0.99) / 1000,
+        latencies_ns[-1] / 1000,
+    )
+
+
+def main() -> int:
+    """
+    Runs every backend and prints a table.
+    """
+    mp_manager = mp.Manager()
+
+    print(f"{ROUND_TRIP_COUNT} round trips, 1 producer and 1 consumer")
+    print(f"{'backend':<16}{'p50 us':>12}{'p99 us':>12}{'max us':>12}")
+    for backend in BACKENDS:
+        p50, p99, maximum = run_backend(mp_manager, backend)
+        print(f"{backend.name:<16}{p50:>12.1f}{p99:>12.1f}{maximum:>12.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,138 @@
+"""
+Benchmark the queue backends. To run:
+```
+python -m tests.benchmarks.benchmark_queue_backends
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+MESSAGE_COUNT = 20_000
+QUEUE_MAX_SIZE = 32
+# Roughly the size of a TelemetryData: timestamp and 12 floats
+PAYLOAD = tuple(float(i) for i in range(12))
+# Below the throughput of every backend, so that the queue stays almost empty
+PACED_RATE_HZ = 2000
+PACED_MESSAGE_COUNT = 5_000
+
+# Each put overwrites the item before, so their rate and latency are not comparable
+OVERWRITE_BACKENDS = [queue_proxy_wrapper.QueueBackend.LATEST_VALUE]
+
+
+def producer(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper, count: int, rate_hz: "float | None"
+) -> None:
+    """
+    Puts timestamped payloads followed by a sentinel, as fast as possible or at the rate.
+    """
+    next_send_time = time.perf_counter()
+    for _ in range(count):
+        if rate_hz is not None:
+            time.sleep(max(0.0, next_send_time - time.perf_counter()))
+            next_send_time += 1 / rate_hz
+
+        output_queue.queue.put((time.perf_counter_ns(), PAYLOAD))
+
+    output_queue.queue.put(None)
+
+
+def percentile(sorted_values: "list[int]", fraction: float) -> int:
+    """
+    Nearest rank percentile of already sorted values.
+    """
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run_backend(
+    mp_manager: "mp.managers.SyncManager",
+    backend: queue_proxy_wrapper.QueueBackend,
+    count: int,
+    rate_hz: "float | None",
+) -> "tuple[int, float, float, float]":
+    """
+    Streams messages from a producer process to this process.
+
+    Returns messages received, messages per second, p50 and p99 latency in microseconds.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    worker = mp.Process(target=producer, args=(wrapper, count, rate_hz))
+
+    latencies_ns = []
+    start = time.perf_counter()
+    worker.start()
+    while True:
+        item = wrapper.queue.get()
+        if item is None:
+            break
+        sent_ns, _ = item
+        latencies_ns.append(time.perf_counter_ns() - sent_ns)
+
+    elapsed = time.perf_counter() - start
+    worker.join()
+
+    latencies_ns.sort()
+    return (
+        len(latencies_ns),
+        len(latencies_ns) / elapsed,
+        percentile(latencies_ns, 0.50) / 1000,
+        percentile(latencies_ns, 0.99) / 1000,
+    )
+
+
+def main() -> int:
+    """
+    Runs every backend and prints a table.
+
+    Saturated, the producer is always ahead and the queue is full, so latency is mostly the time
+    behind the other `QUEUE_MAX_SIZE` items and the wakeups of both processes, not the transport.
+    A backend with more throughput can then show a higher p99, since its producer refills
+    the queue in bursts before the consumer is scheduled. Paced, the queue stays almost empty
+    and latency is the transport.
+    """
+    mp_manager = mp.Manager()
+    queued_backends = [
+        backend for backend in queue_proxy_wrapper.QueueBackend if backend not in OVERWRITE_BACKENDS
+    ]
+
+    print(f"maxsize {QUEUE_MAX_SIZE}")
+    print(
+        f"{'backend':<16}{'saturated msg/s':>17}{'p50 us':>10}{'p99 us':>10}"
+        f"{f'{PACED_RATE_HZ} msg/s p50 us':>22}{'p99 us':>10}"
+    )
+    for backend in queued_backends:
+        _, rate, p50, p99 = run_backend(mp_manager, backend, MESSAGE_COUNT, None)
+        _, _, paced_p50, paced_p99 = run_backend(
+            mp_manager, backend, PACED_MESSAGE_COUNT, PACED_RATE_HZ
+        )
+        print(
+            f"{backend.name:<16}{rate:>17.0f}{p50:>10.1f}{p99:>10.1f}"
+            f"{paced_p50:>22.1f}{paced_p99:>10.1f}"
+        )
+
+    print("Overwriting, the consumer only gets the newest item")
+    print(f"{'backend':<16}{'mode':>10}{'sent':>8}{'received':>10}{'dropped':>9}{'p50 us':>10}")
+    for backend in OVERWRITE_BACKENDS:
+        for mode, count, rate_hz in (
+            ("saturated", MESSAGE_COUNT, None),
+            ("paced", PACED_MESSAGE_COUNT, PACED_RATE_HZ),
+        ):
+            received, _, p50, _ = run_backend(mp_manager, backend, count, rate_hz)
+            print(
+                f"{backend.name:<16}{mode:>10}{count:>8}{received:>10}{count - received:>9}"
+                f"{p50:>10.1f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,130 @@
+"""
+Benchmark the time from requesting exit to every worker being joined. To run:
+```
+python -m tests.benchmarks.benchmark_shutdown
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import batch_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+RUN_COUNT = 5
+RUN_TIME_S = 0.5
+QUEUE_MAX_SIZE = 8
+# Period of the sleeping producer, like the heartbeat sender
+PRODUCER_PERIOD_S = 1.0
+
+
+def producer(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts an item every period.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        output_queue.queue.put(time.monotonic())
+        controller.wait_for_exit(PRODUCER_PERIOD_S)
+
+    controller.acknowledge_exit()
+
+
+def relay(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Forwards items, blocked on the input queue most of the time.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        item = input_queue.queue.get()
+        if item is None:
+            continue
+        output_queue.queue.put(item)
+
+    controller.acknowledge_exit()
+
+
+def consumer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Takes items, blocked on the input queue most of the time.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        input_queue.queue.get()
+
+    controller.acknowledge_exit()
+
+
+def run_pipeline(
+    mp_manager: batch_queue.BatchQueueManager, backend: queue_proxy_wrapper.QueueBackend
+) -> "tuple[float, int]":
+    """
+    Runs producer, relay and consumer, then shuts them down.
+
+    Returns the shutdown time in seconds and the number of workers which acknowledged exit.
+    """
+    controller = worker_controller.WorkerController()
+    first_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    second_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+    workers = [
+        mp.Process(target=producer, args=(first_queue, controller)),
+        mp.Process(target=relay, args=(first_queue, second_queue, controller)),
+        mp.Process(target=consumer, args=(second_queue, controller)),
+    ]
+    for worker in workers:
+        worker.start()
+
+    time.sleep(RUN_TIME_S)
+
+    start = time.monotonic()
+    controller.request_exit()
+    first_queue.close()
+    second_queue.close()
+    for worker in workers:
+        worker.join()
+
+    return time.monotonic() - start, controller.get_exit_acknowledged_count()
+
+
+def main() -> int:
+    """
+    Runs the pipeline on each backend and prints a table.
+    """
+    mp_manager = batch_queue.create_manager()
+
+    print(f"3 workers, {RUN_COUNT} runs, producer period {PRODUCER_PERIOD_S}s")
+    print(f"{'backend':<16}{'mean ms':>12}{'max ms':>12}{'acked':>8}")
+    for backend in (
+        queue_proxy_wrapper.QueueBackend.MANAGER,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        queue_proxy_wrapper.QueueBackend.PIPE,
+    ):
+        results = [run_pipeline(mp_manager, backend) for _ in range(RUN_COUNT)]
+        times_ms = [elapsed * 1000 for elapsed, _ in results]
+        acked = min(count for _, count in results)
+        print(
+            f"{backend.name:<16}{sum(times_ms) / RUN_COUNT:>12.1f}{max(times_ms):>12.1f}{acked:>8}"
+        )
+
+    mp_manager.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,183 @@
+"""
+Benchmark the telemetry messages the drone sends and the frames telemetry gathers from them,
+taking the rates the drone streams at and requesting them. To run:
+```
+python -m tests.benchmarks.benchmark_stream_rate
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import stream_rate
+from modules.telemetry import telemetry
+
+
+RUN_TIME_S = 10.0
+TELEMETRY_PERIOD_S = 0.2
+TELEMETRY_MESSAGES_PER_PERIOD = 2
+TELEMETRY_RATE_TOLERANCE = 0.25
+TELEMETRY_RATE_CHECK_PERIOD_COUNT = 10
+# Rate the drone streams at until requested, like an autopilot default
+DEFAULT_STREAM_RATE_HZ = 50
+# Halfway through, ATTITUDE slows down to this, like another ground station requesting it
+DRIFTED_ATTITUDE_INTERVAL_S = 1.0
+# Longest time the drone waits before reading requests
+REQUEST_POLL_PERIOD_S = 0.01
+
+STREAMED_TYPES = ["ATTITUDE", "LOCAL_POSITION_NED"]
+
+
+def run_ground_station(
+    port: int,
+    is_requested: bool,
+    results: "mp.sharedctypes.SynchronizedArray",
+) -> None:
+    """
+    Gathers telemetry frames for the run time.
+    """
+    result, local_logger = logger.Logger.create("benchmark_stream_rate", False)
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    connection = mavutil.mavlink_connection(f"tcp:localhost:{port}")
+    stream_rates = None
+    if is_requested:
+        result, stream_rates = stream_rate.StreamRate.create(
+            connection,
+            STREAMED_TYPES,
+            TELEMETRY_PERIOD_S / TELEMETRY_MESSAGES_PER_PERIOD,
+            TELEMETRY_RATE_TOLERANCE,
+            TELEMETRY_PERIOD_S * TELEMETRY_RATE_CHECK_PERIOD_COUNT,
+            local_logger,
+        )
+        if not result:
+            return
+
+    result, instance = telemetry.Telemetry.create(
+        connection, TELEMETRY_PERIOD_S, local_logger, stream_rates
+    )
+    if not result:
+        return
+
+    # Get Pylance to stop complaining
+    assert instance is not None
+
+    frame_count = 0
+    failed_count = 0
+    end_time = time.monotonic() + RUN_TIME_S
+    while time.monotonic() < end_time:
+        result, _ = instance.run()
+        if result:
+            frame_count += 1
+        else:
+            failed_count += 1
+
+    results[0] = frame_count
+    results[1] = failed_count
+    results[2] = 0 if stream_rates is None else stream_rates.get_request_count()
+    connection.close()
+
+
+def run_drone(drone: mavutil.mavfile) -> int:
+    """
+    Streams each type at its interval, changed by MAV_CMD_SET_MESSAGE_INTERVAL ,
+    for the run time once the ground station connected.
+
+    Returns the number of messages sent.
+    """
+    intervals_s = dict.fromkeys(STREAMED_TYPES, 1 / DEFAULT_STREAM_RATE_HZ)
+    message_ids = {
+        getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}"): message_type
+        for message_type in STREAMED_TYPES
+    }
+    start_time = None
+    next_send_times = {}
+    is_drifted = False
+    sent_count = 0
+    while start_time is None or time.monotonic() - start_time < RUN_TIME_S:
+        # Also accepts the ground station
+        message = drone.recv_match(type="COMMAND_LONG")
+        if (
+            message is not None
+            and message.command == mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL
+            and int(message.param1) in message_ids
+        ):
+            intervals_s[message_ids[int(message.param1)]] = message.param2 / 1e6
+
+        if drone.port is None:
+            time.sleep(REQUEST_POLL_PERIOD_S)
+            continue
+
+        now = time.monotonic()
+        if start_time is None:
+            start_time = now
+            next_send_times = dict.fromkeys(STREAMED_TYPES, now)
+
+        if not is_drifted and now - start_time >= RUN_TIME_S / 2:
+            intervals_s["ATTITUDE"] = DRIFTED_ATTITUDE_INTERVAL_S
+            is_drifted = True
+
+        time_boot_ms = int((now - start_time) * 1000)
+        for message_type in STREAMED_TYPES:
+            if now < next_send_times[message_type]:
+                continue
+
+            if message_type == "ATTITUDE":
+                drone.mav.attitude_send(time_boot_ms, 0, 0, 0, 0, 0, 0)
+            else:
+                drone.mav.local_position_ned_send(time_boot_ms, 0, 0, 0, 0, 0, 0)
+            sent_count += 1
+            next_send_times[message_type] = max(
+                now, next_send_times[message_type] + intervals_s[message_type]
+            )
+
+        # Wakes for the next message, or soon enough to read a request
+        wait_s = min(next_send_times.values()) - time.monotonic()
+        time.sleep(min(max(0.0, wait_s), REQUEST_POLL_PERIOD_S))
+
+    return sent_count
+
+
+def main() -> int:
+    """
+    Runs without and with requested rates and prints a table.
+    """
+    interval_s = TELEMETRY_PERIOD_S / TELEMETRY_MESSAGES_PER_PERIOD
+    print(
+        f"{RUN_TIME_S}s each, telemetry period {TELEMETRY_PERIOD_S}s, drone streams at "
+        f"{DEFAULT_STREAM_RATE_HZ} Hz, ATTITUDE every {DRIFTED_ATTITUDE_INTERVAL_S}s "
+        f"after {RUN_TIME_S / 2}s, requested every {interval_s}s"
+    )
+    print(f"{'layout':<11}{'msgs/s':>8}{'frames/s':>10}{'failed':>8}{'requests':>10}")
+    for name, is_requested in (("passive", False), ("requested", True)):
+        drone = mavutil.mavlink_connection("tcpin:localhost:0", source_system=1, source_component=0)
+        port = drone.listen.getsockname()[1]
+        results = mp.RawArray("Q", 3)
+
+        ground_station = mp.Process(target=run_ground_station, args=(port, is_requested, results))
+        ground_station.start()
+        sent_count = run_drone(drone)
+        ground_station.join()
+        drone.close()
+
+        print(
+            f"{name:<11}{sent_count / RUN_TIME_S:>8.1f}{results[0] / RUN_TIME_S:>10.1f}"
+            f"{results[1]:>8}{results[2]:>10}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,70 @@
+"""
+Benchmark the telemetry codec against pickle. To run:
+```
+python -m tests.benchmarks.benchmark_telemetry_codec
+```
+"""
+
+import pickle
+import timeit
+
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_codec
+
+
+REPEAT_COUNT = 100_000
+
+
+def main() -> int:
+    """
+    Times a round trip per message and compares sizes.
+    """
+    data = telemetry.TelemetryData(
+        time_since_boot=123_456,
+        x=1.5,
+        y=-2.25,
+        z=30.0,
+        x_velocity=0.1,
+        y_velocity=0.2,
+        z_velocity=-0.3,
+        roll=0.01,
+        pitch=-0.02,
+        yaw=1.57,
+        roll_speed=0.001,
+        pitch_speed=0.002,
+        yaw_speed=0.003,
+    )
+
+    # Round trips should not lose anything
+    result, decoded = telemetry_codec.decode(telemetry_codec.encode(data))
+    if not result or str(decoded) != str(data):
+        print("ERROR: Codec round trip does not match")
+        return -1
+
+    pickle_size = len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+    pickle_s = timeit.timeit(
+        lambda: pickle.loads(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)), number=REPEAT_COUNT
+    )
+    # Queues pickle whatever they carry, so the codec pays for pickling its bytes too
+    codec_size = len(pickle.dumps(telemetry_codec.encode(data), pickle.HIGHEST_PROTOCOL))
+    codec_s = timeit.timeit(
+        lambda: telemetry_codec.decode(
+            pickle.loads(pickle.dumps(telemetry_codec.encode(data), pickle.HIGHEST_PROTOCOL))
+        ),
+        number=REPEAT_COUNT,
+    )
+
+    print(f"{'':<8}{'bytes':>8}{'us/msg':>10}")
+    print(f"{'pickle':<8}{pickle_size:>8}{pickle_s / REPEAT_COUNT * 1e6:>10.2f}")
+    print(f"{'codec':<8}{codec_size:>8}{codec_s / REPEAT_COUNT * 1e6:>10.2f}")
+    print(f"Size factor {pickle_size / codec_size:.2f}, time factor {pickle_s / codec_s:.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
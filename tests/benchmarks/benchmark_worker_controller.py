@@ -0,0 +1,112 @@
+"""
+Benchmark the per iteration cost of the worker controller checks. To run:
+```
+python -m tests.benchmarks.benchmark_worker_controller
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import worker_controller
+
+
+WORKER_COUNT = 4
+ITERATION_COUNT = 20_000
+
+
+class LegacyWorkerController:
+    """
+    Previous controller, an exit queue and a pause semaphore, kept for comparison.
+    """
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Acquires and releases the pause semaphore.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def request_exit(self) -> None:
+        """
+        Puts into the exit queue.
+        """
+        if self.__exit_queue.empty():
+            self.__exit_queue.put(None)
+
+    def is_exit_requested(self) -> bool:
+        """
+        Checks the exit queue.
+        """
+        return not self.__exit_queue.empty()
+
+
+def worker(
+    controller: "worker_controller.WorkerController | LegacyWorkerController",
+    start_event: "mp.synchronize.Event",
+    result_queue: "mp.Queue",
+) -> None:
+    """
+    Runs the checks of a worker loop with no work, reports nanoseconds per iteration.
+    """
+    start_event.wait()
+    start_ns = time.perf_counter_ns()
+    for _ in range(ITERATION_COUNT):
+        if controller.is_exit_requested():
+            break
+        controller.check_pause()
+
+    result_queue.put((time.perf_counter_ns() - start_ns) / ITERATION_COUNT)
+
+
+def run_controller(
+    controller: "worker_controller.WorkerController | LegacyWorkerController",
+) -> "tuple[float, float]":
+    """
+    Runs the checks in every worker at once.
+
+    Returns the mean and worst nanoseconds per iteration over the workers.
+    """
+    start_event = mp.Event()
+    result_queue = mp.Queue()
+    workers = [
+        mp.Process(target=worker, args=(controller, start_event, result_queue))
+        for _ in range(WORKER_COUNT)
+    ]
+    for process in workers:
+        process.start()
+
+    start_event.set()
+    results = [result_queue.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    return sum(results) / len(results), max(results)
+
+
+def main() -> int:
+    """
+    Runs both controllers and prints a table.
+    """
+    print(f"{WORKER_COUNT} workers, {ITERATION_COUNT} iterations each")
+    print(f"{'controller':<16}{'mean ns':>12}{'worst ns':>12}")
+    for name, controller in (
+        ("legacy", LegacyWorkerController()),
+        ("shared flags", worker_controller.WorkerController()),
+    ):
+        mean_ns, worst_ns = run_controller(controller)
+        print(f"{name:<16}{mean_ns:>12.0f}{worst_ns:>12.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
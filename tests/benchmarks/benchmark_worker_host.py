@@ -0,0 +1,129 @@
+"""
+Benchmark the startup time and memory of sleeping workers as processes and as threads
+of one host process. To run:
+```
+python -m tests.benchmarks.benchmark_worker_host
+```
+"""
+
+import multiprocessing as mp
+import time
+
+# Imported for its memory, which every worker that talks to the drone holds
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+
+
+WORKER_COUNT = 4
+# Period of the sleeping worker, like the heartbeat sender
+WORKER_PERIOD_S = 1.0
+
+
+def sleeping_worker(
+    index: int,
+    startup_times_ns: "mp.sharedctypes.SynchronizedArray",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Records when its loop first runs, then wakes every period until exit.
+    """
+    startup_times_ns[index] = time.monotonic_ns()
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        controller.wait_for_exit(WORKER_PERIOD_S)
+
+    controller.acknowledge_exit()
+
+
+def read_memory_kb(pid: int) -> "tuple[int, int]":
+    """
+    Returns the resident and proportional set sizes of a process,
+    the latter splits pages shared with other processes between them.
+    """
+    rss_kb = 0
+    with open(f"/proc/{pid}/status", encoding="utf-8") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+
+    pss_kb = 0
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as smaps:
+        for line in smaps:
+            if line.startswith("Pss:"):
+                pss_kb = int(line.split()[1])
+
+    return rss_kb, pss_kb
+
+
+def run_workers(host: "worker_host.WorkerHost | None") -> "tuple[float, int, int]":
+    """
+    Starts the workers as processes, or as threads of the host, and waits for each to loop.
+
+    Returns the time until the last worker looped in milliseconds, and the total resident
+    and proportional set sizes of the worker processes in kB.
+    """
+    controller = worker_controller.WorkerController()
+    startup_times_ns = mp.RawArray("Q", WORKER_COUNT)
+    workers = []
+    for index in range(WORKER_COUNT):
+        args = (index, startup_times_ns, controller)
+        if host is None:
+            workers.append(mp.Process(target=sleeping_worker, args=args))
+            continue
+
+        result, worker = host.add_worker(sleeping_worker, args)
+        assert result
+        workers.append(worker)
+
+    start_ns = time.monotonic_ns()
+    for worker in workers:
+        worker.start()
+
+    while 0 in startup_times_ns[:]:
+        time.sleep(0.001)
+
+    startup_ms = (max(startup_times_ns) - start_ns) / 1e6
+
+    if host is None:
+        pids = [worker.pid for worker in workers]
+    else:
+        pids = [host.get_pid()]
+
+    rss_kb = 0
+    pss_kb = 0
+    for pid in pids:
+        process_rss_kb, process_pss_kb = read_memory_kb(pid)
+        rss_kb += process_rss_kb
+        pss_kb += process_pss_kb
+
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+    return startup_ms, rss_kb, pss_kb
+
+
+def main() -> int:
+    """
+    Runs the workers both ways and prints a table.
+    """
+    print(f"{WORKER_COUNT} sleeping workers")
+    print(f"{'mode':<12}{'startup ms':>12}{'RSS kB':>12}{'PSS kB':>12}")
+    for name, host in (
+        ("processes", None),
+        ("threads", worker_host.WorkerHost()),
+    ):
+        startup_ms, rss_kb, pss_kb = run_workers(host)
+        print(f"{name:<12}{startup_ms:>12.1f}{rss_kb:>12}{pss_kb:>12}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
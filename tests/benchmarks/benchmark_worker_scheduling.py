@@ -0,0 +1,161 @@
+"""
+Benchmark the wakeup jitter of a periodic worker next to CPU heavy workers,
+for each way of scheduling them. To run:
+```
+python -m tests.benchmarks.benchmark_worker_scheduling
+```
+"""
+
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_scheduling
+
+
+PERIOD_S = 0.005
+ITERATION_COUNT = 400
+# Like the log-heavy telemetry worker, one more than there are CPUs so they are all busy
+BUSY_WORKER_COUNT = (os.cpu_count() or 1) + 1
+BUSY_NICE = 19
+REALTIME_PRIORITY = 10
+
+
+def periodic_worker(
+    latenesses_us: "mp.sharedctypes.SynchronizedArray",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Wakes every period, like the heartbeat sender, and records how late each wakeup was.
+    """
+    deadline = time.monotonic()
+    for i in range(ITERATION_COUNT):
+        deadline += PERIOD_S
+        time.sleep(max(0.0, deadline - time.monotonic()))
+        latenesses_us[i] = max(0.0, time.monotonic() - deadline) * 1e6
+
+    controller.acknowledge_exit()
+
+
+def busy_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Uses all of the CPU it gets until exit.
+    """
+    while not controller.is_exit_requested():
+        sum(range(10000))
+
+
+def create_worker(
+    scheduling: "worker_scheduling.WorkerScheduling | None",
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+) -> mp.Process:
+    """
+    Creates a worker which applies the scheduling settings, like WorkerManager does.
+    """
+    if scheduling is None:
+        return mp.Process(target=target, args=args)
+
+    return mp.Process(target=worker_scheduling.scheduled_worker, args=(scheduling, target, args))
+
+
+def run_workers(
+    periodic_scheduling: "worker_scheduling.WorkerScheduling | None",
+    busy_scheduling: "worker_scheduling.WorkerScheduling | None",
+) -> "list[float]":
+    """
+    Runs the periodic worker next to the busy workers.
+
+    Returns the lateness of each wakeup in microseconds.
+    """
+    controller = worker_controller.WorkerController()
+    latenesses_us = mp.RawArray("d", ITERATION_COUNT)
+    busy_workers = [
+        create_worker(busy_scheduling, busy_worker, (controller,)) for _ in range(BUSY_WORKER_COUNT)
+    ]
+    for worker in busy_workers:
+        worker.start()
+
+    periodic = create_worker(periodic_scheduling, periodic_worker, (latenesses_us, controller))
+    periodic.start()
+    periodic.join()
+
+    controller.request_exit()
+    for worker in busy_workers:
+        worker.join()
+
+    return list(latenesses_us)
+
+
+def main() -> int:
+    """
+    Runs each configuration and prints a table.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_scheduling", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    result, nice_busy = worker_scheduling.WorkerScheduling.create(
+        None, BUSY_NICE, None, 1, local_logger
+    )
+    if not result:
+        return -1
+
+    result, realtime_periodic = worker_scheduling.WorkerScheduling.create(
+        None, None, worker_scheduling.RealtimePolicy.FIFO, REALTIME_PRIORITY, local_logger
+    )
+    if not result:
+        return -1
+
+    configurations = [
+        ("default", None, None),
+        (f"busy nice {BUSY_NICE}", None, nice_busy),
+        ("periodic FIFO", realtime_periodic, None),
+    ]
+
+    # Separate cores are only possible with more than 1
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) > 1:
+        result, first_cpu = worker_scheduling.WorkerScheduling.create(
+            {cpus[0]}, None, None, 1, local_logger
+        )
+        if not result:
+            return -1
+
+        result, other_cpus = worker_scheduling.WorkerScheduling.create(
+            set(cpus[1:]), None, None, 1, local_logger
+        )
+        if not result:
+            return -1
+
+        configurations.append(("separate CPUs", first_cpu, other_cpus))
+
+    print(
+        f"Period {PERIOD_S * 1000}ms, {ITERATION_COUNT} wakeups, "
+        f"{BUSY_WORKER_COUNT} busy workers on {len(cpus)} CPUs"
+    )
+    print(f"{'configuration':<20}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for name, periodic_scheduling, busy_scheduling in configurations:
+        latenesses_us = sorted(run_workers(periodic_scheduling, busy_scheduling))
+        p99_us = latenesses_us[int(len(latenesses_us) * 0.99)]
+        print(
+            f"{name:<20}{statistics.median(latenesses_us):>10.0f}"
+            f"{p99_us:>10.0f}{latenesses_us[-1]:>10.0f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -0,0 +1,103 @@
+"""
+Benchmark the time from starting a worker to its first loop iteration,
+for each start method. To run:
+```
+python -m tests.benchmarks.benchmark_worker_startup
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.forkserver
+import statistics
+import time
+
+# Imported for its cost, which every worker that talks to the drone pays
+from pymavlink import mavutil  # pylint: disable=unused-import
+
+from utilities.workers import worker_controller
+
+
+RUN_COUNT = 5
+WORKER_COUNT = 4
+# Everything this module imports, so that re-importing it in each worker is cheap
+FORKSERVER_PRELOAD_MODULES = ["pymavlink.mavutil", "utilities.workers.worker_controller"]
+
+
+def first_iteration_worker(
+    start_ns: int,
+    index: int,
+    startup_times_ns: "mp.sharedctypes.SynchronizedArray",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Records the time of its first loop iteration, then waits for exit.
+    """
+    is_first = True
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        if is_first:
+            startup_times_ns[index] = time.monotonic_ns() - start_ns
+            is_first = False
+        controller.wait_for_exit(None)
+
+    controller.acknowledge_exit()
+
+
+def run_workers(start_method: str) -> "list[float]":
+    """
+    Starts workers with the start method and waits for each to reach its loop.
+
+    Returns the startup time of each worker in milliseconds.
+    """
+    context = mp.get_context(start_method)
+    controller = worker_controller.WorkerController()
+    startup_times_ns = mp.RawArray("Q", WORKER_COUNT)
+    workers = []
+    for index in range(WORKER_COUNT):
+        worker = context.Process(
+            target=first_iteration_worker,
+            args=(time.monotonic_ns(), index, startup_times_ns, controller),
+        )
+        worker.start()
+        workers.append(worker)
+
+    while 0 in startup_times_ns[:]:
+        time.sleep(0.001)
+
+    controller.request_exit()
+    for worker in workers:
+        worker.join()
+
+    return [startup_time_ns / 1e6 for startup_time_ns in startup_times_ns]
+
+
+def main() -> int:
+    """
+    Starts workers with each start method and prints a table.
+    """
+    # Locks created in a fork context cannot be passed to spawn or forkserver workers
+    mp.set_start_method("forkserver", force=True)
+    mp.set_forkserver_preload(FORKSERVER_PRELOAD_MODULES)
+    multiprocessing.forkserver.ensure_running()
+
+    print(f"{WORKER_COUNT} workers, {RUN_COUNT} runs, time to first loop iteration")
+    print(f"{'start method':<16}{'p50 ms':>12}{'mean ms':>12}{'max ms':>12}")
+    for start_method in ("spawn", "fork", "forkserver"):
+        times_ms = []
+        for _ in range(RUN_COUNT):
+            times_ms += run_workers(start_method)
+
+        print(
+            f"{start_method:<16}{statistics.median(times_ms):>12.1f}"
+            f"{statistics.mean(times_ms):>12.1f}{max(times_ms):>12.1f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Success!")
@@ -37,6 +37,8 @@ TURNING_SPEED = 5  # deg/s
 # =================================================================================================
 # Add your own constants here
 TELEMETRY_PERIOD_S = TELEMETRY_PERIOD
+# Process each frame as it arrives
+BATCH_SIZE = 1
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -258,6 +260,7 @@ def main() -> int:
         Z_SPEED,
         ANGLE_TOLERANCE,
         HEIGHT_TOLERANCE,
+        BATCH_SIZE,
         input_queue,
         main_queue,
         controller,
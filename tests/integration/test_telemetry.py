@@ -13,6 +13,7 @@ from pymavlink import mavutil
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
+from modules.telemetry import telemetry_codec
 from modules.telemetry import telemetry_worker
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
@@ -31,6 +32,8 @@ NUM_FAILS = 3
 # =================================================================================================
 # Add your own constants here
 TELEMETRY_TIMEOUT_S = TELEMETRY_PERIOD
+# Forward each frame as it arrives
+BATCH_SIZE = 1
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -72,7 +75,12 @@ def read_queue(
             break
         if item is None:
             continue
-        main_logger.info(str(item))
+        # The worker forwards encoded telemetry
+        result, data = telemetry_codec.decode(item)
+        if not result:
+            main_logger.error("Failed to decode telemetry data")
+            continue
+        main_logger.info(str(data))
 
 
 # =================================================================================================
@@ -147,6 +155,9 @@ def main() -> int:
     telemetry_worker.telemetry_worker(
         connection,
         TELEMETRY_TIMEOUT_S,
+        BATCH_SIZE,
+        # The mock drone streams at fixed rates
+        None,
         main_queue,
         controller,
     )
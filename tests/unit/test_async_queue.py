@@ -0,0 +1,124 @@
+"""
+Test the asyncio queue adapter.
+"""
+
+import asyncio
+import multiprocessing as mp
+import time
+
+from utilities.workers import async_queue
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 2
+ITEM_COUNT = 5
+PRODUCER_DELAY_S = 0.05
+
+
+def create_queue(notifier: queue_selector.QueueNotifier) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Shared memory queue, which works without a manager.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        notifier=notifier,
+    )
+
+
+def produce(output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Producer in another process, ends with sentinel.
+    """
+    for i in range(ITEM_COUNT):
+        time.sleep(PRODUCER_DELAY_S)
+        output_queue.queue.put(i)
+
+    output_queue.queue.put(None)
+
+
+async def consume_list(queue_async: async_queue.AsyncQueue) -> "list[object]":
+    """
+    Gets items until sentinel.
+    """
+    return [item async for item in queue_async]
+
+
+async def consume_all(
+    wrappers: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    notifier: queue_selector.QueueNotifier,
+) -> "list[list[object]]":
+    """
+    Iterates over every queue concurrently on one event loop.
+    """
+    async_notifier = async_queue.AsyncNotifier(notifier, asyncio.get_running_loop())
+    try:
+        return await asyncio.gather(
+            *(consume_list(async_queue.AsyncQueue(wrapper, async_notifier)) for wrapper in wrappers)
+        )
+    finally:
+        async_notifier.close()
+
+
+async def put_past_full(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper, notifier: queue_selector.QueueNotifier
+) -> "list[object]":
+    """
+    Puts more items than fit while another task gets them.
+    """
+    async_notifier = async_queue.AsyncNotifier(notifier, asyncio.get_running_loop())
+    queue_async = async_queue.AsyncQueue(wrapper, async_notifier)
+
+    async def produce_async() -> None:
+        for i in range(ITEM_COUNT):
+            await queue_async.put(i)
+        await queue_async.put(None)
+
+    try:
+        _, items = await asyncio.gather(produce_async(), consume_list(queue_async))
+    finally:
+        async_notifier.close()
+
+    return items
+
+
+class TestAsyncQueue:
+    """
+    One event loop services many queues.
+    """
+
+    def test_many_producers(self) -> None:
+        """
+        Items from processes arrive in order on each queue.
+        """
+        # Setup
+        notifier = queue_selector.QueueNotifier()
+        wrappers = [create_queue(notifier), create_queue(notifier)]
+        producers = [mp.Process(target=produce, args=(wrapper,)) for wrapper in wrappers]
+        for producer in producers:
+            producer.start()
+
+        # Run
+        results = asyncio.run(consume_all(wrappers, notifier))
+
+        # Test
+        for producer in producers:
+            producer.join()
+        assert results == [list(range(ITEM_COUNT)), list(range(ITEM_COUNT))]
+
+    def test_put_waits_for_space(self) -> None:
+        """
+        Put on a full queue resumes once a get makes space.
+        """
+        notifier = queue_selector.QueueNotifier()
+
+        items = asyncio.run(put_past_full(create_queue(notifier), notifier))
+
+        assert items == list(range(ITEM_COUNT))
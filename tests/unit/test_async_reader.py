@@ -0,0 +1,132 @@
+"""
+Test reading a MAVLink connection from an event loop.
+"""
+
+import asyncio
+
+import pytest
+from pymavlink import mavutil
+
+from utilities.mavlink import async_reader
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+RECEIVE_TIMEOUT_S = 5.0
+
+
+@pytest.fixture()
+def connections() -> "tuple[mavutil.mavfile, mavutil.mavfile]":  # type: ignore
+    """
+    Drone and ground station connected over TCP.
+    """
+    drone = mavutil.mavlink_connection("tcpin:localhost:0", source_system=1, source_component=0)
+    port = drone.listen.getsockname()[1]
+    ground_station = mavutil.mavlink_connection(f"tcp:localhost:{port}")
+    # Accepts the ground station
+    drone.recv_msg()
+
+    yield drone, ground_station  # type: ignore
+
+    ground_station.close()
+    drone.close()
+
+
+def send_messages(drone: mavutil.mavfile) -> None:
+    """
+    Sends a heartbeat and an attitude.
+    """
+    drone.mav.heartbeat_send(
+        mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+    )
+    drone.mav.attitude_send(1, 0, 0, 0, 0, 0, 0)
+
+
+async def read_messages(
+    drone: mavutil.mavfile, ground_station: mavutil.mavfile
+) -> "tuple[list[str], list[str], list[str], bool]":
+    """
+    Subscribes, has the drone send and disconnect, and reads until disconnected.
+
+    Returns the message types each subscriber got, and whether still connected.
+    """
+    reader = async_reader.AsyncMavlinkReader(ground_station, asyncio.get_running_loop())
+    heartbeats = reader.subscribe(["HEARTBEAT"], 0)
+    attitudes = reader.subscribe(["ATTITUDE"], 0)
+    everything = reader.subscribe(["HEARTBEAT", "ATTITUDE"], 0)
+    reader.start()
+
+    send_messages(drone)
+    types = [
+        [(await asyncio.wait_for(heartbeats.get(), RECEIVE_TIMEOUT_S)).get_type()],
+        [(await asyncio.wait_for(attitudes.get(), RECEIVE_TIMEOUT_S)).get_type()],
+        [
+            (await asyncio.wait_for(everything.get(), RECEIVE_TIMEOUT_S)).get_type()
+            for _ in range(2)
+        ],
+    ]
+
+    drone.close()
+    for _ in range(int(RECEIVE_TIMEOUT_S / 0.01)):
+        if not reader.is_connected():
+            break
+        await asyncio.sleep(0.01)
+
+    return types[0], types[1], types[2], reader.is_connected()
+
+
+class TestAsyncMavlinkReader:
+    """
+    Messages go to the subscribers of their type.
+    """
+
+    def test_routes_by_type(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        Each subscriber gets only its types, in order, and the end of the connection is seen.
+        """
+        # Setup
+        drone, ground_station = connections
+
+        # Run
+        heartbeats, attitudes, everything, is_connected = asyncio.run(
+            read_messages(drone, ground_station)
+        )
+
+        # Test
+        assert heartbeats == ["HEARTBEAT"]
+        assert attitudes == ["ATTITUDE"]
+        assert everything == ["HEARTBEAT", "ATTITUDE"]
+        assert not is_connected
+        assert ground_station.messages["ATTITUDE"].time_boot_ms == 1
+
+    def test_full_subscriber_drops_oldest(
+        self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]"
+    ) -> None:
+        """
+        A full subscriber keeps the newest messages.
+        """
+        # Setup
+        drone, ground_station = connections
+
+        async def read_newest() -> "tuple[int, int]":
+            reader = async_reader.AsyncMavlinkReader(ground_station, asyncio.get_running_loop())
+            attitudes = reader.subscribe(["ATTITUDE"], 1)
+            reader.start()
+            for time_boot_ms in range(1, 4):
+                drone.mav.attitude_send(time_boot_ms, 0, 0, 0, 0, 0, 0)
+
+            while reader.get_message_count() < 3:
+                await asyncio.sleep(0.01)
+
+            reader.stop()
+            return attitudes.get_nowait().time_boot_ms, reader.get_dropped_count()
+
+        # Run
+        newest_time_boot_ms, dropped_count = asyncio.run(asyncio.wait_for(read_newest(), 5.0))
+
+        # Test
+        assert newest_time_boot_ms == 3
+        assert dropped_count == 2
@@ -0,0 +1,106 @@
+"""
+Test bulk queue operations.
+"""
+
+import pytest
+
+from utilities.workers import batch_queue
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> batch_queue.BatchQueueManager:  # type: ignore
+    """
+    Manager hosting batch queues.
+    """
+    manager = batch_queue.create_manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(
+    params=[
+        queue_proxy_wrapper.QueueBackend.MANAGER,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+    ]
+)
+def wrapper(
+    request: pytest.FixtureRequest, mp_manager: batch_queue.BatchQueueManager
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Wrapper for each backend that keeps every item.
+    """
+    queue_wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, request.param)
+    yield queue_wrapper  # type: ignore
+
+
+class TestBatchQueue:
+    """
+    Server side queue, tested in process.
+    """
+
+    def test_put_many_partial(self) -> None:
+        """
+        Only as many items as fit are put without blocking.
+        """
+        # Setup
+        batch = batch_queue.BatchQueue(QUEUE_MAX_SIZE)
+        expected = QUEUE_MAX_SIZE
+
+        # Run
+        actual = batch.put_many(list(range(10)), False)
+
+        # Test
+        assert actual == expected
+        assert batch.qsize() == QUEUE_MAX_SIZE
+
+    def test_get_many_timeout(self) -> None:
+        """
+        Nothing arrives before the timeout.
+        """
+        batch = batch_queue.BatchQueue(QUEUE_MAX_SIZE)
+
+        assert not batch.get_many(QUEUE_MAX_SIZE, True, 0.01)
+
+
+class TestWrapperBatch:
+    """
+    Bulk operations through the wrapper, for every backend.
+    """
+
+    def test_order_preserved(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items come out in order and at most max_items at a time.
+        """
+        # Setup
+        expected = [0, 1, 2]
+
+        # Run
+        count = wrapper.put_many([0, 1, 2])
+        actual = wrapper.get_many(2) + wrapper.get_many(2)
+
+        # Test
+        assert count == 3
+        assert actual == expected
+
+    def test_put_many_timeout(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items that do not fit before the timeout are not put.
+        """
+        actual = wrapper.put_many(list(range(QUEUE_MAX_SIZE + 2)), timeout=0.01)
+
+        assert actual == QUEUE_MAX_SIZE
+
+    def test_get_many_empty(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Empty list on timeout.
+        """
+        assert not wrapper.get_many(QUEUE_MAX_SIZE, timeout=0.01)
@@ -0,0 +1,286 @@
+"""
+Test keeping the connection to the drone through link failures.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+SILENCE_TIMEOUT_S = 60.0
+INITIAL_BACKOFF_S = 0.02
+MAX_BACKOFF_S = 0.08
+WAIT_TIMEOUT_S = 5.0
+
+
+class FakeConnection:
+    """
+    Endpoint backed by a pipe, the test writes what the drone would send.
+    """
+
+    def __init__(self) -> None:
+        self.mav = mavutil.mavlink.MAVLink(None, 255, 190)
+        self.fd, self.drone_fd = os.pipe()
+        os.set_blocking(self.fd, False)
+
+    def close(self) -> None:
+        """
+        Closes both ends.
+        """
+        os.close(self.fd)
+        os.close(self.drone_fd)
+
+
+class FakeDrone:
+    """
+    Replaces opening an endpoint, each endpoint refuses, waits or accepts.
+    """
+
+    def __init__(self) -> None:
+        self.is_accepting = {"primary": False, "standby": True}
+        # Opening waits until set
+        self.is_reachable = threading.Event()
+        self.is_reachable.set()
+        self.attempt_times: "dict[str, list[float]]" = {"primary": [], "standby": []}
+
+    def mavlink_connection(
+        self, device: str, source_system: int, source_component: int, retries: int
+    ) -> FakeConnection:
+        """
+        Same parameters as `mavutil.mavlink_connection()` .
+        """
+        assert (source_system, source_component, retries) == (255, 190, 0)
+
+        self.attempt_times[device].append(time.monotonic())
+        self.is_reachable.wait()
+        if not self.is_accepting[device]:
+            raise ConnectionRefusedError("Connection refused")
+
+        return FakeConnection()
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_connection_manager", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+@pytest.fixture()
+def drone(monkeypatch: pytest.MonkeyPatch) -> FakeDrone:  # type: ignore
+    """
+    Endpoints opened by the connection manager.
+    """
+    fake_drone = FakeDrone()
+    monkeypatch.setattr(
+        connection_manager.mavutil, "mavlink_connection", fake_drone.mavlink_connection
+    )
+    yield fake_drone  # type: ignore
+
+
+def create_link(
+    standby_connection_string: "str | None", local_logger: logger.Logger
+) -> connection_manager.ConnectionManager:
+    """
+    Manager of an open primary connection.
+    """
+    result, link = connection_manager.ConnectionManager.create(
+        FakeConnection(),  # type: ignore
+        "primary",
+        standby_connection_string,
+        SILENCE_TIMEOUT_S,
+        INITIAL_BACKOFF_S,
+        MAX_BACKOFF_S,
+        local_logger,
+    )
+    assert result
+    assert link is not None
+
+    return link
+
+
+def maintain_until(
+    link: connection_manager.ConnectionManager,
+    is_done: "(...) -> bool",  # type: ignore
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Maintains the link like the reader does, until is_done() .
+    """
+    end_time = time.monotonic() + WAIT_TIMEOUT_S
+    while not is_done():
+        assert time.monotonic() < end_time
+        link.maintain(local_logger)
+        time.sleep(0.001)
+
+
+class TestConnectionManager:
+    """
+    Reconnects, failover and flap counters.
+    """
+
+    def test_backoff_doubles(self, drone: FakeDrone, local_logger: logger.Logger) -> None:
+        """
+        The first reconnect is immediate, then delays double up to the maximum.
+        """
+        # Setup
+        link = create_link(None, local_logger)
+        generation, _ = link.get_connection()
+
+        # Run
+        link.report_failure(generation, "test", local_logger)
+        maintain_until(link, lambda: len(drone.attempt_times["primary"]) >= 5, local_logger)
+        _, connection = link.get_connection()
+
+        # Test
+        attempt_times = drone.attempt_times["primary"]
+        gaps_s = [later - earlier for earlier, later in zip(attempt_times, attempt_times[1:])]
+        expected_gaps_s = [INITIAL_BACKOFF_S, 2 * INITIAL_BACKOFF_S, MAX_BACKOFF_S, MAX_BACKOFF_S]
+        assert connection is None
+        assert all(gap_s >= expected_s for gap_s, expected_s in zip(gaps_s, expected_gaps_s))
+        assert gaps_s[3] < 2 * MAX_BACKOFF_S
+
+    def test_reconnect(self, drone: FakeDrone, local_logger: logger.Logger) -> None:
+        """
+        A reconnected endpoint is a new generation, failures of an old one are ignored.
+        """
+        # Setup
+        link = create_link(None, local_logger)
+        old_generation, old_connection = link.get_connection()
+
+        # Run
+        link.report_failure(old_generation, "test", local_logger)
+        drone.is_accepting["primary"] = True
+        maintain_until(link, lambda: link.get_connection()[1] is not None, local_logger)
+        generation, connection = link.get_connection()
+        link.report_failure(old_generation, "stale", local_logger)
+
+        # Test
+        assert generation > old_generation
+        assert connection is not old_connection
+        assert link.get_connection() == (generation, connection)
+
+    def test_failover(self, drone: FakeDrone, local_logger: logger.Logger) -> None:
+        """
+        The standby takes over at once, and the failed endpoint reopens as the standby.
+        """
+        # Setup
+        link = create_link("standby", local_logger)
+        generation, primary = link.get_connection()
+        drone.is_accepting["primary"] = True
+
+        # Run
+        link.report_failure(generation, "test", local_logger)
+        failover_generation, standby = link.get_connection()
+        maintain_until(link, lambda: len(drone.attempt_times["primary"]) == 1, local_logger)
+        maintain_until(
+            link, lambda: link._ConnectionManager__connections[0] is not None, local_logger
+        )
+
+        # Test
+        assert len(drone.attempt_times["standby"]) == 1
+        assert standby is not None
+        assert standby is not primary
+        assert failover_generation == generation + 1
+        assert link.get_connection() == (failover_generation, standby)
+
+    def test_flap_counters(self, drone: FakeDrone, local_logger: logger.Logger) -> None:
+        """
+        Failures until the next message are 1 flap, which resumes at that message.
+        """
+        # Setup
+        link = create_link(None, local_logger)
+        drone.is_accepting["primary"] = True
+
+        # Run
+        for _ in range(2):
+            generation, _ = link.get_connection()
+            link.report_failure(generation, "test", local_logger)
+            maintain_until(link, lambda: link.get_connection()[1] is not None, local_logger)
+        during_flap = link.get_flap_summary()
+
+        time.sleep(INITIAL_BACKOFF_S)
+        link.record_receive(local_logger)
+        resumed = link.get_flap_summary()
+
+        generation, _ = link.get_connection()
+        link.report_failure(generation, "test", local_logger)
+        second_flap = link.get_flap_summary()
+
+        # Test
+        assert (during_flap.flap_count, during_flap.resume_count) == (1, 0)
+        assert (resumed.flap_count, resumed.resume_count) == (1, 1)
+        assert resumed.resume_max_s >= INITIAL_BACKOFF_S
+        assert (second_flap.flap_count, second_flap.resume_count) == (2, 1)
+
+    def test_connect_does_not_block(self, drone: FakeDrone, local_logger: logger.Logger) -> None:
+        """
+        The reader keeps maintaining while an endpoint takes long to open.
+        """
+        # Setup
+        link = create_link(None, local_logger)
+        generation, _ = link.get_connection()
+        drone.is_accepting["primary"] = True
+        drone.is_reachable.clear()
+
+        # Run
+        link.report_failure(generation, "test", local_logger)
+        start_time = time.monotonic()
+        for _ in range(10):
+            link.maintain(local_logger)
+        maintain_s = time.monotonic() - start_time
+        _, connection_while_opening = link.get_connection()
+
+        drone.is_reachable.set()
+        maintain_until(link, lambda: link.get_connection()[1] is not None, local_logger)
+
+        # Test
+        assert maintain_s < 0.1
+        assert connection_while_opening is None
+        assert len(drone.attempt_times["primary"]) == 1
+
+    def test_create_does_not_wait_forever(
+        self, drone: FakeDrone, local_logger: logger.Logger, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        A standby which does not open in time is left to the reader, which opens it again.
+        """
+        # Setup
+        monkeypatch.setattr(
+            connection_manager.ConnectionManager,
+            "_ConnectionManager__CREATE_CONNECT_TIMEOUT_S",
+            INITIAL_BACKOFF_S,
+        )
+        drone.is_reachable.clear()
+
+        # Run
+        start_time = time.monotonic()
+        link = create_link("standby", local_logger)
+        create_s = time.monotonic() - start_time
+        is_standby_open = link._ConnectionManager__connections[1] is not None
+
+        drone.is_reachable.set()
+        maintain_until(
+            link, lambda: link._ConnectionManager__connections[1] is not None, local_logger
+        )
+
+        # Test
+        assert create_s < WAIT_TIMEOUT_S / 2
+        assert not is_standby_open
+        assert len(drone.attempt_times["standby"]) == 2
@@ -0,0 +1,122 @@
+"""
+Test reading dispatched MAVLink messages.
+"""
+
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from utilities.mavlink import mavlink_dispatcher
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 8
+TIMEOUT_S = 0.05
+
+
+@pytest.fixture()
+def subscription() -> mavlink_dispatcher.MavlinkSubscription:  # type: ignore
+    """
+    Subscription to heartbeats and attitude.
+    """
+    message_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+    )
+    yield mavlink_dispatcher.MavlinkSubscription(  # type: ignore
+        ["HEARTBEAT", "ATTITUDE"], message_queue
+    )
+
+
+def heartbeat_frame() -> bytes:
+    """
+    Frame of a heartbeat, as the dispatcher queues it.
+    """
+    mav = mavutil.mavlink.MAVLink(None)
+    message = mav.heartbeat_encode(
+        mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+    )
+    return bytes(message.pack(mav))
+
+
+def attitude_frame(time_boot_ms: int) -> bytes:
+    """
+    Frame of an attitude, as the dispatcher queues it.
+    """
+    mav = mavutil.mavlink.MAVLink(None)
+    message = mav.attitude_encode(time_boot_ms, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+    return bytes(message.pack(mav))
+
+
+class TestMavlinkSubscription:
+    """
+    Reading like a connection.
+    """
+
+    def test_any_type(self, subscription: mavlink_dispatcher.MavlinkSubscription) -> None:
+        """
+        Without a type, messages come out decoded and in order.
+        """
+        subscription.put_frame(attitude_frame(1))
+        subscription.put_frame(heartbeat_frame())
+
+        first = subscription.recv_match()
+        second = subscription.recv_msg()
+
+        assert first is not None
+        assert first.get_type() == "ATTITUDE"
+        assert first.time_boot_ms == 1
+        assert second is not None
+        assert second.get_type() == "HEARTBEAT"
+        assert subscription.recv_match() is None
+
+    def test_type_filter(self, subscription: mavlink_dispatcher.MavlinkSubscription) -> None:
+        """
+        Messages of other types before the one matched are skipped.
+        """
+        subscription.put_frame(attitude_frame(1))
+        subscription.put_frame(heartbeat_frame())
+        subscription.put_frame(attitude_frame(2))
+
+        heartbeat = subscription.recv_match(type="HEARTBEAT")
+        attitude = subscription.recv_match(type=["ATTITUDE", "LOCAL_POSITION_NED"])
+
+        assert heartbeat is not None
+        assert heartbeat.get_type() == "HEARTBEAT"
+        assert attitude is not None
+        assert attitude.time_boot_ms == 2
+        assert subscription.recv_match(type="HEARTBEAT") is None
+
+    def test_timeout(self, subscription: mavlink_dispatcher.MavlinkSubscription) -> None:
+        """
+        A blocking read gives up after the timeout, also if only other types arrived.
+        """
+        start_time = time.monotonic()
+        empty_result = subscription.recv_match(blocking=True, timeout=TIMEOUT_S)
+        empty_elapsed_s = time.monotonic() - start_time
+
+        subscription.put_frame(attitude_frame(1))
+        start_time = time.monotonic()
+        other_type_result = subscription.recv_match(
+            type="HEARTBEAT", blocking=True, timeout=TIMEOUT_S
+        )
+        other_type_elapsed_s = time.monotonic() - start_time
+
+        assert empty_result is None
+        assert empty_elapsed_s >= TIMEOUT_S
+        assert other_type_result is None
+        assert other_type_elapsed_s >= TIMEOUT_S
+        assert subscription.recv_match() is None
+
+    def test_closed(self, subscription: mavlink_dispatcher.MavlinkSubscription) -> None:
+        """
+        A closed queue returns None at once, even when waiting forever.
+        """
+        subscription._MavlinkSubscription__message_queue.close()  # type: ignore
+
+        assert subscription.recv_match(type="HEARTBEAT", blocking=True) is None
@@ -0,0 +1,227 @@
+"""
+Test sending through the MAVLink writer.
+"""
+
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from utilities.mavlink import mavlink_writer
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 16
+CONNECTION_SEQUENCE = 250
+CONNECTION_SOURCE_IDS = (255, 190)
+WAIT_TIMEOUT_S = 5.0
+
+
+class FakeConnection:
+    """
+    Connection which keeps what is written.
+    """
+
+    def __init__(self) -> None:
+        self.mav = mavutil.mavlink.MAVLink(None, *CONNECTION_SOURCE_IDS)
+        self.mav.seq = CONNECTION_SEQUENCE
+        self.writes: "list[bytes]" = []
+        # Raised by every write if set, like a broken socket
+        self.error: "Exception | None" = None
+
+    def write(self, data: bytes) -> None:
+        """
+        Keeps the data.
+        """
+        if self.error is not None:
+            raise self.error
+
+        self.writes.append(data)
+
+
+class FakeLink:
+    """
+    Connection manager which is always connected.
+    """
+
+    def __init__(self, connection: FakeConnection) -> None:
+        self.connection = connection
+        self.failures: "list[tuple[int, str]]" = []
+
+    def get_source_ids(self) -> "tuple[int, int]":
+        """
+        Source system and component of the connection.
+        """
+        return CONNECTION_SOURCE_IDS
+
+    def get_connection(self) -> "tuple[int, FakeConnection]":
+        """
+        Generation 0 , never reconnected.
+        """
+        return 0, self.connection
+
+    def report_failure(self, generation: int, reason: str, _: object) -> None:
+        """
+        Keeps the failure.
+        """
+        self.failures.append((generation, reason))
+
+
+@pytest.fixture()
+def send_queue() -> priority_queue_wrapper.PriorityQueueWrapper:  # type: ignore
+    """
+    Queue of both lanes, like the writer in main.
+    """
+    yield priority_queue_wrapper.PriorityQueueWrapper(  # type: ignore
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        ),
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        ),
+    )
+
+
+def run_writer(
+    send_queue: priority_queue_wrapper.PriorityQueueWrapper, frame_count: int
+) -> "list[mavutil.mavlink.MAVLink_message]":
+    """
+    Runs the writer until it wrote frame_count frames.
+
+    Returns the messages written, parsed.
+    """
+    connection = FakeConnection()
+    controller = worker_controller.WorkerController()
+    writer = threading.Thread(
+        target=mavlink_writer.mavlink_writer_worker,
+        args=(FakeLink(connection), send_queue, controller),
+    )
+    writer.start()
+
+    parser = mavutil.mavlink.MAVLink(None)
+    messages = []
+    end_time = time.monotonic() + WAIT_TIMEOUT_S
+    while len(messages) < frame_count and time.monotonic() < end_time:
+        while len(connection.writes) > 0:
+            messages += parser.parse_buffer(connection.writes.pop(0)) or []
+        time.sleep(0.01)
+
+    controller.request_exit()
+    writer.join(WAIT_TIMEOUT_S)
+    assert not writer.is_alive()
+
+    return messages
+
+
+class TestMavlinkWriter:
+    """
+    Frames from every sender form 1 sequence of the connection.
+    """
+
+    def test_get_message_id(self) -> None:
+        """
+        The ID is read from the header of either protocol version.
+        """
+        mav = mavutil.mavlink.MAVLink(None)
+        frame_v1 = bytes(mav.attitude_encode(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0).pack(mav))
+        # Marker, length, incompatible and compatible flags, sequence, system, component, ID
+        header_v2 = bytes([mavutil.mavlink.PROTOCOL_MARKER_V2, 0, 0, 0, 0, 1, 1, 0x45, 0x23, 0x01])
+
+        assert mavlink_writer.get_message_id(frame_v1) == mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE
+        assert mavlink_writer.get_message_id(header_v2) == 0x012345
+
+    def test_sequence_reencoded(
+        self, send_queue: priority_queue_wrapper.PriorityQueueWrapper
+    ) -> None:
+        """
+        Frames of senders with their own sequences and IDs continue the connection's,
+        with their fields unchanged.
+        """
+        # Setup
+        senders = [mavlink_writer.MavlinkSender(send_queue) for _ in range(2)]
+        for time_boot_ms in range(3):
+            for sender in senders:
+                sender.mav.attitude_send(time_boot_ms, 0.5, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        # Run
+        messages = run_writer(send_queue, 6)
+
+        # Test
+        assert [message.get_seq() for message in messages] == [
+            (CONNECTION_SEQUENCE + i) % 256 for i in range(6)
+        ]
+        assert all(
+            (message.get_srcSystem(), message.get_srcComponent()) == CONNECTION_SOURCE_IDS
+            for message in messages
+        )
+        assert [message.time_boot_ms for message in messages] == [0, 0, 1, 1, 2, 2]
+        assert all(message.roll == 0.5 for message in messages)
+
+    def test_urgent_first(self, send_queue: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+        """
+        A heartbeat sent after other messages is written before them.
+        """
+        # Setup
+        sender = mavlink_writer.MavlinkSender(send_queue)
+        sender.mav.attitude_send(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        sender.mav.attitude_send(1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        sender.mav.heartbeat_send(
+            mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0
+        )
+
+        # Run
+        messages = run_writer(send_queue, 3)
+
+        # Test
+        assert [message.get_type() for message in messages] == [
+            "HEARTBEAT",
+            "ATTITUDE",
+            "ATTITUDE",
+        ]
+        assert [message.get_seq() for message in messages] == [
+            CONNECTION_SEQUENCE,
+            CONNECTION_SEQUENCE + 1,
+            CONNECTION_SEQUENCE + 2,
+        ]
+
+    def test_write_failure(self, send_queue: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+        """
+        A failed write is reported to the link, and the writer keeps writing.
+        """
+        # Setup
+        link = FakeLink(FakeConnection())
+        link.connection.error = BrokenPipeError("Broken pipe")
+        sender = mavlink_writer.MavlinkSender(send_queue)
+        sender.mav.attitude_send(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        # Run
+        end_time = time.monotonic() + WAIT_TIMEOUT_S
+        controller = worker_controller.WorkerController()
+        writer = threading.Thread(
+            target=mavlink_writer.mavlink_writer_worker, args=(link, send_queue, controller)
+        )
+        writer.start()
+        while len(link.failures) == 0 and time.monotonic() < end_time:
+            time.sleep(0.01)
+
+        link.connection.error = None
+        sender.mav.attitude_send(1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        while len(link.connection.writes) == 0 and time.monotonic() < end_time:
+            time.sleep(0.01)
+
+        controller.request_exit()
+        writer.join(WAIT_TIMEOUT_S)
+
+        # Test
+        assert not writer.is_alive()
+        assert link.failures == [(0, "write failed: Broken pipe")]
+        messages = mavutil.mavlink.MAVLink(None).parse_buffer(link.connection.writes[0])
+        assert [message.time_boot_ms for message in messages] == [1]
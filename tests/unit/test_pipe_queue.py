@@ -0,0 +1,125 @@
+"""
+Test the pipe queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import pipe_queue
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+ITEM_COUNT = 100
+
+
+@pytest.fixture()
+def pipe() -> pipe_queue.PipeQueue:  # type: ignore
+    """
+    Small pipe queue.
+    """
+    pipe_q = pipe_queue.PipeQueue(QUEUE_MAX_SIZE)
+    yield pipe_q  # type: ignore
+
+
+def produce(output_queue: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts count integers and then a sentinel.
+    """
+    for i in range(count):
+        output_queue.queue.put(i)
+
+    output_queue.queue.put(None)
+
+
+class TestPipeQueue:
+    """
+    Queue semantics of the pipe backend.
+    """
+
+    def test_fifo_order(self, pipe: pipe_queue.PipeQueue) -> None:
+        """
+        Items come out in the order they went in.
+        """
+        # Setup
+        expected = list(range(QUEUE_MAX_SIZE))
+
+        # Run
+        for item in expected:
+            pipe.put(item)
+        actual = [pipe.get() for _ in expected]
+
+        # Test
+        assert actual == expected
+
+    def test_full(self, pipe: pipe_queue.PipeQueue) -> None:
+        """
+        Put on a full queue raises queue.Full .
+        """
+        for i in range(QUEUE_MAX_SIZE):
+            pipe.put_nowait(i)
+
+        assert pipe.full()
+        assert pipe.qsize() == QUEUE_MAX_SIZE
+        with pytest.raises(queue.Full):
+            pipe.put(QUEUE_MAX_SIZE, timeout=0.01)
+
+    def test_empty(self, pipe: pipe_queue.PipeQueue) -> None:
+        """
+        Get on an empty queue raises queue.Empty .
+        """
+        assert pipe.empty()
+        with pytest.raises(queue.Empty):
+            pipe.get(timeout=0.01)
+        with pytest.raises(queue.Empty):
+            pipe.get_nowait()
+
+    def test_size_without_semaphore_value(self, pipe: pipe_queue.PipeQueue) -> None:
+        """
+        Size follows puts and gets where the semaphore value is not implemented, like macOS.
+        """
+
+        def get_value() -> int:
+            raise NotImplementedError
+
+        pipe._PipeQueue__free_slots.get_value = get_value  # type: ignore
+
+        pipe.put(0)
+        pipe.put(1)
+        assert pipe.qsize() == 2
+        pipe.get()
+        assert pipe.qsize() == 1
+        assert not pipe.empty()
+        assert not pipe.full()
+        pipe.get()
+        assert pipe.empty()
+
+    def test_cross_process(self) -> None:
+        """
+        Items from a producer process arrive in order through the wrapper.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.PIPE
+        )
+        producer = mp.Process(target=produce, args=(wrapper, ITEM_COUNT))
+
+        # Run
+        producer.start()
+        actual = []
+        while True:
+            item = wrapper.queue.get(timeout=5.0)
+            if item is None:
+                break
+            actual.append(item)
+        producer.join()
+
+        # Test
+        assert actual == list(range(ITEM_COUNT))
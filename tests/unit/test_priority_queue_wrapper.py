@@ -0,0 +1,137 @@
+"""
+Test the two level priority queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+URGENT_MAX_SIZE = 2
+NORMAL_MAX_SIZE = 4
+
+
+def create_lane(
+    maxsize: int,
+    policy: queue_overflow.OverflowPolicy = queue_overflow.OverflowPolicy.BLOCK,
+) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Shared memory lane, which works without a manager.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None, maxsize, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, overflow_policy=policy
+    )
+
+
+@pytest.fixture()
+def wrapper() -> priority_queue_wrapper.PriorityQueueWrapper:  # type: ignore
+    """
+    Priority queue with empty lanes.
+    """
+    priority_queue = priority_queue_wrapper.PriorityQueueWrapper(
+        create_lane(URGENT_MAX_SIZE), create_lane(NORMAL_MAX_SIZE)
+    )
+    yield priority_queue  # type: ignore
+
+
+def put_urgent_from_process(output_queue: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+    """
+    Producer in another process.
+    """
+    output_queue.put_urgent("Disconnected")
+
+
+class TestPriorityQueueWrapper:
+    """
+    Urgent items dequeue first, each lane in order.
+    """
+
+    def test_urgent_first(self, wrapper: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+        """
+        Urgent items overtake normal items already queued.
+        """
+        # Setup
+        for i in range(NORMAL_MAX_SIZE):
+            wrapper.queue.put(i)
+
+        # Run
+        wrapper.put_urgent("a")
+        wrapper.put_urgent("b")
+        items = wrapper.get_many(NORMAL_MAX_SIZE + URGENT_MAX_SIZE, timeout=0.1)
+
+        # Test
+        assert items == ["a", "b", 0, 1, 2, 3]
+        assert wrapper.queue.empty()
+
+    def test_urgent_with_normal_lane_full(
+        self, wrapper: priority_queue_wrapper.PriorityQueueWrapper
+    ) -> None:
+        """
+        A saturated normal lane does not block urgent items.
+        """
+        # Setup
+        for i in range(NORMAL_MAX_SIZE):
+            wrapper.queue.put(i)
+        with pytest.raises(queue.Full):
+            wrapper.queue.put_nowait(NORMAL_MAX_SIZE)
+
+        # Run
+        wrapper.put_urgent("Disconnected")
+
+        # Test
+        assert wrapper.queue.get(timeout=0.1) == "Disconnected"
+
+    def test_empty(self, wrapper: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+        """
+        Get times out when both lanes are empty.
+        """
+        with pytest.raises(queue.Empty):
+            wrapper.queue.get(timeout=0.01)
+
+        assert wrapper.get_many(2, timeout=0.01) == []
+
+    def test_dropped_items(self) -> None:
+        """
+        Items dropped by the normal lane policy do not wake consumers for nothing.
+        """
+        # Setup
+        wrapper = priority_queue_wrapper.PriorityQueueWrapper(
+            create_lane(URGENT_MAX_SIZE),
+            create_lane(1, queue_overflow.OverflowPolicy.DROP_NEWEST),
+        )
+
+        # Run
+        wrapper.queue.put(0)
+        wrapper.queue.put(1)
+
+        # Test
+        assert wrapper.queue.get(timeout=0.1) == 0
+        assert wrapper.get_dropped_count() == 1
+        with pytest.raises(queue.Empty):
+            wrapper.queue.get(timeout=0.01)
+
+    def test_cross_process(self, wrapper: priority_queue_wrapper.PriorityQueueWrapper) -> None:
+        """
+        An urgent item from another process wakes a blocked consumer.
+        """
+        # Setup
+        wrapper.queue.put(0)
+        producer = mp.Process(target=put_urgent_from_process, args=(wrapper,))
+
+        # Run
+        producer.start()
+        producer.join()
+
+        # Test
+        assert wrapper.queue.get(timeout=1.0) == "Disconnected"
+        assert wrapper.queue.get(timeout=1.0) == 0
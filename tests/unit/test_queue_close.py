@@ -0,0 +1,143 @@
+"""
+Test closing queues for shutdown.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from utilities.workers import batch_queue
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 2
+# Well below the blocking timeout, so a woken consumer is distinguishable
+WAKE_TIMEOUT_S = 2.0
+BLOCK_TIMEOUT_S = 30.0
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> batch_queue.BatchQueueManager:  # type: ignore
+    """
+    Manager hosting batch queues.
+    """
+    manager = batch_queue.create_manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(
+    params=[
+        queue_proxy_wrapper.QueueBackend.MANAGER,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        queue_proxy_wrapper.QueueBackend.LATEST_VALUE,
+        queue_proxy_wrapper.QueueBackend.PIPE,
+    ]
+)
+def wrapper(
+    request: pytest.FixtureRequest, mp_manager: batch_queue.BatchQueueManager
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Empty queue of each backend.
+    """
+    queue_wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, request.param)
+    yield queue_wrapper  # type: ignore
+
+
+def blocked_get(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    result_queue: "mp.Queue",
+) -> None:
+    """
+    Consumer which blocks on an empty queue and reports what it got.
+    """
+    result_queue.put(input_queue.queue.get(timeout=BLOCK_TIMEOUT_S))
+
+
+def start_consumers(
+    input_queue: "queue_proxy_wrapper.QueueProxyWrapper | priority_queue_wrapper.PriorityQueueWrapper",
+    count: int,
+) -> "tuple[list[mp.Process], mp.Queue]":
+    """
+    Starts consumers and waits for them to block.
+    """
+    result_queue = mp.Queue()
+    consumers = [
+        mp.Process(target=blocked_get, args=(input_queue, result_queue)) for _ in range(count)
+    ]
+    for consumer in consumers:
+        consumer.start()
+
+    time.sleep(0.2)
+    return consumers, result_queue
+
+
+class TestQueueClose:
+    """
+    Close wakes every waiting process immediately.
+    """
+
+    def test_wakes_consumers(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Blocked consumers get sentinel.
+        """
+        # Setup
+        consumers, result_queue = start_consumers(wrapper, 2)
+
+        # Run
+        start = time.monotonic()
+        wrapper.close()
+        results = [result_queue.get(timeout=WAKE_TIMEOUT_S) for _ in consumers]
+        for consumer in consumers:
+            consumer.join()
+        elapsed = time.monotonic() - start
+
+        # Test
+        assert results == [None, None]
+        assert elapsed < WAKE_TIMEOUT_S
+
+    def test_after_close(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Puts are dropped and gets return sentinel without waiting.
+        """
+        # Setup
+        wrapper.close()
+
+        # Run
+        for i in range(QUEUE_MAX_SIZE + 1):
+            wrapper.queue.put(i)
+
+        # Test
+        assert wrapper.queue.get() is None
+        assert wrapper.get_many(QUEUE_MAX_SIZE) == [None]
+
+    def test_priority_queue(self) -> None:
+        """
+        Closing a priority queue wakes consumers waiting on either lane.
+        """
+        # Setup
+        wrapper = priority_queue_wrapper.PriorityQueueWrapper(
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+            ),
+            queue_proxy_wrapper.QueueProxyWrapper(
+                None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+            ),
+        )
+        consumers, result_queue = start_consumers(wrapper, 2)
+
+        # Run
+        wrapper.close()
+        results = [result_queue.get(timeout=WAKE_TIMEOUT_S) for _ in consumers]
+        for consumer in consumers:
+            consumer.join()
+
+        # Test
+        assert results == [None, None]
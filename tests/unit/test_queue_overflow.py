@@ -0,0 +1,77 @@
+"""
+Test queue overflow policies.
+"""
+
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 2
+ITEM_COUNT = 6
+
+
+def fill_and_collect(
+    policy: queue_overflow.OverflowPolicy, sample_every: int = 1
+) -> "tuple[list[object], int]":
+    """
+    Puts more items than fit, then returns what is in the queue and the dropped count.
+    """
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        overflow_policy=policy,
+        overflow_timeout_s=0.01,
+        overflow_sample_every=sample_every,
+    )
+    for i in range(ITEM_COUNT):
+        wrapper.queue.put(i)
+
+    return wrapper.get_many(ITEM_COUNT, timeout=0.01), wrapper.get_dropped_count()
+
+
+class TestOverflowPolicy:
+    """
+    Full queue behaviour of each policy, none of which block the producer.
+    """
+
+    def test_block_with_timeout(self) -> None:
+        """
+        Items which do not fit in time are dropped.
+        """
+        items, dropped = fill_and_collect(queue_overflow.OverflowPolicy.BLOCK_WITH_TIMEOUT)
+
+        assert items == [0, 1]
+        assert dropped == 4
+
+    def test_drop_newest(self) -> None:
+        """
+        Items put while full are dropped.
+        """
+        items, dropped = fill_and_collect(queue_overflow.OverflowPolicy.DROP_NEWEST)
+
+        assert items == [0, 1]
+        assert dropped == 4
+
+    def test_drop_oldest(self) -> None:
+        """
+        The newest items are kept.
+        """
+        items, dropped = fill_and_collect(queue_overflow.OverflowPolicy.DROP_OLDEST)
+
+        assert items == [4, 5]
+        assert dropped == 4
+
+    def test_keep_every_nth(self) -> None:
+        """
+        Every 2nd item put while full replaces the oldest.
+        """
+        items, dropped = fill_and_collect(queue_overflow.OverflowPolicy.KEEP_EVERY_NTH, 2)
+
+        assert items == [3, 5]
+        assert dropped == 4
@@ -0,0 +1,169 @@
+"""
+Test waiting on several queues.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+PRODUCER_DELAY_S = 0.2
+KILL_COUNT = 20
+
+
+def create_queue(notifier: queue_selector.QueueNotifier) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Shared memory queue, which works without a manager.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        notifier=notifier,
+    )
+
+
+@pytest.fixture()
+def queues() -> "list[queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Two empty queues sharing a notifier.
+    """
+    notifier = queue_selector.QueueNotifier()
+    yield [create_queue(notifier), create_queue(notifier)]  # type: ignore
+
+
+def delayed_put(output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Producer in another process.
+    """
+    time.sleep(PRODUCER_DELAY_S)
+    output_queue.queue.put("item")
+
+
+def notify_forever(notifier: queue_selector.QueueNotifier) -> None:
+    """
+    Producer which is killed while notifying.
+    """
+    while True:
+        notifier.notify()
+
+
+class TestWaitAny:
+    """
+    wait_any() returns the first queue with an item.
+    """
+
+    def test_ready(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns immediately if a queue already has an item.
+        """
+        # Setup
+        queues[1].queue.put(0)
+
+        # Run
+        result, ready_queue = queue_selector.wait_any(queues, 0.0)
+
+        # Test
+        assert result
+        assert ready_queue is queues[1]
+
+    def test_timeout(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns False if no queue gets an item.
+        """
+        result, ready_queue = queue_selector.wait_any(queues, 0.05)
+
+        assert not result
+        assert ready_queue is None
+
+    def test_wakes_on_put(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        A put from another process wakes the wait well before the timeout.
+        """
+        # Setup
+        producer = mp.Process(target=delayed_put, args=(queues[1],))
+        producer.start()
+        start = time.monotonic()
+
+        # Run
+        result, ready_queue = queue_selector.wait_any(queues, 5.0)
+
+        # Test
+        elapsed = time.monotonic() - start
+        producer.join()
+        assert result
+        assert ready_queue is queues[1]
+        assert elapsed < 2.0
+        assert queues[1].queue.get_nowait() == "item"
+
+    def test_priority_queue(self) -> None:
+        """
+        An urgent item wakes a wait on a priority queue.
+        """
+        # Setup
+        notifier = queue_selector.QueueNotifier()
+        wrapper = priority_queue_wrapper.PriorityQueueWrapper(
+            create_queue(notifier), create_queue(notifier)
+        )
+
+        # Run
+        wrapper.put_urgent("Disconnected")
+        result, ready_queue = queue_selector.wait_any([wrapper], 0.1)
+
+        # Test
+        assert result
+        assert ready_queue is wrapper
+
+    def test_different_notifiers(self) -> None:
+        """
+        Queues which cannot wake the same wait are rejected.
+        """
+        queues = [
+            create_queue(queue_selector.QueueNotifier()),
+            create_queue(queue_selector.QueueNotifier()),
+        ]
+
+        with pytest.raises(ValueError):
+            queue_selector.wait_any(queues, 0.0)
+
+    def test_notifier_killed(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Producers killed while notifying do not block later waits.
+        """
+        # Setup
+        notifier = queues[0].notifier
+        for _ in range(KILL_COUNT):
+            producer = mp.Process(target=notify_forever, args=(notifier,))
+            producer.start()
+            time.sleep(0.01)
+            producer.kill()
+            producer.join()
+
+        results = []
+        waiter = threading.Thread(
+            target=lambda: results.append(queue_selector.wait_any(queues, 5.0)), daemon=True
+        )
+
+        # Run
+        waiter.start()
+        producer = mp.Process(target=delayed_put, args=(queues[1],), daemon=True)
+        producer.start()
+        waiter.join(5.0)
+        producer.join(5.0)
+
+        # Test
+        assert not waiter.is_alive()
+        assert not producer.is_alive()
+        assert results == [(True, queues[1])]
@@ -0,0 +1,132 @@
+"""
+Test queue instrumentation.
+"""
+
+import queue
+
+import pytest
+
+from utilities.workers import queue_overflow
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+
+
+@pytest.fixture()
+def wrapper() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Instrumented shared memory queue.
+    """
+    queue_wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        enable_statistics=True,
+    )
+    yield queue_wrapper  # type: ignore
+
+
+class TestQueueStatistics:
+    """
+    Snapshots through the wrapper.
+    """
+
+    def test_disabled(self) -> None:
+        """
+        No layer and no statistics unless enabled.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+
+        result, statistics = wrapper.get_statistics()
+
+        assert not result
+        assert statistics is None
+
+    def test_counts(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Items pass through unchanged and are counted.
+        """
+        # Run
+        wrapper.queue.put("a")
+        wrapper.put_many(["b", "c"])
+        actual = [wrapper.queue.get()] + wrapper.get_many(QUEUE_MAX_SIZE)
+        result, statistics = wrapper.get_statistics()
+
+        # Test
+        assert actual == ["a", "b", "c"]
+        assert result
+        assert statistics is not None
+        assert statistics.put_count == 3
+        assert statistics.get_count == 3
+        assert statistics.high_water_mark == 3
+        assert sum(count for _, count in statistics.wait_histogram) == 3
+
+    def test_blocked_time(self, wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Time spent waiting on an empty queue counts even though the get gave up.
+        """
+        timeout = 0.05
+
+        with pytest.raises(queue.Empty):
+            wrapper.queue.get(timeout=timeout)
+        _, statistics = wrapper.get_statistics()
+
+        assert statistics is not None
+        assert statistics.get_count == 0
+        assert statistics.get_blocked_total_s >= timeout
+
+    def test_evicted_not_gotten(self) -> None:
+        """
+        Items evicted by an overflow policy are not counted as gotten, nor their wait time.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            2,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            enable_statistics=True,
+            overflow_policy=queue_overflow.OverflowPolicy.DROP_OLDEST,
+        )
+
+        for i in range(6):
+            wrapper.queue.put(i)
+        actual = wrapper.get_many(2, timeout=0.01)
+        _, statistics = wrapper.get_statistics()
+
+        assert actual == [4, 5]
+        assert statistics is not None
+        assert statistics.put_count == 6
+        assert statistics.get_count == 2
+        assert statistics.evicted_count == 4
+        assert statistics.high_water_mark == 2
+        assert sum(count for _, count in statistics.wait_histogram) == 2
+
+    def test_superseded_evicted(self) -> None:
+        """
+        Values overwritten before any consumer got them are counted as evicted.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            backend=queue_proxy_wrapper.QueueBackend.LATEST_VALUE,
+            enable_statistics=True,
+        )
+
+        for i in range(5):
+            wrapper.queue.put(i)
+        actual = wrapper.get_many(1, timeout=0.01)
+        _, statistics = wrapper.get_statistics()
+
+        assert actual == [4]
+        assert statistics is not None
+        assert statistics.put_count == 5
+        assert statistics.get_count == 1
+        assert statistics.evicted_count == 4
+        assert statistics.high_water_mark == 1
+        assert sum(count for _, count in statistics.wait_histogram) == 1
@@ -0,0 +1,178 @@
+"""
+Test the shared memory queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+
+
+@pytest.fixture()
+def ring() -> shared_memory_queue.SharedMemoryQueue:  # type: ignore
+    """
+    Small shared memory queue.
+    """
+    ring_queue = shared_memory_queue.SharedMemoryQueue(QUEUE_MAX_SIZE, 128)
+    yield ring_queue  # type: ignore
+
+
+def produce(output_queue: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts count integers and then a sentinel.
+    """
+    for i in range(count):
+        output_queue.queue.put(i)
+
+    output_queue.queue.put(None)
+
+
+class TestSharedMemoryQueue:
+    """
+    Queue semantics within one process.
+    """
+
+    def test_fifo_order(self, ring: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items come out in the order they went in, across the wrap around.
+        """
+        # Setup
+        expected = list(range(10))
+
+        # Run
+        actual = []
+        for item in expected:
+            ring.put(item)
+            actual.append(ring.get())
+
+        # Test
+        assert actual == expected
+
+    def test_full(self, ring: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Put on a full queue raises queue.Full .
+        """
+        for i in range(QUEUE_MAX_SIZE):
+            ring.put_nowait(i)
+
+        assert ring.full()
+        with pytest.raises(queue.Full):
+            ring.put(QUEUE_MAX_SIZE, timeout=0.01)
+
+    def test_empty(self, ring: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Get on an empty queue raises queue.Empty .
+        """
+        assert ring.empty()
+        with pytest.raises(queue.Empty):
+            ring.get(timeout=0.01)
+
+    def test_item_too_large(self, ring: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items larger than a slot are rejected without consuming a slot.
+        """
+        with pytest.raises(ValueError):
+            ring.put(bytes(256))
+
+        assert ring.qsize() == 0
+
+
+class TestSharedMemoryBackend:
+    """
+    Wrapper with the shared memory backend.
+    """
+
+    def test_across_processes(self) -> None:
+        """
+        Worker process produces into the wrapper and main consumes.
+        """
+        # Setup
+        count = 50
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        )
+        worker = mp.Process(target=produce, args=(wrapper, count))
+
+        # Run
+        worker.start()
+        actual = []
+        while True:
+            item = wrapper.queue.get(timeout=5.0)
+            if item is None:
+                break
+            actual.append(item)
+        worker.join()
+
+        # Test
+        assert actual == list(range(count))
+
+    def test_fill_and_drain(self) -> None:
+        """
+        Sentinel fill and drain leave the queue empty.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        )
+        wrapper.fill_queue_with_sentinel()
+
+        assert wrapper.queue.full()
+        wrapper.drain_queue()
+        assert wrapper.queue.empty()
+
+
+class TestLatestValueBackend:
+    """
+    Wrapper with the latest value backend.
+    """
+
+    def test_newest_wins(self) -> None:
+        """
+        Consumer only sees the newest item and the rest are counted as superseded.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.LATEST_VALUE,
+        )
+        expected = 9
+
+        # Run
+        for i in range(10):
+            wrapper.queue.put(i, timeout=0.01)
+        actual = wrapper.queue.get_nowait()
+
+        # Test
+        assert actual == expected
+        assert wrapper.maxsize == 1
+        assert wrapper.get_superseded_count() == 9
+        assert wrapper.queue.empty()
+
+    def test_sentinel_overwrites(self) -> None:
+        """
+        A sentinel replaces pending data so the consumer sees it next.
+        """
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.LATEST_VALUE,
+        )
+        wrapper.queue.put("stale")
+        wrapper.fill_queue_with_sentinel()
+
+        assert wrapper.queue.get_nowait() is None
@@ -0,0 +1,259 @@
+"""
+Test requesting telemetry stream rates.
+"""
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import stream_rate
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MESSAGE_TYPES = ["ATTITUDE", "LOCAL_POSITION_NED"]
+INTERVAL_S = 0.1
+TOLERANCE = 0.2
+CHECK_PERIOD_S = 1.0
+
+
+class FakeClock:
+    """
+    Replaces time.monotonic() , time only passes when advanced.
+    """
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        """
+        Current time.
+        """
+        return self.now
+
+
+class FakeMav:
+    """
+    Keeps the message ID and interval of each MAV_CMD_SET_MESSAGE_INTERVAL sent.
+    """
+
+    def __init__(self) -> None:
+        self.requests: "list[tuple[int, float]]" = []
+
+    # Same parameters as the MAVLink command
+    # pylint: disable-next=too-many-arguments
+    def command_long_send(
+        self,
+        target_system: int,
+        target_component: int,
+        command: int,
+        confirmation: int,
+        param1: float,
+        param2: float,
+        param3: float,
+        param4: float,
+        param5: float,
+        param6: float,
+        param7: float,
+    ) -> None:
+        """
+        Keeps the request.
+        """
+        assert (target_system, target_component) == (1, 0)
+        assert command == mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL
+        assert (confirmation, param3, param4, param5, param6, param7) == (0, 0, 0, 0, 0, 0)
+
+        self.requests.append((int(param1), param2))
+
+
+class FakeSender:
+    """
+    Sender which keeps the requests.
+    """
+
+    def __init__(self) -> None:
+        self.mav = FakeMav()
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_stream_rate", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:  # type: ignore
+    """
+    Time seen by the stream rates.
+    """
+    fake_clock = FakeClock()
+    monkeypatch.setattr(stream_rate.time, "monotonic", fake_clock.monotonic)
+    yield fake_clock  # type: ignore
+
+
+def create_stream_rates(sender: FakeSender, local_logger: logger.Logger) -> stream_rate.StreamRate:
+    """
+    Stream rates which already sent the first requests.
+    """
+    result, stream_rates = stream_rate.StreamRate.create(
+        sender,  # type: ignore
+        MESSAGE_TYPES,
+        INTERVAL_S,
+        TOLERANCE,
+        CHECK_PERIOD_S,
+        local_logger,
+    )
+    assert result
+    assert stream_rates is not None
+
+    stream_rates.maintain(local_logger)
+    return stream_rates
+
+
+def stream(
+    stream_rates: stream_rate.StreamRate,
+    clock: FakeClock,
+    intervals_s: "dict[str, float]",
+    duration_s: float,
+) -> None:
+    """
+    Observes each type every interval for the duration, like the reader reading as they arrive.
+    """
+    next_times = {message_type: clock.now for message_type in intervals_s}
+    end_time = clock.now + duration_s
+    while True:
+        message_type = min(next_times, key=lambda message_type: next_times[message_type])
+        if next_times[message_type] > end_time:
+            break
+
+        clock.now = next_times[message_type]
+        stream_rates.observe(message_type)
+        next_times[message_type] += intervals_s[message_type]
+
+    clock.now = end_time
+
+
+class TestStreamRate:
+    """
+    Requests, measures and requests again on drift.
+    """
+
+    def test_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        Intervals and tolerances which are not positive, a check period shorter than
+        2 intervals and unknown types are rejected.
+        """
+        for message_types, interval_s, tolerance, check_period_s in (
+            (MESSAGE_TYPES, 0.0, TOLERANCE, CHECK_PERIOD_S),
+            (MESSAGE_TYPES, INTERVAL_S, 0.0, CHECK_PERIOD_S),
+            (MESSAGE_TYPES, INTERVAL_S, TOLERANCE, 1.5 * INTERVAL_S),
+            (["NOT_A_MESSAGE"], INTERVAL_S, TOLERANCE, CHECK_PERIOD_S),
+        ):
+            result, _ = stream_rate.StreamRate.create(
+                FakeSender(),  # type: ignore
+                message_types,
+                interval_s,
+                tolerance,
+                check_period_s,
+                local_logger,
+            )
+            assert not result
+
+    def test_first_requests(self, clock: FakeClock, local_logger: logger.Logger) -> None:
+        """
+        The first maintain() requests every type at the interval in microseconds.
+        """
+        sender = FakeSender()
+
+        stream_rates = create_stream_rates(sender, local_logger)
+        clock.now += INTERVAL_S
+        stream_rates.maintain(local_logger)
+
+        assert sender.mav.requests == [
+            (mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE, INTERVAL_S * 1e6),
+            (mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED, INTERVAL_S * 1e6),
+        ]
+        assert stream_rates.get_request_count() == 2
+
+    def test_drift(self, clock: FakeClock, local_logger: logger.Logger) -> None:
+        """
+        Only the type arriving at another interval than requested is requested again.
+        """
+        # Setup
+        sender = FakeSender()
+        stream_rates = create_stream_rates(sender, local_logger)
+
+        # Run
+        stream(
+            stream_rates,
+            clock,
+            {"ATTITUDE": INTERVAL_S, "LOCAL_POSITION_NED": 2 * INTERVAL_S},
+            CHECK_PERIOD_S,
+        )
+        measured_interval_s = stream_rates.get_measured_interval("LOCAL_POSITION_NED")
+        stream_rates.maintain(local_logger)
+
+        # Test
+        assert measured_interval_s == pytest.approx(2 * INTERVAL_S)
+        assert sender.mav.requests[2:] == [
+            (mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED, INTERVAL_S * 1e6)
+        ]
+        # Measured again from the request
+        assert stream_rates.get_measured_interval("LOCAL_POSITION_NED") is None
+
+    def test_missing(self, clock: FakeClock, local_logger: logger.Logger) -> None:
+        """
+        A type which does not arrive at least twice in a check period is requested again.
+        """
+        # Setup
+        sender = FakeSender()
+        stream_rates = create_stream_rates(sender, local_logger)
+
+        # Run
+        stream(stream_rates, clock, {"ATTITUDE": INTERVAL_S}, CHECK_PERIOD_S)
+        stream_rates.maintain(local_logger)
+
+        # Test
+        assert sender.mav.requests[2:] == [
+            (mavutil.mavlink.MAVLINK_MSG_ID_LOCAL_POSITION_NED, INTERVAL_S * 1e6)
+        ]
+
+    def test_reader_away(self, clock: FakeClock, local_logger: logger.Logger) -> None:
+        """
+        A gap between reads longer than the check period restarts the check instead of
+        requesting again, while a silent drone is still requested again.
+        """
+        # Setup
+        sender = FakeSender()
+        stream_rates = create_stream_rates(sender, local_logger)
+        intervals_s = dict.fromkeys(MESSAGE_TYPES, INTERVAL_S)
+
+        # Run
+        # 1 of each type read, then the reader is away
+        stream(stream_rates, clock, intervals_s, INTERVAL_S / 2)
+        clock.now += 2 * CHECK_PERIOD_S
+        stream_rates.maintain(local_logger)
+        requests_after_gap = len(sender.mav.requests)
+
+        stream(stream_rates, clock, intervals_s, CHECK_PERIOD_S)
+        stream_rates.maintain(local_logger)
+        requests_after_check = len(sender.mav.requests)
+
+        # The reader keeps maintaining while nothing arrives
+        for _ in range(2):
+            clock.now += CHECK_PERIOD_S / 2
+            stream_rates.maintain(local_logger)
+
+        # Test
+        assert requests_after_gap == 2
+        assert requests_after_check == 2
+        assert len(sender.mav.requests) == 4
@@ -0,0 +1,93 @@
+"""
+Test the telemetry encoding between workers.
+"""
+
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_codec
+
+
+class TestTelemetryCodec:
+    """
+    Round trips and rejected payloads.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        Every field of a populated object is decoded as encoded.
+        """
+        data = telemetry.TelemetryData(
+            time_since_boot=123456,
+            x=1.5,
+            y=-2.5,
+            z=3.25,
+            x_velocity=0.1,
+            y_velocity=-0.2,
+            z_velocity=0.3,
+            roll=0.01,
+            pitch=-0.02,
+            yaw=3.14,
+            roll_speed=0.4,
+            pitch_speed=-0.5,
+            yaw_speed=0.6,
+        )
+
+        payload = telemetry_codec.encode(data)
+        result, decoded = telemetry_codec.decode(payload)
+
+        assert len(payload) == telemetry_codec.SIZE
+        assert result
+        assert decoded is not None
+        for name in telemetry_codec.FIELD_NAMES:
+            assert getattr(decoded, name) == getattr(data, name)
+
+    def test_none_fields_kept(self) -> None:
+        """
+        Absent fields are decoded as None, not 0 .
+        """
+        data = telemetry.TelemetryData(time_since_boot=10, x=0.0, yaw=None, roll_speed=2.0)
+
+        result, decoded = telemetry_codec.decode(telemetry_codec.encode(data))
+
+        assert result
+        assert decoded is not None
+        assert decoded.time_since_boot == 10
+        assert decoded.x == 0.0
+        assert decoded.roll_speed == 2.0
+        for name in telemetry_codec.FIELD_NAMES:
+            if name not in ("time_since_boot", "x", "roll_speed"):
+                assert getattr(decoded, name) is None
+
+    def test_all_none(self) -> None:
+        """
+        An empty object round trips.
+        """
+        result, decoded = telemetry_codec.decode(telemetry_codec.encode(telemetry.TelemetryData()))
+
+        assert result
+        assert decoded is not None
+        for name in telemetry_codec.FIELD_NAMES:
+            assert getattr(decoded, name) is None
+
+    def test_wrong_version(self) -> None:
+        """
+        A payload of another layout version is rejected.
+        """
+        payload = bytearray(telemetry_codec.encode(telemetry.TelemetryData(x=1.0)))
+        payload[0] = telemetry_codec.VERSION + 1
+
+        result, decoded = telemetry_codec.decode(bytes(payload))
+
+        assert not result
+        assert decoded is None
+
+    def test_wrong_size(self) -> None:
+        """
+        Payloads shorter or longer than the layout are rejected.
+        """
+        payload = telemetry_codec.encode(telemetry.TelemetryData(x=1.0))
+
+        for wrong_payload in (payload[:-1], payload + b"\x00", b""):
+            result, decoded = telemetry_codec.decode(wrong_payload)
+
+            assert not result
+            assert decoded is None
@@ -0,0 +1,236 @@
+"""
+Test the worker autoscaler.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_autoscaler
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 10
+SCALE_UP_DEPTH = 4
+SCALE_UP_WAIT_S = 0.02
+SCALE_DOWN_DEPTH = 1
+SCALE_DOWN_UTILIZATION = 0.5
+STABLE_CHECK_COUNT = 3
+
+
+class FakeManager:
+    """
+    Worker manager which only counts its workers.
+    """
+
+    def __init__(self, worker_count: int, max_worker_count: int) -> None:
+        """
+        worker_count: Workers at the start.
+        max_worker_count: Most workers add_worker() allows.
+        """
+        self.worker_count = worker_count
+        self.__max_worker_count = max_worker_count
+
+    def get_target_name(self) -> str:
+        """
+        Name in logs.
+        """
+        return "fake"
+
+    def get_worker_count(self) -> int:
+        """
+        Current workers.
+        """
+        return self.worker_count
+
+    def add_worker(self) -> bool:
+        """
+        Adds a worker unless at the maximum.
+        """
+        if self.worker_count >= self.__max_worker_count:
+            return False
+
+        self.worker_count += 1
+        return True
+
+    def remove_worker(self) -> bool:
+        """
+        Removes a worker unless it is the last.
+        """
+        if self.worker_count <= 1:
+            return False
+
+        self.worker_count -= 1
+        return True
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_autoscaler", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def create_autoscaler(
+    manager: FakeManager,
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    local_logger: logger.Logger,
+) -> worker_autoscaler.WorkerAutoscaler:
+    """
+    Autoscaler with the test thresholds.
+    """
+    result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+        manager,  # type: ignore
+        input_queue,
+        SCALE_UP_DEPTH,
+        SCALE_UP_WAIT_S,
+        SCALE_DOWN_DEPTH,
+        SCALE_DOWN_UTILIZATION,
+        STABLE_CHECK_COUNT,
+        local_logger,
+    )
+    assert result
+    assert autoscaler is not None
+
+    return autoscaler
+
+
+def create_queue(enable_statistics: bool) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Shared memory input queue.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None,
+        QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        enable_statistics=enable_statistics,
+    )
+
+
+class TestWorkerAutoscaler:
+    """
+    Scaling decisions from queue depth and statistics.
+    """
+
+    def test_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        Thresholds which overlap or never agree are rejected.
+        """
+        manager = FakeManager(1, 4)
+        input_queue = create_queue(False)
+
+        for down_depth, utilization, stable_count in ((4, 0.5, 1), (1, 1.0, 1), (1, 0.5, 0)):
+            result, _ = worker_autoscaler.WorkerAutoscaler.create(
+                manager,  # type: ignore
+                input_queue,
+                SCALE_UP_DEPTH,
+                SCALE_UP_WAIT_S,
+                down_depth,
+                utilization,
+                stable_count,
+                local_logger,
+            )
+            assert not result
+
+    def test_scale_up_on_depth(self, local_logger: logger.Logger) -> None:
+        """
+        A worker is added once the queue stays deep for the stable count, up to the maximum.
+        """
+        # Setup
+        manager = FakeManager(1, 2)
+        input_queue = create_queue(False)
+        autoscaler = create_autoscaler(manager, input_queue, local_logger)
+        for i in range(SCALE_UP_DEPTH):
+            input_queue.queue.put(i)
+
+        # Run
+        counts = [autoscaler.check() for _ in range(3 * STABLE_CHECK_COUNT)]
+
+        # Test
+        assert counts[: STABLE_CHECK_COUNT - 1] == [1] * (STABLE_CHECK_COUNT - 1)
+        assert counts[STABLE_CHECK_COUNT - 1 :] == [2] * (2 * STABLE_CHECK_COUNT + 1)
+
+    def test_no_flapping(self, local_logger: logger.Logger) -> None:
+        """
+        Load which changes before the stable count does not scale either way.
+        """
+        # Setup
+        manager = FakeManager(2, 4)
+        input_queue = create_queue(False)
+        autoscaler = create_autoscaler(manager, input_queue, local_logger)
+
+        # Run
+        counts = []
+        for _ in range(4):
+            for _ in range(STABLE_CHECK_COUNT - 1):
+                counts.append(autoscaler.check())
+            input_queue.put_many(list(range(SCALE_UP_DEPTH)))
+            for _ in range(STABLE_CHECK_COUNT - 1):
+                counts.append(autoscaler.check())
+            input_queue.get_many(QUEUE_MAX_SIZE, 0.0)
+
+        # Test
+        assert counts == [2] * len(counts)
+
+    def test_scale_down_to_one(self, local_logger: logger.Logger) -> None:
+        """
+        Workers of an empty queue are removed 1 at a time, never the last.
+        """
+        # Setup
+        manager = FakeManager(3, 4)
+        input_queue = create_queue(False)
+        autoscaler = create_autoscaler(manager, input_queue, local_logger)
+
+        # Run
+        counts = [autoscaler.check() for _ in range(3 * STABLE_CHECK_COUNT)]
+
+        # Test
+        assert counts[STABLE_CHECK_COUNT - 1] == 2
+        assert counts[2 * STABLE_CHECK_COUNT - 1] == 1
+        assert counts[-1] == 1
+
+    def test_busy_workers_kept(self, local_logger: logger.Logger) -> None:
+        """
+        With statistics, workers which never waited on the queue are busy and not removed.
+        """
+        # Setup
+        manager = FakeManager(2, 4)
+        input_queue = create_queue(True)
+        autoscaler = create_autoscaler(manager, input_queue, local_logger)
+
+        # Run
+        counts = [autoscaler.check() for _ in range(2 * STABLE_CHECK_COUNT)]
+
+        # Test
+        assert counts == [2] * len(counts)
+
+    def test_scale_up_on_wait(self, local_logger: logger.Logger) -> None:
+        """
+        With statistics, items waiting long add a worker even though the queue is shallow.
+        """
+        # Setup
+        manager = FakeManager(1, 4)
+        input_queue = create_queue(True)
+        autoscaler = create_autoscaler(manager, input_queue, local_logger)
+
+        # Run
+        counts = []
+        for i in range(STABLE_CHECK_COUNT):
+            input_queue.queue.put(i)
+            time.sleep(2 * SCALE_UP_WAIT_S)
+            input_queue.queue.get()
+            counts.append(autoscaler.check())
+
+        # Test
+        assert counts == [1] * (STABLE_CHECK_COUNT - 1) + [2]
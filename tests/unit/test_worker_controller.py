@@ -0,0 +1,251 @@
+"""
+Test the worker controller.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PAUSE_CHECK_S = 0.2
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Controller with no requests.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+def count_until_exit(
+    controller: worker_controller.WorkerController, counter: "mp.sharedctypes.Synchronized"
+) -> None:
+    """
+    Worker loop which counts iterations.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        with counter.get_lock():
+            counter.value += 1
+
+
+def wait_and_acknowledge(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which sleeps until exit, pausing first if requested.
+    """
+    controller.check_pause()
+    controller.wait_for_exit(None)
+    controller.acknowledge_exit()
+
+
+class TestWorkerController:
+    """
+    Exit and pause requests.
+    """
+
+    def test_exit(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Exit is seen immediately and can be cleared.
+        """
+        assert not controller.is_exit_requested()
+
+        controller.request_exit()
+        controller.request_exit()
+        assert controller.is_exit_requested()
+
+        controller.clear_exit()
+        assert not controller.is_exit_requested()
+
+    def test_pause_generation(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Repeated requests do not change the generation.
+        """
+        controller.request_pause()
+        controller.request_pause()
+        assert controller.get_pause_generation() == 1
+
+        controller.request_resume()
+        controller.request_resume()
+        assert controller.get_pause_generation() == 2
+
+        # Not paused, so does not block
+        controller.check_pause()
+
+    def test_pause_worker(self, controller: worker_controller.WorkerController) -> None:
+        """
+        A paused worker stops counting until resumed, then exits.
+        """
+        # Setup
+        counter = mp.Value("Q", 0)
+        worker = mp.Process(target=count_until_exit, args=(controller, counter))
+        worker.start()
+
+        # Run
+        controller.request_pause()
+        # At most 1 more iteration after the pause is seen
+        time.sleep(PAUSE_CHECK_S)
+        paused_count = counter.value
+        time.sleep(PAUSE_CHECK_S)
+        still_paused_count = counter.value
+
+        controller.request_resume()
+        time.sleep(PAUSE_CHECK_S)
+        resumed_count = counter.value
+
+        controller.request_exit()
+        worker.join(5.0)
+
+        # Test
+        assert still_paused_count <= paused_count + 1
+        assert resumed_count > still_paused_count
+        assert worker.exitcode == 0
+
+    def test_exit_wakes_workers(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Sleeping and paused workers exit promptly and acknowledge.
+        """
+        # Setup
+        controller.request_pause()
+        workers = [mp.Process(target=wait_and_acknowledge, args=(controller,)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        assert not controller.wait_for_exit(0.01)
+
+        # Run
+        start = time.monotonic()
+        controller.request_exit()
+        for worker in workers:
+            worker.join(5.0)
+        elapsed = time.monotonic() - start
+
+        # Test
+        assert elapsed < 1.0
+        assert controller.get_exit_acknowledged_count() == 2
+        controller.clear_exit()
+        assert controller.get_exit_acknowledged_count() == 0
+
+    def test_group_pause(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Pausing a group does not pause other workers, pausing the controller pauses the group.
+        """
+        # Setup
+        group = controller.get_group_controller("sheddable")
+        counter = mp.Value("Q", 0)
+        worker = mp.Process(target=count_until_exit, args=(group, counter))
+        worker.start()
+
+        # Run
+        group.request_pause()
+        # Not paused, so does not block
+        controller.check_pause()
+        time.sleep(PAUSE_CHECK_S)
+        group_paused_count = counter.value
+        time.sleep(PAUSE_CHECK_S)
+        group_still_paused_count = counter.value
+
+        group.request_resume()
+        controller.request_pause()
+        time.sleep(PAUSE_CHECK_S)
+        paused_count = counter.value
+        time.sleep(PAUSE_CHECK_S)
+        still_paused_count = counter.value
+
+        # Exit reaches the group even while paused
+        controller.request_exit()
+        worker.join(5.0)
+
+        # Test
+        assert controller.get_group_controller("sheddable") is group
+        assert group_still_paused_count <= group_paused_count + 1
+        assert paused_count > group_still_paused_count
+        assert still_paused_count <= paused_count + 1
+        assert worker.exitcode == 0
+
+    def test_group_exit(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Exiting a group only stops its workers, acknowledgements count at the controller.
+        """
+        # Setup
+        group = controller.get_group_controller("sheddable")
+        worker = mp.Process(target=wait_and_acknowledge, args=(group,))
+        worker.start()
+
+        # Run
+        group.request_exit()
+        worker.join(5.0)
+
+        # Test
+        assert not controller.is_exit_requested()
+        assert group.get_exit_acknowledged_count() == 1
+        assert controller.get_exit_acknowledged_count() == 1
+
+    def test_progress(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Each check of a worker in a group records progress, pauses of the parent are seen.
+        """
+        # Setup
+        group = controller.get_group_controller("sheddable")
+        worker = mp.Process(target=wait_and_acknowledge, args=(group,))
+        before_start_time = time.monotonic()
+
+        # Run
+        initial_progress_time = group.get_progress_time()
+        worker.start()
+        while group.get_progress_time() == 0.0:
+            time.sleep(0.01)
+
+        controller.request_pause()
+        is_group_paused = group.is_paused()
+        controller.request_resume()
+
+        group.request_exit()
+        worker.join(5.0)
+
+        # Test
+        assert initial_progress_time == 0.0
+        assert before_start_time < group.get_progress_time() < time.monotonic()
+        assert controller.get_progress_time() == 0.0
+        assert is_group_paused
+        assert not group.is_paused()
+
+    def test_killed_waiters(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Workers killed while waiting for exit or paused do not stop requests from returning.
+        """
+        # Setup
+        exit_waiter = mp.Process(target=controller.wait_for_exit, args=(None,))
+        pause_waiter = mp.Process(target=controller.check_pause)
+        controller.request_pause()
+        for worker in (exit_waiter, pause_waiter):
+            worker.start()
+        # Time to start waiting
+        time.sleep(PAUSE_CHECK_S)
+        for worker in (exit_waiter, pause_waiter):
+            worker.kill()
+            worker.join(5.0)
+
+        # Run
+        def request() -> None:
+            controller.request_resume()
+            controller.request_exit()
+
+        # Would hang on an event with a killed waiter
+        request_thread = threading.Thread(target=request, daemon=True)
+        request_thread.start()
+        request_thread.join(5.0)
+
+        # Test
+        assert not request_thread.is_alive()
+        assert controller.wait_for_exit(0.0)
+        controller.clear_exit()
+        assert not controller.wait_for_exit(0.01)
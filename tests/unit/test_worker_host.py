@@ -0,0 +1,208 @@
+"""
+Test running workers as threads of a host process.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+JOIN_TIMEOUT_S = 5.0
+
+
+@pytest.fixture()
+def host() -> worker_host.WorkerHost:  # type: ignore
+    """
+    Host with no workers.
+    """
+    yield worker_host.WorkerHost()  # type: ignore
+
+
+def report_pid_until_exit(
+    result_queue: "mp.Queue", controller: worker_controller.WorkerController
+) -> None:
+    """
+    Worker which reports its process, then waits for exit.
+    """
+    result_queue.put(os.getpid())
+    controller.wait_for_exit(None)
+    controller.acknowledge_exit()
+
+
+def send_pid_and_poll_exit(
+    pid_writer: "mp.connection.Connection", controller: worker_controller.WorkerController
+) -> None:
+    """
+    Worker which sends its process, then polls for exit.
+    Neither holds a lock, so the worker can be terminated at any point.
+    """
+    pid_writer.send(os.getpid())
+    while not controller.is_exit_requested():
+        time.sleep(0.01)
+
+
+def fail() -> None:
+    """
+    Worker which raises.
+    """
+    raise ValueError("Worker failed")
+
+
+class TestWorkerHost:
+    """
+    Threads behave like processes to the worker manager.
+    """
+
+    def test_threads_share_process(self, host: worker_host.WorkerHost) -> None:
+        """
+        Workers run in the host process and exit on request.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result_queue = mp.Queue()
+        workers = []
+        for _ in range(2):
+            result, worker = host.add_worker(report_pid_until_exit, (result_queue, controller))
+            assert result
+            assert worker is not None
+            workers.append(worker)
+
+        # Run
+        for worker in workers:
+            worker.start()
+        pids = [result_queue.get(timeout=JOIN_TIMEOUT_S) for _ in workers]
+        is_alive_before_exit = all(worker.is_alive() for worker in workers)
+
+        controller.request_exit()
+        for worker in workers:
+            worker.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert pids == [host.get_pid(), host.get_pid()]
+        assert host.get_pid() != os.getpid()
+        assert is_alive_before_exit
+        assert not any(worker.is_alive() for worker in workers)
+        assert [worker.exitcode for worker in workers] == [0, 0]
+        assert controller.get_exit_acknowledged_count() == 2
+
+    def test_restart(self, host: worker_host.WorkerHost) -> None:
+        """
+        A failed worker has exit code 1, and only the same worker can be added after starting.
+        """
+        # Setup
+        result, worker = host.add_worker(fail, ())
+        assert result
+        assert worker is not None
+
+        # Run
+        worker.start()
+        worker.join(JOIN_TIMEOUT_S)
+        first_exitcode = worker.exitcode
+
+        other_result, _ = host.add_worker(report_pid_until_exit, ())
+        result, restarted_worker = host.add_worker(fail, ())
+        assert result
+        assert restarted_worker is not None
+        restarted_worker.start()
+        restarted_worker.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert first_exitcode == 1
+        assert not other_result
+        assert restarted_worker.name == worker.name
+        assert restarted_worker.exitcode == 1
+
+    def test_thread_ids(self, host: worker_host.WorkerHost) -> None:
+        """
+        Each thread has its own ID within the host process, for reading it in /proc .
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result_queue = mp.Queue()
+        workers = []
+        for _ in range(2):
+            result, worker = host.add_worker(report_pid_until_exit, (result_queue, controller))
+            assert result
+            assert worker is not None
+            workers.append(worker)
+
+        # Run
+        thread_ids_before_start = [worker.get_thread_id() for worker in workers]
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            result_queue.get(timeout=JOIN_TIMEOUT_S)
+        thread_ids = [worker.get_thread_id() for worker in workers]
+        thread_paths_exist = [
+            os.path.exists(f"/proc/{worker.pid}/task/{thread_id}")
+            for worker, thread_id in zip(workers, thread_ids)
+        ]
+
+        controller.request_exit()
+        for worker in workers:
+            worker.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert thread_ids_before_start == [None, None]
+        assert None not in thread_ids
+        assert thread_ids[0] != thread_ids[1]
+        assert workers[0].pid == host.get_pid()
+        assert thread_paths_exist == [True, True]
+
+    def test_restart_after_terminate(self, host: worker_host.WorkerHost) -> None:
+        """
+        A host terminated while its threads run can still start them again.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        pid_reader, pid_writer = mp.Pipe(duplex=False)
+        result, worker = host.add_worker(send_pid_and_poll_exit, (pid_writer, controller))
+        assert result
+        assert worker is not None
+        worker.start()
+        assert pid_reader.poll(JOIN_TIMEOUT_S)
+        first_pid = pid_reader.recv()
+
+        # Run
+        worker.terminate()
+        worker.join(JOIN_TIMEOUT_S)
+        terminated_exitcode = worker.exitcode
+
+        restarted: "list[worker_host.ThreadWorker]" = []
+
+        def restart() -> None:
+            _, restarted_worker = host.add_worker(send_pid_and_poll_exit, (pid_writer, controller))
+            assert restarted_worker is not None
+            restarted_worker.start()
+            restarted.append(restarted_worker)
+
+        # Would hang on anything left behind by the terminated host
+        restart_thread = threading.Thread(target=restart, daemon=True)
+        restart_thread.start()
+        restart_thread.join(JOIN_TIMEOUT_S)
+        is_restart_hung = restart_thread.is_alive()
+        second_pid = None
+        if not is_restart_hung and pid_reader.poll(JOIN_TIMEOUT_S):
+            second_pid = pid_reader.recv()
+
+        controller.request_exit()
+        for restarted_worker in restarted:
+            restarted_worker.join(JOIN_TIMEOUT_S)
+
+        # Test
+        assert terminated_exitcode == -15
+        assert not is_restart_hung
+        assert second_pid == host.get_pid()
+        assert second_pid != first_pid
+        assert restarted[0].exitcode == 0
@@ -0,0 +1,138 @@
+"""
+Test choosing how workers are started.
+"""
+
+import multiprocessing as mp
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_manager", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+@pytest.fixture()
+def start_method() -> None:  # type: ignore
+    """
+    Restores the start method of the test process after the test.
+    """
+    original = mp.get_start_method(allow_none=True)
+    yield  # type: ignore
+    mp.set_start_method(original, force=True)
+
+
+def do_nothing(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which exits at once.
+    """
+    controller.acknowledge_exit()
+
+
+def create_properties(
+    count: int,
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    start_method: "str | None",
+    local_logger: logger.Logger,
+) -> bool:
+    """
+    Returns whether the properties were created.
+    """
+    result, _ = worker_manager.WorkerProperties.create(
+        count,
+        do_nothing,
+        (),
+        input_queues,
+        output_queues,
+        worker_controller.WorkerController(),
+        local_logger,
+        start_method=start_method,
+    )
+    return result
+
+
+def create_pipe_queue() -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Queue of 1 producer and 1 consumer.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None, QUEUE_MAX_SIZE, queue_proxy_wrapper.QueueBackend.PIPE
+    )
+
+
+@pytest.mark.usefixtures("start_method")
+class TestStartMethod:
+    """
+    The default start method and the start method of each worker type.
+    """
+
+    def test_invalid_name(self, local_logger: logger.Logger) -> None:
+        """
+        An unknown start method is rejected, and the default is kept.
+        """
+        original = mp.get_start_method()
+
+        is_set = worker_manager.set_start_method("thread", [], local_logger)
+
+        assert not is_set
+        assert mp.get_start_method() == original
+        assert not create_properties(1, [], [], "thread", local_logger)
+
+    def test_set_twice(self, local_logger: logger.Logger) -> None:
+        """
+        The start method can be set again, the last one is the default.
+        """
+        is_spawn_set = worker_manager.set_start_method("spawn", [], local_logger)
+        is_fork_set = worker_manager.set_start_method("fork", [], local_logger)
+
+        assert is_spawn_set
+        assert is_fork_set
+        assert mp.get_start_method() == "fork"
+
+    def test_spawn_needs_set_start_method(self, local_logger: logger.Logger) -> None:
+        """
+        Spawn workers are rejected while the default is fork, since they cannot receive
+        its locks, and accepted once the default was set.
+        """
+        worker_manager.set_start_method("fork", [], local_logger)
+        is_created_under_fork = create_properties(1, [], [], "spawn", local_logger)
+
+        worker_manager.set_start_method("spawn", [], local_logger)
+        is_created_under_spawn = create_properties(1, [], [], "spawn", local_logger)
+
+        assert not is_created_under_fork
+        assert is_created_under_spawn
+
+    def test_pipe_under_spawn(self, local_logger: logger.Logger) -> None:
+        """
+        A pipe queue is rejected for several spawn workers at either end,
+        and accepted for 1.
+        """
+        worker_manager.set_start_method("spawn", [], local_logger)
+        input_queue = create_pipe_queue()
+        output_queue = create_pipe_queue()
+
+        assert not create_properties(2, [input_queue], [], "spawn", local_logger)
+        assert not create_properties(2, [], [output_queue], "spawn", local_logger)
+        assert create_properties(1, [input_queue], [output_queue], "spawn", local_logger)
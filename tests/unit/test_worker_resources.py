@@ -0,0 +1,172 @@
+"""
+Test sampling the resources used by workers.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_resources
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+BUSY_S = 0.2
+SLEEP_COUNT = 200
+WAIT_TIMEOUT_S = 5.0
+
+
+class FakeManager:
+    """
+    Manager whose only worker is a task of this process.
+    """
+
+    def __init__(self, thread_id: "int | None") -> None:
+        self.thread_id = thread_id
+
+    def get_target_name(self) -> str:
+        """
+        Name the usage is aggregated under.
+        """
+        return "test"
+
+    def get_worker_tasks(self) -> "list[tuple[int, int | None]]":
+        """
+        This process, or 1 of its threads.
+        """
+        return [(os.getpid(), self.thread_id)]
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_resources", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def busy(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which uses the CPU until exit.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        end_time = time.monotonic() + BUSY_S / 10
+        while time.monotonic() < end_time:
+            pass
+
+
+def sleep_often() -> None:
+    """
+    Thread which switches voluntarily many times and exits.
+    """
+    for _ in range(SLEEP_COUNT):
+        time.sleep(0.0005)
+
+
+class TestWorkerResources:
+    """
+    Counters are read from /proc and counted over the interval between samples.
+    """
+
+    def test_read_task_counters(self) -> None:
+        """
+        A process and its threads are read, an exited process is None.
+        """
+        process_counters = worker_resources.read_task_counters(f"/proc/{os.getpid()}")
+        thread_counters = worker_resources.read_task_counters(
+            f"/proc/{os.getpid()}/task/{threading.get_native_id()}"
+        )
+        exited_counters = worker_resources.read_task_counters("/proc/0")
+
+        assert process_counters is not None
+        assert thread_counters is not None
+        assert process_counters.voluntary_switches >= thread_counters.voluntary_switches
+        assert exited_counters is None
+
+    def test_thread_exits_while_read(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        A thread which exited after it was listed does not make the process exited.
+        """
+        list_directory = os.listdir
+        monkeypatch.setattr(
+            worker_resources.os,
+            "listdir",
+            lambda path: list_directory(path) + ["0"],
+        )
+
+        counters = worker_resources.read_task_counters(f"/proc/{os.getpid()}")
+
+        assert counters is not None
+        assert counters.voluntary_switches > 0
+
+    def test_thread_exits_between_samples(self) -> None:
+        """
+        The switches of a thread which exited are not subtracted from the process.
+        """
+        # Setup
+        sampler = worker_resources.WorkerResourceSampler([FakeManager(None)])  # type: ignore
+        thread = threading.Thread(target=sleep_often)
+        thread.start()
+        # Wait for most of the switches of the thread
+        time.sleep(SLEEP_COUNT * 0.0005)
+
+        # Run
+        sampler.sample()
+        thread.join()
+        usage = sampler.sample()[0]
+
+        # Test
+        assert usage.task_count == 1
+        assert usage.voluntary_switches >= 0
+        assert usage.involuntary_switches >= 0
+        assert usage.cpu_s >= 0.0
+
+    def test_sample(self, local_logger: logger.Logger) -> None:
+        """
+        The CPU time of a busy worker is counted over the interval, not since it started.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            1, busy, (), [], [], controller, local_logger
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        sampler = worker_resources.WorkerResourceSampler([manager])
+
+        # Run
+        time.sleep(BUSY_S)
+        first = sampler.sample()[0]
+        time.sleep(BUSY_S)
+        second = sampler.sample()[0]
+
+        controller.request_exit()
+        is_joined = manager.join_workers(time.monotonic() + WAIT_TIMEOUT_S)
+
+        # Test
+        assert is_joined
+        assert (first.target_name, first.task_count) == ("busy", 1)
+        assert second.cpu_s > BUSY_S / 2
+        assert second.cpu_s < 2 * BUSY_S
+        assert second.rss_kb > 0
+        assert second.open_fd_count > 0
+        assert "busy: 1 task(s)" in str(second)
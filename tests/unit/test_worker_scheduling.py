@@ -0,0 +1,166 @@
+"""
+Test applying the CPU placement and priority of workers.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_scheduling
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+# No CPU has this number
+MISSING_CPU = 100000
+WAIT_TIMEOUT_S = 5.0
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_scheduling", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def create_scheduling(
+    cpus: "set[int] | None", nice: "int | None", local_logger: logger.Logger
+) -> worker_scheduling.WorkerScheduling:
+    """
+    Settings without a realtime policy, which need no permission.
+    """
+    result, scheduling = worker_scheduling.WorkerScheduling.create(
+        cpus, nice, None, 1, local_logger
+    )
+    assert result
+    assert scheduling is not None
+
+    return scheduling
+
+
+def send_scheduling(writer: multiprocessing.connection.Connection) -> None:
+    """
+    Worker target which sends the CPU set and nice value it runs with.
+    """
+    writer.send((os.sched_getaffinity(0), os.getpriority(os.PRIO_PROCESS, 0)))
+
+
+def apply_and_send(
+    scheduling: worker_scheduling.WorkerScheduling, writer: multiprocessing.connection.Connection
+) -> None:
+    """
+    Applies the settings in another process, so that this one keeps its own.
+    """
+    failures = scheduling.apply()
+    writer.send(failures)
+    send_scheduling(writer)
+
+
+def run_process(target: "(...) -> object", args: "tuple") -> None:  # type: ignore
+    """
+    Runs the target in a process until it exits.
+    """
+    process = mp.Process(target=target, args=args)
+    process.start()
+    process.join(WAIT_TIMEOUT_S)
+    assert process.exitcode == 0
+
+
+class TestWorkerScheduling:
+    """
+    Settings are checked when created and applied by the worker to itself.
+    """
+
+    def test_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        Empty or negative CPU sets, nice values out of range, unknown policies and
+        realtime priorities out of range are rejected.
+        """
+        for cpus, nice, realtime_policy, realtime_priority in (
+            (set(), None, None, 1),
+            ({0, -1}, None, None, 1),
+            (None, -21, None, 1),
+            (None, 20, None, 1),
+            (None, None, "RR", 1),
+            (None, None, worker_scheduling.RealtimePolicy.RR, 0),
+            (None, None, worker_scheduling.RealtimePolicy.FIFO, 100),
+        ):
+            result, _ = worker_scheduling.WorkerScheduling.create(
+                cpus, nice, realtime_policy, realtime_priority, local_logger  # type: ignore
+            )
+            assert not result
+
+    def test_realtime_priority_unused(self, local_logger: logger.Logger) -> None:
+        """
+        The realtime priority is only checked with a realtime policy.
+        """
+        result, scheduling = worker_scheduling.WorkerScheduling.create(
+            None, None, None, 0, local_logger
+        )
+
+        assert result
+        assert scheduling is not None
+        assert not scheduling.apply()
+
+    def test_apply(self, local_logger: logger.Logger) -> None:
+        """
+        The CPU set and nice value are applied to the calling process.
+        """
+        cpu = min(os.sched_getaffinity(0))
+        nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 1, 19)
+        scheduling = create_scheduling({cpu}, nice, local_logger)
+
+        reader, writer = mp.Pipe(False)
+        run_process(apply_and_send, (scheduling, writer))
+
+        assert reader.recv() == []
+        assert reader.recv() == ({cpu}, nice)
+
+    def test_apply_failure(self, local_logger: logger.Logger) -> None:
+        """
+        A setting which cannot be applied is reported, and the others are still applied.
+        """
+        nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 1, 19)
+        scheduling = create_scheduling({MISSING_CPU}, nice, local_logger)
+
+        reader, writer = mp.Pipe(False)
+        run_process(apply_and_send, (scheduling, writer))
+        failures = reader.recv()
+        cpus, applied_nice = reader.recv()
+
+        assert len(failures) == 1
+        assert failures[0].startswith(f"CPU set [{MISSING_CPU}]")
+        assert cpus == os.sched_getaffinity(0)
+        assert applied_nice == nice
+
+    def test_scheduled_worker(self, local_logger: logger.Logger) -> None:
+        """
+        The target runs with the settings applied, and also when some could not be.
+        """
+        cpu = min(os.sched_getaffinity(0))
+        nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 1, 19)
+        schedulings = [
+            create_scheduling({cpu}, nice, local_logger),
+            create_scheduling({MISSING_CPU}, nice, local_logger),
+        ]
+
+        results = []
+        for scheduling in schedulings:
+            reader, writer = mp.Pipe(False)
+            run_process(
+                worker_scheduling.scheduled_worker, (scheduling, send_scheduling, (writer,))
+            )
+            results.append(reader.recv())
+
+        assert results == [({cpu}, nice), (os.sched_getaffinity(0), nice)]
@@ -0,0 +1,222 @@
+"""
+Test the worker supervisor.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_supervisor
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+POLL_PERIOD_S = 0.005
+WAIT_TIMEOUT_S = 5.0
+
+
+class FakeManager:
+    """
+    Worker manager whose workers die when told to.
+    """
+
+    def __init__(self, is_restart_fixing: bool) -> None:
+        """
+        is_restart_fixing: Whether a restart brings the workers back, otherwise they crash again.
+        """
+        self.dead_worker_count = 0
+        self.restart_count = 0
+        self.__is_restart_fixing = is_restart_fixing
+
+    def get_target_name(self) -> str:
+        """
+        Name in reports.
+        """
+        return "fake"
+
+    def get_dead_worker_count(self) -> int:
+        """
+        Dead workers seen by the supervisor.
+        """
+        return self.dead_worker_count
+
+    def check_and_restart_dead_workers(self) -> bool:
+        """
+        Counts the restart.
+        """
+        self.restart_count += 1
+        if self.__is_restart_fixing:
+            self.dead_worker_count = 0
+        return True
+
+    def check_stalled_workers(self) -> None:
+        """
+        Nothing stalls.
+        """
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_supervisor", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def create_supervisor(
+    manager: FakeManager,
+    initial_backoff_s: float,
+    max_backoff_s: float,
+    restart_budget: int,
+    budget_window_s: float,
+    local_logger: logger.Logger,
+) -> worker_supervisor.WorkerSupervisor:
+    """
+    Started supervisor of the manager.
+    """
+    result, supervisor = worker_supervisor.WorkerSupervisor.create(
+        [manager],  # type: ignore
+        POLL_PERIOD_S,
+        initial_backoff_s,
+        max_backoff_s,
+        restart_budget,
+        budget_window_s,
+        local_logger,
+    )
+    assert result
+    assert supervisor is not None
+
+    supervisor.start()
+    return supervisor
+
+
+def wait_for_reports(supervisor: worker_supervisor.WorkerSupervisor, count: int) -> None:
+    """
+    Waits until the supervisor restarted count times.
+    """
+    end_time = time.monotonic() + WAIT_TIMEOUT_S
+    while len(supervisor.get_restart_reports()) < count:
+        assert time.monotonic() < end_time
+        time.sleep(POLL_PERIOD_S)
+
+
+class TestWorkerSupervisor:
+    """
+    Restarts, backoff and crash loops.
+    """
+
+    def test_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        A supervisor which would never poll or never restart is not created.
+        """
+        result, _ = worker_supervisor.WorkerSupervisor.create(
+            [], 0.0, 0.0, 0.0, 1, 1.0, local_logger
+        )
+        assert not result
+
+        result, _ = worker_supervisor.WorkerSupervisor.create(
+            [], POLL_PERIOD_S, 0.0, 0.0, 0, 1.0, local_logger
+        )
+        assert not result
+
+    def test_backoff_doubles(self, local_logger: logger.Logger) -> None:
+        """
+        The first restart is immediate, then delays double up to the maximum.
+        """
+        # Setup
+        manager = FakeManager(False)
+        supervisor = create_supervisor(manager, 0.02, 0.05, 100, 60.0, local_logger)
+
+        # Run
+        start_time = time.monotonic()
+        manager.dead_worker_count = 2
+        wait_for_reports(supervisor, 4)
+        elapsed_s = time.monotonic() - start_time
+        supervisor.stop()
+        reports = supervisor.get_restart_reports()
+
+        # Test
+        assert [report.attempt for report in reports[:4]] == [1, 2, 3, 4]
+        assert [report.backoff_s for report in reports[:4]] == [0.0, 0.02, 0.04, 0.05]
+        assert elapsed_s >= 0.02 + 0.04 + 0.05
+        assert all(report.worker_count == 2 for report in reports)
+        assert all(report.is_restarted for report in reports)
+
+    def test_backoff_resets_once_stable(self, local_logger: logger.Logger) -> None:
+        """
+        Workers alive for the window restart immediately the next time they die.
+        """
+        # Setup
+        budget_window_s = 0.1
+        manager = FakeManager(True)
+        supervisor = create_supervisor(manager, 10.0, 10.0, 100, budget_window_s, local_logger)
+
+        # Run
+        manager.dead_worker_count = 1
+        wait_for_reports(supervisor, 1)
+        time.sleep(budget_window_s + 10 * POLL_PERIOD_S)
+        manager.dead_worker_count = 1
+        wait_for_reports(supervisor, 2)
+        supervisor.stop()
+        reports = supervisor.get_restart_reports()
+
+        # Test
+        assert [report.attempt for report in reports] == [1, 1]
+        assert [report.backoff_s for report in reports] == [0.0, 0.0]
+        assert manager.dead_worker_count == 0
+
+    def test_crash_loop(self, local_logger: logger.Logger) -> None:
+        """
+        Workers which use up the restart budget within the window are given up on.
+        """
+        # Setup
+        restart_budget = 3
+        manager = FakeManager(False)
+        supervisor = create_supervisor(manager, 0.0, 0.0, restart_budget, 60.0, local_logger)
+
+        # Run
+        manager.dead_worker_count = 1
+        wait_for_reports(supervisor, restart_budget)
+        end_time = time.monotonic() + WAIT_TIMEOUT_S
+        while len(supervisor.get_crash_looping_targets()) == 0:
+            assert time.monotonic() < end_time
+            time.sleep(POLL_PERIOD_S)
+        # Would restart on every poll if still supervised
+        time.sleep(10 * POLL_PERIOD_S)
+        supervisor.stop()
+
+        # Test
+        assert supervisor.get_crash_looping_targets() == ["fake"]
+        assert len(supervisor.get_restart_reports()) == restart_budget
+        assert manager.restart_count == restart_budget
+
+    def test_stop(self, local_logger: logger.Logger) -> None:
+        """
+        After stop, the thread has exited and workers that die are left dead.
+        """
+        # Setup
+        manager = FakeManager(True)
+        supervisor = create_supervisor(manager, 0.0, 0.0, 100, 60.0, local_logger)
+
+        # Run
+        start_time = time.monotonic()
+        supervisor.stop()
+        stop_time_s = time.monotonic() - start_time
+        manager.dead_worker_count = 1
+        time.sleep(10 * POLL_PERIOD_S)
+
+        # Test
+        assert stop_time_s < 1.0
+        assert not supervisor._WorkerSupervisor__thread.is_alive()  # type: ignore
+        assert manager.restart_count == 0
+        assert len(supervisor.get_restart_reports()) == 0
+        # Stopping again does nothing
+        supervisor.stop()
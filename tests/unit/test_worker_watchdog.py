@@ -0,0 +1,266 @@
+"""
+Test noticing and restarting stalled workers.
+"""
+
+import signal
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_host
+from utilities.workers import worker_manager
+from utilities.workers import worker_watchdog
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PERIOD_S = 0.05
+STALL_PERIOD_COUNT = 2.0
+WAIT_TIMEOUT_S = 5.0
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger without a file.
+    """
+    result, instance = logger.Logger.create("test_worker_watchdog", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def stall(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which makes progress once and then gets stuck.
+    """
+    controller.check_pause()
+    time.sleep(60.0)
+
+
+def stall_ignoring_terminate(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which gets stuck and cannot be terminated.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    stall(controller)
+
+
+def make_progress(controller: worker_controller.WorkerController) -> None:
+    """
+    Worker which makes progress every period until exit, pausing if requested.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        controller.wait_for_exit(PERIOD_S / 5)
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    controller: worker_controller.WorkerController,
+    action: worker_watchdog.StallAction,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Started manager of 1 watched worker.
+    """
+    result, watchdog = worker_watchdog.WorkerWatchdog.create(
+        PERIOD_S, STALL_PERIOD_COUNT, action, local_logger
+    )
+    assert result
+    assert watchdog is not None
+
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, (), [], [], controller, local_logger, watchdog=watchdog
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+
+    manager.start_workers()
+    return manager
+
+
+def wait_for_stalled(manager: worker_manager.WorkerManager) -> None:
+    """
+    Checks until the worker is stalled.
+    """
+    end_time = time.monotonic() + WAIT_TIMEOUT_S
+    while manager.check_stalled_workers() == 0:
+        assert time.monotonic() < end_time
+        time.sleep(PERIOD_S / 5)
+
+
+def wait_for_dead(manager: worker_manager.WorkerManager) -> None:
+    """
+    Checks for stalled workers until the worker died.
+    """
+    end_time = time.monotonic() + WAIT_TIMEOUT_S
+    while manager.get_dead_worker_count() == 0:
+        assert time.monotonic() < end_time
+        manager.check_stalled_workers()
+        time.sleep(PERIOD_S / 5)
+
+
+def get_pid(manager: worker_manager.WorkerManager) -> "int | None":
+    """
+    Process ID of the only worker.
+    """
+    return manager.get_worker_tasks()[0][0]
+
+
+class TestWorkerWatchdog:
+    """
+    Stalled workers are logged or restarted.
+    """
+
+    def test_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        A period which is not positive, or a stall within 1 period, is rejected.
+        """
+        for period_s, stall_period_count in ((0.0, 2.0), (PERIOD_S, 1.0)):
+            result, _ = worker_watchdog.WorkerWatchdog.create(
+                period_s, stall_period_count, worker_watchdog.StallAction.LOG, local_logger
+            )
+            assert not result
+
+    def test_host_restart_rejected(self, local_logger: logger.Logger) -> None:
+        """
+        Workers in a host can log stalls, but not be restarted alone.
+        """
+        host = worker_host.WorkerHost("test_worker_watchdog_host")
+        results = []
+        for action in (worker_watchdog.StallAction.RESTART, worker_watchdog.StallAction.LOG):
+            result, watchdog = worker_watchdog.WorkerWatchdog.create(
+                PERIOD_S, STALL_PERIOD_COUNT, action, local_logger
+            )
+            assert result
+            assert watchdog is not None
+
+            result, _ = worker_manager.WorkerProperties.create(
+                1,
+                stall,
+                (),
+                [],
+                [],
+                worker_controller.WorkerController(),
+                local_logger,
+                host=host,
+                watchdog=watchdog,
+            )
+            results.append(result)
+
+        assert results == [False, True]
+
+    def test_restart(self, local_logger: logger.Logger) -> None:
+        """
+        A stalled worker is terminated and then restarted like a dead one.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        start_time = time.monotonic()
+        manager = create_manager(
+            stall, controller, worker_watchdog.StallAction.RESTART, local_logger
+        )
+        stalled_pid = get_pid(manager)
+
+        # Run
+        wait_for_stalled(manager)
+        stalled_s = time.monotonic() - start_time
+        wait_for_dead(manager)
+        is_restarted = manager.check_and_restart_dead_workers()
+        restarted_pid = get_pid(manager)
+
+        manager.join_workers(time.monotonic())
+
+        # Test
+        assert stalled_s >= PERIOD_S * STALL_PERIOD_COUNT
+        assert is_restarted
+        assert restarted_pid not in (None, stalled_pid)
+
+    def test_kill_ignoring_terminate(self, local_logger: logger.Logger) -> None:
+        """
+        A stalled worker still alive at the next check after terminate is killed.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        manager = create_manager(
+            stall_ignoring_terminate, controller, worker_watchdog.StallAction.RESTART, local_logger
+        )
+
+        # Run
+        wait_for_stalled(manager)
+        # Time to ignore the terminate
+        time.sleep(PERIOD_S)
+        is_alive_after_terminate = manager.get_dead_worker_count() == 0
+        wait_for_dead(manager)
+        exitcode = manager._WorkerManager__workers[0][1].exitcode  # type: ignore
+
+        manager.join_workers(time.monotonic())
+
+        # Test
+        assert is_alive_after_terminate
+        assert exitcode == -signal.SIGKILL
+
+    def test_log(self, local_logger: logger.Logger) -> None:
+        """
+        A stalled worker is only reported when the action is to log.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        manager = create_manager(stall, controller, worker_watchdog.StallAction.LOG, local_logger)
+        stalled_pid = get_pid(manager)
+
+        # Run
+        wait_for_stalled(manager)
+        stalled_counts = [manager.check_stalled_workers() for _ in range(3)]
+        dead_count = manager.get_dead_worker_count()
+        pid = get_pid(manager)
+
+        manager.join_workers(time.monotonic())
+
+        # Test
+        assert stalled_counts == [1, 1, 1]
+        assert dead_count == 0
+        assert pid == stalled_pid
+
+    def test_progress_and_pause(self, local_logger: logger.Logger) -> None:
+        """
+        Workers which make progress, or wait while paused, are not stalled.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        manager = create_manager(
+            make_progress, controller, worker_watchdog.StallAction.RESTART, local_logger
+        )
+
+        # Run
+        progress_counts = []
+        for _ in range(5):
+            time.sleep(PERIOD_S)
+            progress_counts.append(manager.check_stalled_workers())
+
+        controller.request_pause()
+        paused_counts = []
+        for _ in range(5):
+            time.sleep(PERIOD_S)
+            paused_counts.append(manager.check_stalled_workers())
+        controller.request_resume()
+
+        controller.request_exit()
+        is_joined = manager.join_workers(time.monotonic() + WAIT_TIMEOUT_S)
+
+        # Test
+        assert progress_counts == [0] * 5
+        assert paused_counts == [0] * 5
+        assert is_joined
+        assert manager.get_dead_worker_count() == 1
@@ -0,0 +1,122 @@
+"""
+For reading a MAVLink connection from an asyncio event loop.
+"""
+
+import asyncio
+import os
+
+from pymavlink import mavutil
+
+
+class AsyncMavlinkReader:
+    """
+    Reads the connection whenever its file descriptor is readable,
+    and hands each message to the subscribers of its type.
+
+    No coroutine blocks on the connection, and each message is parsed once
+    however many coroutines want it, instead of each reader discarding the messages of
+    the others. Sends do not block on the non-blocking socket, so coroutines call
+    `connection.mav.*_send` directly.
+    """
+
+    # Most bytes read per wakeup
+    __READ_SIZE = 4096
+
+    def __init__(self, connection: mavutil.mavfile, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        connection: Connection with a file descriptor, like TCP.
+        loop: Event loop of the subscribers.
+        """
+        self.__connection = connection
+        self.__loop = loop
+        # Only accessed from the event loop
+        self.__subscribers: "dict[str, list[asyncio.Queue]]" = {}
+        self.__is_reading = False
+        self.__is_connected = True
+        self.__message_count = 0
+        self.__dropped_count = 0
+
+    def subscribe(self, message_types: "list[str]", maxsize: int) -> asyncio.Queue:
+        """
+        Creates a queue which gets every message of the types from now on.
+        Once full, the oldest message is dropped for the newest, so a slow subscriber
+        never holds up the others.
+
+        message_types: MAVLink message names, like "HEARTBEAT".
+        maxsize: Messages kept for the subscriber, <= 0 for infinity.
+        """
+        subscriber = asyncio.Queue(maxsize)
+        for message_type in message_types:
+            self.__subscribers.setdefault(message_type, []).append(subscriber)
+
+        return subscriber
+
+    def start(self) -> None:
+        """
+        Starts reading on the event loop.
+        """
+        if self.__is_reading:
+            return
+
+        self.__loop.add_reader(self.__connection.fd, self.__read)
+        self.__is_reading = True
+
+    def stop(self) -> None:
+        """
+        Stops reading, messages already queued stay with the subscribers.
+        """
+        if not self.__is_reading:
+            return
+
+        self.__loop.remove_reader(self.__connection.fd)
+        self.__is_reading = False
+
+    def __read(self) -> None:
+        """
+        Parses what is readable and queues the messages.
+        """
+        try:
+            data = os.read(self.__connection.fd, self.__READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        # Readable with nothing to read is the end of the connection
+        if len(data) == 0:
+            self.__is_connected = False
+            self.stop()
+            return
+
+        messages = self.__connection.mav.parse_buffer(data)
+        if messages is None:
+            return
+
+        for message in messages:
+            # Keeps the connection state, like the latest message of each type, up to date
+            self.__connection.post_message(message)
+            self.__message_count += 1
+            for subscriber in self.__subscribers.get(message.get_type(), []):
+                if subscriber.full():
+                    subscriber.get_nowait()
+                    self.__dropped_count += 1
+
+                subscriber.put_nowait(message)
+
+    def is_connected(self) -> bool:
+        """
+        Returns False once the other end closed the connection.
+        """
+        return self.__is_connected
+
+    def get_message_count(self) -> int:
+        """
+        Returns how many messages have been read.
+        """
+        return self.__message_count
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns how many messages were dropped by full subscribers.
+        """
+        return self.__dropped_count
@@ -0,0 +1,464 @@
+"""
+For keeping the connection to the drone through link failures.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+
+
+class LinkFlapSummary:
+    """
+    Link failures of a ConnectionManager and how long messages took to resume.
+    """
+
+    def __init__(
+        self, flap_count: int, resume_count: int, resume_total_s: float, resume_max_s: float
+    ) -> None:
+        """
+        flap_count: Failures of the connection in use.
+        resume_count: Failures after which messages arrived again.
+        resume_total_s, resume_max_s: Time from each failure until the next message.
+        """
+        self.flap_count = flap_count
+        self.resume_count = resume_count
+        self.resume_total_s = resume_total_s
+        self.resume_max_s = resume_max_s
+
+    def get_mean_resume_s(self) -> float:
+        """
+        Returns the mean time from a failure until the next message.
+        """
+        if self.resume_count == 0:
+            return 0.0
+
+        return self.resume_total_s / self.resume_count
+
+    def __str__(self) -> str:
+        return (
+            f"flaps: {self.flap_count}, resumed: {self.resume_count}, "
+            f"time to resume: mean {self.get_mean_resume_s():.3f}s "
+            f"(max {self.resume_max_s:.3f}s)"
+        )
+
+
+class ConnectionManager:  # pylint: disable=too-many-instance-attributes
+    """
+    Owns the connection to the drone and replaces it when it fails.
+
+    The reader of the connection, the dispatcher, reports failures and calls maintain() ,
+    which reconnects with exponential backoff. Other users, like the writer, get the
+    current connection every time they use it. Workers hold subscriptions and senders,
+    which are not affected by a reconnect.
+
+    With a standby, a second endpoint is kept open and drained, and takes over immediately
+    when the connection in use fails, while the failed endpoint reconnects as the new standby.
+
+    Endpoints are opened on a thread, since opening a TCP endpoint waits for the drone
+    with no timeout, and the reader must keep reading the standby and checking for exit.
+
+    Like the connection, this is inherited by forked workers. The reader and the writer
+    must be threads of 1 process, like a WorkerHost , so that they share the connection.
+    """
+
+    __create_key = object()
+
+    # Most bytes discarded from the standby at once
+    __DRAIN_READ_SIZE = 4096
+    # Longest the reader waits for a connect thread, an endpoint which opens at once
+    # is used at once instead of at the next maintain()
+    __CONNECT_WAIT_S = 0.01
+    # Longest create() waits for the standby, later maintain() calls of the reader open it
+    __CREATE_CONNECT_TIMEOUT_S = 2.0
+
+    # Indices into the shared counters
+    __FLAP_COUNT = 0
+    __RESUME_COUNT = 1
+    __RESUME_TOTAL = 2
+    __RESUME_MAX = 3
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        connection_string: str,
+        standby_connection_string: "str | None",
+        silence_timeout_s: float,
+        initial_backoff_s: float,
+        max_backoff_s: float,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, ConnectionManager | None]":
+        """
+        Takes over the connection, and opens the standby if any.
+
+        connection: Open connection to the drone.
+        connection_string: Endpoint of the connection, to reconnect to.
+        standby_connection_string: Another endpoint of the same drone kept open to
+            fail over to, None for no standby.
+        silence_timeout_s: Time without any data after which the connection in use
+            has failed, for a link which drops without closing, like a radio out of range.
+        initial_backoff_s: Delay before the second reconnect attempt since data last arrived
+            from an endpoint, the first is immediate.
+        max_backoff_s: Longest delay between reconnect attempts.
+        local_logger: Existing logger from process.
+
+        Returns the ConnectionManager object.
+        """
+        if silence_timeout_s <= 0.0:
+            local_logger.error("Silence timeout must be greater than zero", True)
+            return False, None
+
+        if initial_backoff_s <= 0.0 or max_backoff_s < initial_backoff_s:
+            local_logger.error(
+                f"Backoff must be greater than zero, initial {initial_backoff_s}s "
+                f"and max {max_backoff_s}s",
+                True,
+            )
+            return False, None
+
+        connection_strings = [connection_string]
+        if standby_connection_string is not None:
+            connection_strings.append(standby_connection_string)
+
+        manager = ConnectionManager(
+            cls.__create_key,
+            connection,
+            connection_strings,
+            silence_timeout_s,
+            initial_backoff_s,
+            max_backoff_s,
+        )
+        manager.maintain(local_logger)
+        # Opened before workers fork, which would not inherit the connect thread
+        end_time = time.monotonic() + cls.__CREATE_CONNECT_TIMEOUT_S
+        for index, thread in enumerate(manager.__connect_threads):
+            if thread is None:
+                continue
+
+            thread.join(max(end_time - time.monotonic(), 0.0))
+            manager.__finish_connect(index, local_logger)
+            if manager.__connect_threads[index] is None:
+                continue
+
+            # Left to the reader, which attempts again after the backoff
+            with manager.__lock:
+                manager.__connect_threads[index] = None
+            backoff_s = manager.__schedule_reconnect(index)
+            local_logger.warning(
+                f"{manager.__connection_strings[index]} not open after "
+                f"{cls.__CREATE_CONNECT_TIMEOUT_S}s, next attempt in {backoff_s:.3f}s",
+                True,
+            )
+
+        return True, manager
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection: mavutil.mavfile,
+        connection_strings: "list[str]",
+        silence_timeout_s: float,
+        initial_backoff_s: float,
+        max_backoff_s: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is ConnectionManager.__create_key, "Use create() method"
+
+        self.__connection_strings = connection_strings
+        self.__silence_timeout_s = silence_timeout_s
+        self.__initial_backoff_s = initial_backoff_s
+        self.__max_backoff_s = max_backoff_s
+        self.__source_system = connection.mav.srcSystem
+        self.__source_component = connection.mav.srcComponent
+
+        # State of each endpoint, in the same order, the first is in use
+        count = len(connection_strings)
+        self.__connections: "list[mavutil.mavfile | None]" = [connection] + [None] * (count - 1)
+        # Attempts since data last arrived, so that an endpoint which accepts and closes
+        # backs off like one which refuses
+        self.__attempt_counts = [0] * count
+        self.__next_attempt_times = [0.0] * count
+        # Thread opening each endpoint, and what it opened once done
+        self.__connect_threads: "list[threading.Thread | None]" = [None] * count
+        self.__connect_results: "list[tuple[mavutil.mavfile | None, str] | None]" = [None] * count
+
+        # Changed only by the reader, read by any thread
+        self.__lock = threading.Lock()
+        self.__active_index: "int | None" = 0
+        # Changes every time the connection in use is replaced
+        self.__generation = 0
+        self.__last_receive_time = time.monotonic()
+        # Set by a failure, cleared by the next message
+        self.__flap_time: "float | None" = None
+
+        # Shared with main, which reports them
+        self.__counters = mp.Array("d", 4)
+
+    def get_connection(self) -> "tuple[int, mavutil.mavfile | None]":
+        """
+        Returns the generation and the connection in use, None while reconnecting.
+        Pass the generation to report_failure() .
+        """
+        with self.__lock:
+            if self.__active_index is None:
+                return self.__generation, None
+
+            return self.__generation, self.__connections[self.__active_index]
+
+    def get_source_ids(self) -> "tuple[int, int]":
+        """
+        Returns the system and component ID that the connections send as.
+        """
+        return self.__source_system, self.__source_component
+
+    def restart_silence_timer(self) -> None:
+        """
+        Counts silence from now, called by the reader as it starts,
+        since a restarted reader inherits the time of its first start.
+        """
+        self.__last_receive_time = time.monotonic()
+
+    def record_receive(self, local_logger: logger.Logger) -> None:
+        """
+        Records data from the connection in use, called by the reader.
+        The first after a failure is when messages resumed.
+        """
+        now = time.monotonic()
+        self.__last_receive_time = now
+        if self.__active_index is not None:
+            self.__attempt_counts[self.__active_index] = 0
+
+        if self.__flap_time is None:
+            return
+
+        # The writer may report a failure at the same time
+        with self.__lock:
+            flap_time = self.__flap_time
+            self.__flap_time = None
+
+        if flap_time is None:
+            return
+
+        resume_s = now - flap_time
+        counters = self.__counters
+        with counters.get_lock():
+            counters[self.__RESUME_COUNT] += 1
+            counters[self.__RESUME_TOTAL] += resume_s
+            counters[self.__RESUME_MAX] = max(counters[self.__RESUME_MAX], resume_s)
+
+        local_logger.info(f"Messages resumed {resume_s:.3f}s after the link failed", True)
+
+    def report_failure(self, generation: int, reason: str, local_logger: logger.Logger) -> None:
+        """
+        Closes the connection in use and fails over to the standby if it is open,
+        called by the reader or the writer. A failure of a connection already replaced
+        is ignored, so only the first to notice a failure reports it.
+
+        generation: From get_connection() when the connection was gotten.
+        reason: Logged.
+        """
+        with self.__lock:
+            if generation != self.__generation or self.__active_index is None:
+                return
+
+            failed_index = self.__active_index
+            connection = self.__connections[failed_index]
+            self.__connections[failed_index] = None
+            self.__active_index = self.__find_open_endpoint()
+            self.__generation += 1
+            # Silence of the standby counts from the failover
+            self.__last_receive_time = time.monotonic()
+            # Before the reader can see the endpoint closed and reconnect it
+            self.__schedule_reconnect(failed_index)
+            # Failures of a reconnect before any message are part of the same flap
+            is_new_flap = self.__flap_time is None
+            if is_new_flap:
+                self.__flap_time = time.monotonic()
+
+        # Get Pylance to stop complaining
+        assert connection is not None
+
+        connection.close()
+        if is_new_flap:
+            with self.__counters.get_lock():
+                self.__counters[self.__FLAP_COUNT] += 1
+
+        local_logger.error(
+            f"Connection to {self.__connection_strings[failed_index]} failed: {reason}", True
+        )
+        if self.__active_index is not None:
+            local_logger.warning(
+                f"Failed over to {self.__connection_strings[self.__active_index]}", True
+            )
+
+    def maintain(self, local_logger: logger.Logger) -> None:
+        """
+        Call often from the reader: fails a silent connection, drains the standby,
+        and reconnects closed endpoints when their backoff is over, without waiting for them.
+        """
+        now = time.monotonic()
+        generation, connection = self.get_connection()
+        if connection is not None and now - self.__last_receive_time > self.__silence_timeout_s:
+            self.report_failure(
+                generation, f"nothing received for {self.__silence_timeout_s}s", local_logger
+            )
+
+        for index, connection_string in enumerate(self.__connection_strings):
+            if index == self.__active_index:
+                continue
+
+            if self.__connections[index] is not None:
+                self.__drain(index, local_logger)
+                continue
+
+            if self.__connect_threads[index] is not None:
+                self.__finish_connect(index, local_logger)
+                continue
+
+            if now < self.__next_attempt_times[index]:
+                continue
+
+            self.__attempt_counts[index] += 1
+            thread = threading.Thread(
+                target=self.__connect, args=(index, connection_string), daemon=True
+            )
+            self.__connect_threads[index] = thread
+            thread.start()
+            thread.join(self.__CONNECT_WAIT_S)
+            self.__finish_connect(index, local_logger)
+
+    def get_flap_summary(self) -> LinkFlapSummary:
+        """
+        Returns the link failures so far, readable from any process.
+        """
+        with self.__counters.get_lock():
+            counters = list(self.__counters)
+
+        return LinkFlapSummary(
+            int(counters[self.__FLAP_COUNT]),
+            int(counters[self.__RESUME_COUNT]),
+            counters[self.__RESUME_TOTAL],
+            counters[self.__RESUME_MAX],
+        )
+
+    def __find_open_endpoint(self) -> "int | None":
+        """
+        Returns the first open endpoint, None if all are closed.
+        """
+        for index, connection in enumerate(self.__connections):
+            if connection is not None:
+                return index
+
+        return None
+
+    def __schedule_reconnect(self, index: int) -> float:
+        """
+        Delays the next attempt of a closed endpoint by the backoff, which doubles with every
+        attempt since data last arrived from it.
+
+        Returns the delay.
+        """
+        attempt_count = self.__attempt_counts[index]
+        backoff_s = 0.0
+        if attempt_count > 0:
+            backoff_s = min(
+                self.__max_backoff_s, self.__initial_backoff_s * 2 ** (attempt_count - 1)
+            )
+
+        self.__next_attempt_times[index] = time.monotonic() + backoff_s
+        return backoff_s
+
+    def __connect(self, index: int, connection_string: str) -> None:
+        """
+        Connect thread, attempts to open an endpoint once.
+        """
+        try:
+            connection = mavutil.mavlink_connection(
+                connection_string,
+                source_system=self.__source_system,
+                source_component=self.__source_component,
+                retries=0,
+            )
+            error = ""
+        # Catching all exceptions for library call
+        # pylint: disable-next=broad-exception-caught
+        except Exception as e:
+            connection = None
+            error = str(e)
+
+        with self.__lock:
+            # Given up on by create(), which does not take the result
+            is_abandoned = self.__connect_threads[index] is not threading.current_thread()
+            if not is_abandoned:
+                self.__connect_results[index] = (connection, error)
+
+        if is_abandoned and connection is not None:
+            connection.close()
+
+    def __finish_connect(self, index: int, local_logger: logger.Logger) -> None:
+        """
+        Takes the endpoint opened by the connect thread once it is done, backing off on failure.
+        """
+        with self.__lock:
+            result = self.__connect_results[index]
+            if result is None:
+                return
+
+            self.__connect_results[index] = None
+
+        self.__connect_threads[index] = None
+        connection, error = result
+        connection_string = self.__connection_strings[index]
+        if connection is None:
+            backoff_s = self.__schedule_reconnect(index)
+            local_logger.warning(
+                f"Reconnect to {connection_string} failed: {error}, next in {backoff_s:.3f}s", True
+            )
+            return
+
+        with self.__lock:
+            self.__connections[index] = connection
+            if self.__active_index is None:
+                self.__active_index = index
+                self.__generation += 1
+                # Silence counts from the reconnect
+                self.__last_receive_time = time.monotonic()
+
+        local_logger.info(f"Connected to {connection_string}", True)
+
+    def __drain(self, index: int, local_logger: logger.Logger) -> None:
+        """
+        Discards what the standby received, so that the drone never blocks on it.
+        """
+        connection = self.__connections[index]
+
+        # Get Pylance to stop complaining
+        assert connection is not None
+
+        while True:
+            try:
+                data = os.read(connection.fd, self.__DRAIN_READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                data = b""
+                local_logger.warning(f"Standby read failed: {e}", True)
+
+            if len(data) > 0:
+                self.__attempt_counts[index] = 0
+                continue
+
+            # Closed, reconnected like any other endpoint
+            with self.__lock:
+                self.__connections[index] = None
+            connection.close()
+            self.__schedule_reconnect(index)
+            local_logger.warning(f"Standby {self.__connection_strings[index]} closed", True)
+            return
@@ -0,0 +1,199 @@
+"""
+For sharing the inbound side of a MAVLink connection between workers.
+"""
+
+import os
+import pathlib
+import queue
+import select
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Longest time the dispatcher waits on a quiet connection before checking for exit
+DISPATCHER_POLL_PERIOD_S = 0.1
+# Most bytes read at once
+DISPATCHER_READ_SIZE = 4096
+
+
+class MavlinkSubscription:
+    """
+    Messages of some types from the dispatcher worker, read like the connection.
+
+    Passed to a worker in place of the connection, for classes which only receive with
+    `recv_match()` , like HeartbeatReceiver and Telemetry. Messages cross the queue as their
+    MAVLink frame, which is smaller and faster than a pickled message, and are unpacked by the
+    worker when read.
+    """
+
+    def __init__(
+        self,
+        message_types: "list[str]",
+        message_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    ) -> None:
+        """
+        message_types: MAVLink message names to receive, like "HEARTBEAT".
+        message_queue: Frames from the dispatcher to the worker. Use DROP_OLDEST so that
+            a slow worker never holds up the dispatcher or the other workers.
+        """
+        self.__message_types = message_types
+        self.__message_queue = message_queue
+        # Created in the worker process, only used to unpack frames
+        self.__mav: "mavutil.mavlink.MAVLink | None" = None
+
+    def get_message_types(self) -> "list[str]":
+        """
+        Returns the MAVLink message names received.
+        """
+        return self.__message_types
+
+    def put_frame(self, frame: bytes) -> None:
+        """
+        Queues a frame, called by the dispatcher.
+        """
+        self.__message_queue.queue.put(frame)
+
+    def recv_msg(self) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Returns the next message without waiting, None if there is none.
+        """
+        return self.recv_match(blocking=False)
+
+    def recv_match(
+        self,
+        # Named like the parameter of the connection method this replaces
+        # pylint: disable-next=redefined-builtin
+        type: "str | list[str] | None" = None,
+        blocking: bool = False,
+        timeout: "float | None" = None,
+    ) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Returns the next message of the type, like `mavutil.mavfile.recv_match()` .
+        Messages of other subscribed types are skipped.
+
+        type: MAVLink message name or names, None for any subscribed type.
+        blocking: Whether to wait for a message.
+        timeout: Longest wait in seconds when blocking, None waits forever.
+
+        Returns None if there is no message in time, or the queue was closed.
+        """
+        if isinstance(type, str):
+            type = [type]
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if not blocking:
+                    frame = self.__message_queue.queue.get_nowait()
+                elif deadline is None:
+                    frame = self.__message_queue.queue.get()
+                else:
+                    frame = self.__message_queue.queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+            except queue.Empty:
+                return None
+
+            # Closed
+            if frame is None:
+                return None
+
+            if self.__mav is None:
+                self.__mav = mavutil.mavlink.MAVLink(None)
+
+            message = self.__mav.decode(bytearray(frame))
+            if type is None or message.get_type() in type:
+                return message
+
+
+def mavlink_dispatcher_worker(
+    link: connection_manager.ConnectionManager,
+    subscriptions: "list[MavlinkSubscription]",
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process, the only reader of the connection.
+    Parses each frame once and queues it for every subscription of its type.
+    Reports link failures and keeps the link reconnecting.
+
+    link: Connection to the drone, shared with the writer.
+    subscriptions: Where to send each message type, passed to the workers using them.
+    controller: How the main process communicates to this worker process.
+    """
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    routes: "dict[str, list[MavlinkSubscription]]" = {}
+    for subscription in subscriptions:
+        for message_type in subscription.get_message_types():
+            routes.setdefault(message_type, []).append(subscription)
+
+    link.restart_silence_timer()
+
+    message_count = 0
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        link.maintain(local_logger)
+        generation, connection = link.get_connection()
+        if connection is None:
+            controller.wait_for_exit(DISPATCHER_POLL_PERIOD_S)
+            continue
+
+        # Wakes to check for exit while the connection is quiet
+        try:
+            readable, _, _ = select.select([connection.fd], [], [], DISPATCHER_POLL_PERIOD_S)
+        except OSError as e:
+            # Closed by the writer reporting a failed write
+            link.report_failure(generation, f"select failed: {e}", local_logger)
+            continue
+        if len(readable) == 0:
+            continue
+
+        try:
+            data = os.read(connection.fd, DISPATCHER_READ_SIZE)
+        except BlockingIOError:
+            continue
+        except OSError as e:
+            link.report_failure(generation, f"read failed: {e}", local_logger)
+            continue
+
+        # Readable with nothing to read is the end of the connection
+        if len(data) == 0:
+            link.report_failure(generation, "closed by the drone", local_logger)
+            continue
+
+        link.record_receive(local_logger)
+        messages = connection.mav.parse_buffer(data)
+        if messages is None:
+            continue
+
+        for message in messages:
+            message_count += 1
+            subscribers = routes.get(message.get_type(), [])
+            if len(subscribers) == 0:
+                continue
+
+            frame = bytes(message.get_msgbuf())
+            for subscription in subscribers:
+                subscription.put_frame(frame)
+
+    local_logger.info(f"Dispatched {message_count} messages", True)
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
@@ -0,0 +1,199 @@
+"""
+For sharing the outbound side of a MAVLink connection between workers.
+"""
+
+import os
+import pathlib
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from utilities.mavlink import connection_manager
+from utilities.workers import priority_queue_wrapper
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Longest time the writer waits on an empty queue before checking for exit
+WRITER_POLL_PERIOD_S = 0.1
+# Most frames coalesced into 1 write
+WRITER_BATCH_MAX = 16
+
+
+def get_message_id(frame: bytes) -> int:
+    """
+    Returns the message ID in the header of a MAVLink 1 or 2 frame.
+    """
+    if frame[0] == mavutil.mavlink.PROTOCOL_MARKER_V2:
+        return frame[7] | (frame[8] << 8) | (frame[9] << 16)
+
+    return frame[5]
+
+
+class MavlinkSender:
+    """
+    Sends through the writer worker, used like the connection.
+
+    Passed to a worker in place of the connection, for classes which only send with
+    `connection.mav.*_send()` , like HeartbeatSender and Command. Each send is queued as its
+    frame, and the writer stamps the sequence number and IDs of the connection before writing,
+    so that frames from every worker form 1 sequence.
+    """
+
+    def __init__(
+        self,
+        send_queue: (
+            priority_queue_wrapper.PriorityQueueWrapper | queue_proxy_wrapper.QueueProxyWrapper
+        ),
+        urgent_message_types: "list[str] | None" = None,
+    ) -> None:
+        """
+        send_queue: Frames to the writer, shared by every sender.
+            With a PriorityQueueWrapper , urgent frames are written before all others.
+        urgent_message_types: MAVLink message names to put in the urgent lane,
+            None for only "HEARTBEAT".
+        """
+        if urgent_message_types is None:
+            urgent_message_types = ["HEARTBEAT"]
+
+        self.__send_queue = send_queue
+        self.__urgent_message_ids = {
+            getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}")
+            for message_type in urgent_message_types
+        }
+        # Created in the worker process, only used to encode frames
+        self.__mav: "mavutil.mavlink.MAVLink | None" = None
+
+    @property
+    def mav(self) -> "mavutil.mavlink.MAVLink":
+        """
+        Encoder with the `*_send()` methods of the connection.
+        """
+        if self.__mav is None:
+            self.__mav = mavutil.mavlink.MAVLink(self)
+
+        return self.__mav
+
+    def write(self, buf: bytes) -> None:
+        """
+        Queues a frame, called by the encoder.
+        """
+        frame = bytes(buf)
+        if get_message_id(frame) in self.__urgent_message_ids:
+            self.__send_queue.put_urgent(frame)
+            return
+
+        self.__send_queue.queue.put(frame)
+
+
+class FrameBatch:
+    """
+    Collects the frames encoded by the writer, to write them at once.
+    """
+
+    def __init__(self) -> None:
+        self.__frames: "list[bytes]" = []
+
+    def write(self, buf: bytes) -> None:
+        """
+        Adds a frame, called by the encoder.
+        """
+        self.__frames.append(bytes(buf))
+
+    def take(self) -> bytes:
+        """
+        Returns the frames added since the last call, joined.
+        """
+        data = b"".join(self.__frames)
+        self.__frames.clear()
+        return data
+
+
+def mavlink_writer_worker(
+    link: connection_manager.ConnectionManager,
+    send_queue: priority_queue_wrapper.PriorityQueueWrapper | queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process, the only writer of the connection.
+    Writes the frames available in the queue in 1 write, urgent first and the rest in the order
+    they were sent. Time spent in the queue is in the queue statistics, if enabled.
+    Frames sent while the link is reconnecting are dropped, they would be stale once it is back.
+    A failed write is reported to the link like a failed read, and its frames are dropped.
+
+    link: Connection to the drone, shared with the dispatcher.
+    send_queue: Frames from every MavlinkSender .
+    controller: How the main process communicates to this worker process.
+    """
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    decoder = mavutil.mavlink.MAVLink(None)
+    batch = FrameBatch()
+    # Encodes as the connection, continuing its sequence
+    source_system, source_component = link.get_source_ids()
+    encoder = mavutil.mavlink.MAVLink(batch, source_system, source_component)
+    _, connection = link.get_connection()
+    if connection is not None:
+        encoder.seq = connection.mav.seq
+
+    frame_count = 0
+    write_count = 0
+    dropped_count = 0
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        batch_frame_count = 0
+        for frame in send_queue.get_many(WRITER_BATCH_MAX, WRITER_POLL_PERIOD_S):
+            # Closed
+            if frame is None:
+                continue
+
+            try:
+                message = decoder.decode(bytearray(frame))
+            except mavutil.mavlink.MAVError as e:
+                local_logger.error(f"Frame not sent: {e}", True)
+                continue
+
+            encoder.send(message, force_mavlink1=frame[0] == mavutil.mavlink.PROTOCOL_MARKER_V1)
+            batch_frame_count += 1
+
+        data = batch.take()
+        if batch_frame_count == 0:
+            continue
+
+        generation, connection = link.get_connection()
+        if connection is None:
+            dropped_count += batch_frame_count
+            continue
+
+        try:
+            connection.write(data)
+        # Catching all exceptions for library call
+        # pylint: disable-next=broad-exception-caught
+        except Exception as e:
+            # Dropped like frames sent while reconnecting
+            link.report_failure(generation, f"write failed: {e}", local_logger)
+            dropped_count += batch_frame_count
+            continue
+
+        frame_count += batch_frame_count
+        write_count += 1
+
+    local_logger.info(
+        f"Wrote {frame_count} frames in {write_count} writes, "
+        f"dropped {dropped_count} frames while reconnecting",
+        True,
+    )
+
+    # Let main know this worker left its loop
+    controller.acknowledge_exit()
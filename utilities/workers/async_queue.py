@@ -0,0 +1,145 @@
+"""
+Queues for asyncio code.
+"""
+
+import asyncio
+import queue
+import threading
+
+from utilities.workers import queue_selector
+
+
+class AsyncNotifier:
+    """
+    Forwards the wakeups of a QueueNotifier to an event loop.
+
+    One thread watches the notifier for every queue sharing it,
+    so any number of AsyncQueue can wait without a thread each.
+    """
+
+    def __init__(
+        self, notifier: queue_selector.QueueNotifier, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """
+        notifier: Shared by the queues to wait on.
+        loop: Event loop of the waiting coroutines.
+        """
+        self.__notifier = notifier
+        self.__loop = loop
+        # Only accessed from the event loop
+        self.__waiters: "set[asyncio.Future]" = set()
+
+        self.__is_closed = False
+        self.__thread = threading.Thread(target=self.__watch, daemon=True)
+        self.__thread.start()
+
+    def __watch(self) -> None:
+        """
+        Wakes the waiters after every put or get.
+        """
+        generation = self.__notifier.get_generation()
+        while not self.__is_closed:
+            self.__notifier.wait(generation, None)
+            generation = self.__notifier.get_generation()
+            if self.__is_closed:
+                return
+
+            self.__loop.call_soon_threadsafe(self.__wake)
+
+    def __wake(self) -> None:
+        """
+        Resolves every pending wait.
+        """
+        waiters = self.__waiters
+        self.__waiters = set()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def get_generation(self) -> int:
+        """
+        Current generation, read before trying the queue.
+        """
+        return self.__notifier.get_generation()
+
+    async def wait(self, generation: int) -> None:
+        """
+        Waits until a put or get happens after the generation was read.
+        """
+        waiter = self.__loop.create_future()
+        self.__waiters.add(waiter)
+        # Registered before checking, so a change after the check resolves the waiter
+        if self.__notifier.get_generation() != generation:
+            self.__waiters.discard(waiter)
+            return
+
+        try:
+            await waiter
+        finally:
+            self.__waiters.discard(waiter)
+
+    def close(self) -> None:
+        """
+        Stops the watching thread.
+        """
+        if self.__is_closed:
+            return
+
+        self.__is_closed = True
+        # Wake the thread so that it sees the flag
+        self.__notifier.notify()
+        self.__thread.join()
+
+
+class AsyncQueue:
+    """
+    Awaitable get and put on a queue wrapper, iterating until sentinel (None).
+    """
+
+    def __init__(self, wrapper: object, async_notifier: AsyncNotifier) -> None:
+        """
+        wrapper: QueueProxyWrapper or PriorityQueueWrapper created with a notifier.
+        async_notifier: Forwards the wakeups of that notifier.
+        """
+        if wrapper.notifier is None:  # type: ignore
+            raise ValueError("Queue must have a notifier")
+
+        self.__wrapper = wrapper
+        self.__async_notifier = async_notifier
+
+    async def get(self) -> object:
+        """
+        Removes and returns an item, waiting until one is available.
+        """
+        while True:
+            generation = self.__async_notifier.get_generation()
+            try:
+                return self.__wrapper.queue.get_nowait()  # type: ignore
+            except queue.Empty:
+                pass
+
+            await self.__async_notifier.wait(generation)
+
+    async def put(self, item: object) -> None:
+        """
+        Puts an item, waiting until there is space.
+        """
+        while True:
+            generation = self.__async_notifier.get_generation()
+            try:
+                self.__wrapper.queue.put_nowait(item)  # type: ignore
+                return
+            except queue.Full:
+                pass
+
+            await self.__async_notifier.wait(generation)
+
+    def __aiter__(self) -> "AsyncQueue":
+        return self
+
+    async def __anext__(self) -> object:
+        item = await self.get()
+        if item is None:
+            raise StopAsyncIteration
+
+        return item
@@ -0,0 +1,178 @@
+"""
+Queue with bulk operations for the manager server process.
+"""
+
+import multiprocessing.managers
+import queue
+import threading
+import time
+
+
+class BatchQueue(queue.Queue):
+    """
+    `queue.Queue` which can move many items per call, and be closed.
+
+    Hosted by BatchQueueManager so that a batch costs one round trip to the manager.
+    Once closed, gets return sentinel (None) and puts are dropped, without waiting.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        """
+        maxsize: Maximum number of items, `maxsize <= 0` means infinite size.
+        """
+        super().__init__(maxsize)
+        self.__is_closed = False
+
+    @staticmethod
+    def __wait(
+        condition: threading.Condition,
+        is_ready: "(...) -> bool",  # type: ignore
+        block: bool,
+        endtime: "float | None",
+    ) -> bool:
+        """
+        Waits on the condition until ready. Caller holds the condition.
+
+        Returns False if not ready in time.
+        """
+        while not is_ready():
+            if not block:
+                return False
+
+            if endtime is None:
+                condition.wait()
+                continue
+
+            remaining = endtime - time.monotonic()
+            if remaining <= 0.0:
+                return False
+
+            condition.wait(remaining)
+
+        return True
+
+    def __has_space(self) -> bool:
+        """
+        Whether a put can proceed. Caller holds the mutex.
+        """
+        return self.__is_closed or not 0 < self.maxsize <= self._qsize()
+
+    def __has_item(self) -> bool:
+        """
+        Whether a get can proceed. Caller holds the mutex.
+        """
+        return self.__is_closed or self._qsize() > 0
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue.
+
+        Raises queue.Full if no slot became free in time.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        with self.not_full:
+            if not self.__wait(self.not_full, self.__has_space, block, endtime):
+                raise queue.Full
+
+            if self.__is_closed:
+                return
+
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue.
+
+        Raises queue.Empty if no item became available in time.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        with self.not_empty:
+            if not self.__wait(self.not_empty, self.__has_item, block, endtime):
+                raise queue.Empty
+
+            if self.__is_closed:
+                return None
+
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts items into the queue in order, waiting for free slots as required.
+
+        Returns the number of items put, which is less than the number of items
+        only if the queue stayed full past the timeout (or immediately if not blocking).
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        count = 0
+        with self.not_full:
+            for item in items:
+                if not self.__wait(self.not_full, self.__has_space, block, endtime):
+                    return count
+
+                if self.__is_closed:
+                    return count
+
+                self._put(item)
+                self.unfinished_tasks += 1
+                count += 1
+                self.not_empty.notify()
+
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Waits for at least 1 item and then removes up to max_items available items in order.
+
+        Returns the items, which is empty if nothing arrived before the timeout.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        with self.not_empty:
+            if not self.__wait(self.not_empty, self.__has_item, block, endtime):
+                return []
+
+            if self.__is_closed:
+                return [None]
+
+            items = []
+            while self._qsize() and len(items) < max_items:
+                items.append(self._get())
+
+            self.not_full.notify(len(items))
+            return items
+
+    def close(self) -> None:
+        """
+        Wakes every waiting producer and consumer, and makes later calls return immediately.
+        """
+        with self.mutex:
+            self.__is_closed = True
+            self.not_full.notify_all()
+            self.not_empty.notify_all()
+
+
+class BatchQueueManager(multiprocessing.managers.SyncManager):
+    """
+    SyncManager which can also host BatchQueue .
+    """
+
+
+BatchQueueManager.register("BatchQueue", BatchQueue)
+
+
+def create_manager() -> BatchQueueManager:
+    """
+    Starts a manager, use instead of `mp.Manager()` to enable bulk queue operations.
+    """
+    mp_manager = BatchQueueManager()
+    # Shut down by the caller or when garbage collected, like `mp.Manager()`
+    # pylint: disable-next=consider-using-with
+    mp_manager.start()
+    return mp_manager
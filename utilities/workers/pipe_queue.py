@@ -0,0 +1,144 @@
+"""
+Single producer, single consumer queue over a pipe.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import queue
+import time
+
+
+class PipeQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Interprocess queue over `mp.Pipe` , for an edge with 1 producer and 1 consumer.
+
+    A put or get is a single write or read on the pipe, with no manager process
+    and no feeder thread in between. A semaphore bounds the items in flight.
+    Has the same interface and exceptions as `queue.Queue` .
+
+    The ends are locked only so that main can still fill and drain the queue on shutdown,
+    in normal use neither lock is contended.
+    Once closed, gets return sentinel (None) and puts are dropped, without waiting.
+
+    Must be passed to workers as a process argument, like `mp.Queue` .
+    """
+
+    # A pipe cannot be unbounded either, so infinite size is approximated
+    DEFAULT_CAPACITY = 1024  # items
+
+    def __init__(self, maxsize: int = 0) -> None:
+        """
+        maxsize: Maximum number of items, `maxsize <= 0` uses the default capacity.
+
+        Items are pickled into the OS pipe buffer (64 KiB on Linux),
+        so many large items in flight can make a put wait for the consumer.
+        """
+        self.__capacity = maxsize if maxsize > 0 else self.DEFAULT_CAPACITY
+        self.__reader, self.__writer = mp.Pipe(duplex=False)
+        self.__read_lock = mp.Lock()
+        self.__write_lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(self.__capacity)
+        # Semaphore.get_value() is not implemented on macOS, so the items are also counted
+        self.__count = mp.Value("i", 0)
+        self.__closed = mp.RawValue("B", 0)
+        # Readable once closed, wakes every consumer waiting on the pipe
+        self.__wake_reader, self.__wake_writer = mp.Pipe(duplex=False)
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue.
+
+        Raises queue.Full if no slot became free in time.
+        """
+        if self.__closed.value:
+            return
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        if self.__closed.value:
+            # Pass the wakeup on to the next waiting producer
+            self.__free_slots.release()
+            return
+
+        with self.__write_lock:
+            self.__writer.send(item)
+            with self.__count.get_lock():
+                self.__count.value += 1
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue.
+
+        Raises queue.Empty if no item became available in time.
+        """
+        if self.__closed.value:
+            return None
+
+        endtime = None if timeout is None else time.monotonic() + timeout
+        if not self.__read_lock.acquire(block, timeout):
+            raise queue.Empty
+
+        try:
+            if not block:
+                remaining = 0.0
+            elif endtime is None:
+                remaining = None
+            else:
+                remaining = max(0.0, endtime - time.monotonic())
+
+            ready = multiprocessing.connection.wait([self.__reader, self.__wake_reader], remaining)
+            if self.__closed.value:
+                return None
+
+            if not ready:
+                raise queue.Empty
+
+            item = self.__reader.recv()
+            with self.__count.get_lock():
+                self.__count.value -= 1
+        finally:
+            self.__read_lock.release()
+
+        self.__free_slots.release()
+
+        return item
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def close(self) -> None:
+        """
+        Wakes every waiting producer and consumer, and makes later calls return immediately.
+        """
+        self.__closed.value = 1
+        self.__wake_writer.send_bytes(b"")
+        # Each woken producer passes the wakeup on to the next
+        self.__free_slots.release()
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        return self.__count.value
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.qsize() >= self.__capacity
@@ -0,0 +1,274 @@
+"""
+Queue with an urgent lane which is always dequeued first.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+from utilities.workers import queue_layer
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_statistics
+
+
+class TwoLevelQueue:
+    """
+    Queue over an urgent lane and a normal lane.
+    A get returns urgent items before any normal item, each lane is in order.
+
+    Has the same interface and exceptions as `queue.Queue` , puts go to the normal lane.
+    """
+
+    def __init__(self, urgent_lane: object, normal_lane: object) -> None:
+        """
+        urgent_lane: Queue for urgent items.
+        normal_lane: Queue for everything else.
+        """
+        self.__urgent_lane = urgent_lane
+        self.__normal_lane = normal_lane
+        # Released after every put, so there is at least 1 item per token
+        # Items dropped by an overflow policy leave extra tokens, which consumers skip
+        self.__available = mp.Semaphore(0)
+        self.__closed = mp.RawValue("B", 0)
+
+    def __put_lane(self, lane: object, item: object, block: bool, timeout: "float | None") -> None:
+        """
+        Puts the item in the lane and wakes a consumer.
+        """
+        lane.put(item, block, timeout)  # type: ignore
+        self.__available.release()
+
+    def __take(self) -> "tuple[bool, object]":
+        """
+        Takes an item, urgent first, without waiting.
+
+        Returns False if both lanes are empty.
+        """
+        for lane in (self.__urgent_lane, self.__normal_lane):
+            try:
+                return True, lane.get_nowait()  # type: ignore
+            except queue.Empty:
+                pass
+
+        return False, None
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item in the normal lane.
+        """
+        self.__put_lane(self.__normal_lane, item, block, timeout)
+
+    def put_urgent(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item in the urgent lane.
+        """
+        self.__put_lane(self.__urgent_lane, item, block, timeout)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an urgent item if any, otherwise a normal item.
+
+        Raises queue.Empty if no item became available in time.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if endtime is None else max(0.0, endtime - time.monotonic())
+            if not self.__available.acquire(block, remaining):
+                # An item whose token is not released yet can still be taken,
+                # its token is then skipped like one of a dropped item
+                result, item = self.__take()
+                if result:
+                    return item
+
+                raise queue.Empty
+
+            if self.__closed.value:
+                # Pass the wakeup on to the next waiting consumer
+                self.__available.release()
+                return None
+
+            result, item = self.__take()
+            if result:
+                return item
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts items in the normal lane in order.
+        """
+        count = queue_layer.put_many(self.__normal_lane, items, block, timeout)
+        for _ in range(count):
+            self.__available.release()
+
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Waits for at least 1 item and then removes up to max_items available items,
+        urgent first.
+        """
+        items = []
+        try:
+            items.append(self.get(block, timeout))
+            # Sentinel ends the batch, a closed queue would return it forever
+            while len(items) < max_items and items[-1] is not None:
+                items.append(self.get(False))
+        except queue.Empty:
+            pass
+
+        return items
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def close(self) -> None:
+        """
+        Wakes every waiting consumer, after the lanes have been closed.
+        """
+        self.__closed.value = 1
+        self.__available.release()
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in both lanes.
+        """
+        return self.__urgent_lane.qsize() + self.__normal_lane.qsize()  # type: ignore
+
+    def empty(self) -> bool:
+        """
+        Returns whether both lanes are approximately empty.
+        """
+        return self.__urgent_lane.empty() and self.__normal_lane.empty()  # type: ignore
+
+    def full(self) -> bool:
+        """
+        Returns whether the normal lane is approximately full.
+        """
+        return self.__normal_lane.full()  # type: ignore
+
+
+class PriorityQueueWrapper:
+    """
+    Two level priority channel, a drop-in for QueueProxyWrapper .
+
+    Urgent items (link loss, command failure) always dequeue before normal traffic,
+    so their latency stays bounded even when the normal lane is saturated.
+    """
+
+    __QUEUE_TIMEOUT = 0.1  # seconds
+    __QUEUE_DELAY = 0.1  # seconds
+
+    def __init__(
+        self,
+        urgent_lane: queue_proxy_wrapper.QueueProxyWrapper,
+        normal_lane: queue_proxy_wrapper.QueueProxyWrapper,
+    ) -> None:
+        """
+        urgent_lane: Queue for urgent items, should be small and rarely used.
+        normal_lane: Queue for everything else, its options (backend, policy...) apply.
+
+        For wait_any() , both lanes must be created with the same notifier.
+        """
+        self.urgent_lane = urgent_lane
+        self.normal_lane = normal_lane
+        self.notifier = normal_lane.notifier
+        self.queue = TwoLevelQueue(urgent_lane.queue, normal_lane.queue)
+        self.maxsize = normal_lane.maxsize
+        self.backend = normal_lane.backend
+
+    def put_urgent(self, item: object) -> None:
+        """
+        Puts an item ahead of all normal traffic.
+        """
+        self.queue.put_urgent(item)
+
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
+        """
+        Puts items into the normal lane in order, see QueueProxyWrapper.put_many() .
+        """
+        return self.queue.put_many(items, True, timeout)
+
+    def get_many(self, max_items: int, timeout: "float | None" = None) -> "list[object]":
+        """
+        Gets up to max_items items, urgent first, see QueueProxyWrapper.get_many() .
+        """
+        return self.queue.get_many(max_items, True, timeout)
+
+    def get_superseded_count(self) -> int:
+        """
+        Returns the number of normal items overwritten, see QueueProxyWrapper .
+        """
+        return self.normal_lane.get_superseded_count()
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of normal items dropped on overflow, see QueueProxyWrapper .
+        """
+        return self.normal_lane.get_dropped_count()
+
+    def get_statistics(
+        self, is_interval_reset: bool = True
+    ) -> "tuple[bool, queue_statistics.QueueStatisticsSnapshot | None]":
+        """
+        Statistics of the normal lane, see QueueProxyWrapper.get_statistics() .
+        """
+        return self.normal_lane.get_statistics(is_interval_reset)
+
+    def close(self) -> None:
+        """
+        Closes both lanes and wakes every waiting producer and consumer,
+        see QueueProxyWrapper.close() .
+        """
+        self.urgent_lane.close()
+        self.normal_lane.close()
+        self.queue.close()
+
+    def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
+        """
+        Fills the normal lane with sentinel (None), waking every blocked consumer.
+
+        timeout: Time waiting before giving up, must be greater than 0 .
+        """
+        if timeout <= 0.0:
+            timeout = self.__QUEUE_TIMEOUT
+
+        try:
+            for _ in range(self.maxsize):
+                self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+
+    def drain_queue(self, timeout: float = 0.0) -> None:
+        """
+        Drains both lanes.
+
+        timeout: Time waiting in seconds before giving up, must be greater than 0 .
+        """
+        if timeout <= 0.0:
+            timeout = self.__QUEUE_TIMEOUT
+
+        try:
+            for _ in range(self.maxsize + self.urgent_lane.maxsize):
+                self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+
+    def fill_and_drain_queue(self) -> None:
+        """
+        Fill with sentinel and then drain.
+        """
+        self.fill_queue_with_sentinel()
+        time.sleep(self.__QUEUE_DELAY)
+        self.drain_queue()
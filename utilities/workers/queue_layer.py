@@ -0,0 +1,154 @@
+"""
+Base for queues which add behaviour on top of another queue.
+"""
+
+import queue
+
+
+def put_many(
+    target_queue: object, items: "list[object]", block: bool = True, timeout: "float | None" = None
+) -> int:
+    """
+    Puts items into the queue in order, with its bulk operation if it has one
+    and otherwise 1 put per item.
+
+    Returns the number of items put, which is less than the number of items only on timeout.
+    """
+    if hasattr(target_queue, "put_many"):
+        return target_queue.put_many(items, block, timeout)  # type: ignore
+
+    count = 0
+    try:
+        for item in items:
+            target_queue.put(item, block, timeout)  # type: ignore
+            count += 1
+    except queue.Full:
+        pass
+
+    return count
+
+
+def get_many(
+    target_queue: object, max_items: int, block: bool = True, timeout: "float | None" = None
+) -> "list[object]":
+    """
+    Waits for at least 1 item and then gets up to max_items available items in order,
+    with its bulk operation if it has one and otherwise 1 get per item.
+
+    Returns the items, which is empty if nothing arrived before the timeout.
+    """
+    if max_items <= 0:
+        return []
+
+    if hasattr(target_queue, "get_many"):
+        return target_queue.get_many(max_items, block, timeout)  # type: ignore
+
+    items = []
+    try:
+        items.append(target_queue.get(block, timeout))  # type: ignore
+        # Sentinel ends the batch, a closed queue would return it forever
+        while len(items) < max_items and items[-1] is not None:
+            items.append(target_queue.get_nowait())  # type: ignore
+    except queue.Empty:
+        pass
+
+    return items
+
+
+def evict_nowait(target_queue: object) -> object:
+    """
+    Removes the oldest item without waiting, for an overflow policy making room,
+    with the evict operation of the queue if it has one and otherwise a get.
+    Layers which count consumed items count an evicted item apart.
+
+    Raises queue.Empty if there is no item.
+    """
+    if hasattr(target_queue, "evict_nowait"):
+        return target_queue.evict_nowait()  # type: ignore
+
+    return target_queue.get_nowait()  # type: ignore
+
+
+class QueueLayer:
+    """
+    Passes every queue operation through to the inner queue.
+    Subclasses override the operations they change.
+
+    Has the same interface and exceptions as `queue.Queue` , plus bulk operations.
+    """
+
+    def __init__(self, inner: object) -> None:
+        """
+        inner: Queue being wrapped, a proxy, SharedMemoryQueue or another layer.
+        """
+        self._inner = inner
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue.
+        """
+        self._inner.put(item, block, timeout)  # type: ignore
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue.
+        """
+        return self._inner.get(block, timeout)  # type: ignore
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts items into the queue in order.
+        """
+        return put_many(self._inner, items, block, timeout)
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Removes up to max_items items from the queue in order.
+        """
+        return get_many(self._inner, max_items, block, timeout)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def evict_nowait(self) -> object:
+        """
+        Removes the oldest item without waiting, see evict_nowait() .
+        """
+        return evict_nowait(self._inner)
+
+    def close(self) -> None:
+        """
+        Wakes every waiting producer and consumer, see QueueProxyWrapper.close() .
+        """
+        self._inner.close()  # type: ignore
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        return self._inner.qsize()  # type: ignore
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self._inner.empty()  # type: ignore
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self._inner.full()  # type: ignore
@@ -0,0 +1,145 @@
+"""
+What a put does when a bounded queue is full.
+"""
+
+import enum
+import multiprocessing as mp
+import queue
+
+from utilities.workers import queue_layer
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    Behaviour of a put on a full queue.
+    """
+
+    # Wait for a free slot, as long as the caller asks to
+    BLOCK = 0
+    # Wait for a free slot up to the policy timeout, then drop the item
+    BLOCK_WITH_TIMEOUT = 1
+    # Drop the item being put
+    DROP_NEWEST = 2
+    # Evict the oldest item to make room
+    DROP_OLDEST = 3
+    # Keep only every Nth item put while full (evicting the oldest), drop the rest
+    KEEP_EVERY_NTH = 4
+
+
+class OverflowQueue(queue_layer.QueueLayer):
+    """
+    Applies an overflow policy to puts and counts the items dropped.
+
+    Puts never raise queue.Full and never wait longer than the policy allows,
+    so a producer does not stall behind a slow consumer.
+    """
+
+    # Attempts at evicting before giving up and dropping the item being put instead
+    __EVICT_ATTEMPTS = 8
+
+    def __init__(
+        self, inner: object, policy: OverflowPolicy, timeout_s: float, sample_every: int
+    ) -> None:
+        """
+        inner: Queue being limited.
+        policy: Behaviour on a full queue, must not be BLOCK .
+        timeout_s: Longest wait for a free slot for BLOCK_WITH_TIMEOUT .
+        sample_every: N for KEEP_EVERY_NTH .
+        """
+        super().__init__(inner)
+        self.__policy = policy
+        self.__timeout_s = timeout_s
+        self.__sample_every = max(1, sample_every)
+        self.__dropped_count = mp.Value("Q", 0)
+
+        # Items put while full by this producer process, for sampling
+        self.__full_put_count = 0
+
+    def __drop(self) -> None:
+        """
+        Counts a dropped item.
+        """
+        with self.__dropped_count.get_lock():
+            self.__dropped_count.value += 1
+
+    def __put_evicting(self, item: object) -> bool:
+        """
+        Puts the item, evicting the oldest items to make room.
+
+        Returns whether the item was put.
+        """
+        for _ in range(self.__EVICT_ATTEMPTS):
+            try:
+                self._inner.put_nowait(item)  # type: ignore
+                return True
+            except queue.Full:
+                pass
+
+            try:
+                # Not a get, so statistics do not count it as consumed
+                queue_layer.evict_nowait(self._inner)
+                self.__drop()
+            except queue.Empty:
+                # A consumer made room in the meantime
+                pass
+
+        # Other producers keep filling the queue
+        self.__drop()
+        return False
+
+    def __put(self, item: object, block: bool, timeout: "float | None") -> bool:
+        """
+        Puts an item, applying the policy if the queue is full.
+
+        Returns whether the item was put.
+        """
+        try:
+            self._inner.put_nowait(item)  # type: ignore
+            self.__full_put_count = 0
+            return True
+        except queue.Full:
+            pass
+
+        if self.__policy == OverflowPolicy.BLOCK_WITH_TIMEOUT and block:
+            if timeout is None or timeout > self.__timeout_s:
+                timeout = self.__timeout_s
+
+            try:
+                self._inner.put(item, True, timeout)  # type: ignore
+                return True
+            except queue.Full:
+                self.__drop()
+                return False
+
+        if self.__policy == OverflowPolicy.DROP_OLDEST:
+            return self.__put_evicting(item)
+
+        if self.__policy == OverflowPolicy.KEEP_EVERY_NTH:
+            self.__full_put_count += 1
+            if self.__full_put_count % self.__sample_every == 0:
+                return self.__put_evicting(item)
+
+        self.__drop()
+        return False
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item, applying the policy if the queue is full.
+        """
+        self.__put(item, block, timeout)
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts the items in order, applying the policy to each.
+
+        Returns the number of items not dropped.
+        """
+        return sum(1 for item in items if self.__put(item, block, timeout))
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped or evicted by the policy, across all producers.
+        """
+        return self.__dropped_count.value
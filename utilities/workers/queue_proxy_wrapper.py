@@ -2,24 +2,196 @@
 Queue.
 """
 
+import enum
 import multiprocessing.managers
 import queue
 import time
 
+from utilities.workers import batch_queue
+from utilities.workers import pipe_queue
+from utilities.workers import queue_layer
+from utilities.workers import queue_overflow
+from utilities.workers import queue_selector
+from utilities.workers import queue_statistics
+from utilities.workers import shared_memory_queue
 
-class QueueProxyWrapper:
+
+class QueueBackend(enum.Enum):
+    """
+    Underlying queue implementation.
+    """
+
+    # Queue hosted by the SyncManager server process
+    MANAGER = 0
+    # Fixed-slot ring buffer in shared memory, see SharedMemoryQueue
+    SHARED_MEMORY = 1
+    # Single shared memory slot which each put overwrites, consumers only see the newest item
+    LATEST_VALUE = 2
+    # OS pipe for 1 producer and 1 consumer, see PipeQueue and WorkerProperties.create()
+    PIPE = 3
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+    The latest value backend always has `maxsize` 1 .
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = shared_memory_queue.SharedMemoryQueue.DEFAULT_SLOT_SIZE,
+        enable_statistics: bool = False,
+        overflow_policy: queue_overflow.OverflowPolicy = queue_overflow.OverflowPolicy.BLOCK,
+        overflow_timeout_s: float = 0.0,
+        overflow_sample_every: int = 1,
+        notifier: queue_selector.QueueNotifier | None = None,
+    ) -> None:
+        """
+        mp_manager: Manager hosting the queue, only used by the manager backend.
+        maxsize: Maximum number of items, ignored by the latest value backend.
+        backend: Underlying queue implementation.
+        slot_size: Largest pickled item in bytes, only used by the shared memory backends.
+        enable_statistics: Whether to record occupancy and wait times, see get_statistics() .
+        overflow_policy: What a put does when the queue is full, see get_dropped_count() .
+        overflow_timeout_s: Longest wait for a free slot with the block with timeout policy.
+        overflow_sample_every: N with the keep every Nth policy.
+        notifier: Signalled on every put and get, so that wait_any() can watch this queue.
+        """
+        if backend == QueueBackend.LATEST_VALUE:
+            maxsize = 1
+            backend_queue = shared_memory_queue.SharedMemoryQueue(maxsize, slot_size, True)
+        elif backend == QueueBackend.PIPE:
+            backend_queue = pipe_queue.PipeQueue(maxsize)
+        elif backend == QueueBackend.SHARED_MEMORY:
+            backend_queue = shared_memory_queue.SharedMemoryQueue(maxsize, slot_size)
+        else:
+            # Get Pylance to stop complaining
+            assert mp_manager is not None
+
+            # Bulk operations need the queue hosted by a BatchQueueManager
+            if isinstance(mp_manager, batch_queue.BatchQueueManager):
+                backend_queue = mp_manager.BatchQueue(maxsize)  # type: ignore
+            else:
+                backend_queue = mp_manager.Queue(maxsize)
+
+        self.__backend_queue = backend_queue
+        # Only the stock manager queue cannot be closed
+        self.__is_closable = backend != QueueBackend.MANAGER or isinstance(
+            mp_manager, batch_queue.BatchQueueManager
+        )
+
+        # Disabled features add no layer, so they cost nothing
+        self.queue = backend_queue
+        self.__statistics = None
+        if enable_statistics:
+            self.__statistics = queue_statistics.QueueStatistics(maxsize)
+            self.queue = queue_statistics.InstrumentedQueue(self.queue, self.__statistics)
+
+        # Outside statistics, so that items dropped before they are put are not counted,
+        # and items evicted to make room are counted as evicted instead of gotten
+        self.__overflow_queue = None
+        if overflow_policy != queue_overflow.OverflowPolicy.BLOCK:
+            self.__overflow_queue = queue_overflow.OverflowQueue(
+                self.queue, overflow_policy, overflow_timeout_s, overflow_sample_every
+            )
+            self.queue = self.__overflow_queue
+
+        self.notifier = notifier
+        if notifier is not None:
+            self.queue = queue_selector.NotifyingQueue(self.queue, notifier)
+
         self.maxsize = maxsize
+        self.backend = backend
+
+    def put_urgent(self, item: object) -> None:
+        """
+        Puts an item. There is only 1 lane, so this is a normal put,
+        see PriorityQueueWrapper for a queue where urgent items go first.
+        """
+        self.queue.put(item)
+
+    def put_many(self, items: "list[object]", timeout: "float | None" = None) -> int:
+        """
+        Puts items into the queue in order with as few interprocess calls as possible.
+        Falls back to 1 put per item if the queue has no bulk operations.
+
+        items: Items to put.
+        timeout: Time waiting in seconds for free slots before giving up, None waits forever.
+
+        Returns the number of items put, which is less than the number of items only on timeout.
+        """
+        return queue_layer.put_many(self.queue, items, True, timeout)
+
+    def get_many(self, max_items: int, timeout: "float | None" = None) -> "list[object]":
+        """
+        Waits for at least 1 item and then gets up to max_items available items in order,
+        with as few interprocess calls as possible.
+        Falls back to 1 get per item if the queue has no bulk operations.
+
+        max_items: Maximum number of items to get.
+        timeout: Time waiting in seconds for the first item before giving up, None waits forever.
+
+        Returns the items, which is empty if nothing arrived before the timeout.
+        """
+        return queue_layer.get_many(self.queue, max_items, True, timeout)
+
+    def get_superseded_count(self) -> int:
+        """
+        Returns the number of items overwritten before any consumer got them.
+        Always 0 except for the latest value backend.
+        """
+        if self.backend == QueueBackend.LATEST_VALUE:
+            return self.__backend_queue.get_overwritten_count()  # type: ignore
+
+        return 0
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped or evicted by the overflow policy.
+        Always 0 with the block policy.
+        """
+        if self.__overflow_queue is None:
+            return 0
+
+        return self.__overflow_queue.get_dropped_count()
+
+    def get_statistics(
+        self, is_interval_reset: bool = True
+    ) -> "tuple[bool, queue_statistics.QueueStatisticsSnapshot | None]":
+        """
+        Snapshot of occupancy, wait and blocked times, and throughput since the previous call.
+        Meant to be polled by the process which created the queue.
+        Items superseded in the latest value backend are counted as evicted.
+
+        is_interval_reset: False for a call which the next throughput should not start from.
+
+        Returns False if statistics are not enabled.
+        """
+        if self.__statistics is None:
+            return False, None
+
+        return True, self.__statistics.snapshot(is_interval_reset, self.get_superseded_count())
+
+    def close(self) -> None:
+        """
+        Shuts the queue down for exit: every waiting producer and consumer wakes immediately,
+        later gets return sentinel (None) and later puts are dropped.
+
+        Queues of a stock manager cannot be closed, so they are filled and drained instead.
+        """
+        if not self.__is_closable:
+            self.fill_and_drain_queue()
+            return
+
+        self.queue.close()
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -0,0 +1,167 @@
+"""
+Waiting on several queues at once.
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import queue_layer
+
+
+class QueueNotifier:
+    """
+    Wakes waiters whenever an item is put in or taken from any queue sharing the notifier.
+
+    Takes no lock, since a worker killed while holding one, like the watchdog does,
+    would block every later put and wait.
+    """
+
+    # Longest a waiter sleeps before checking again, in case another waiter took its wakeup
+    __WAIT_POLL_PERIOD_S = 0.05
+
+    def __init__(self) -> None:
+        # Incremented on every put and get, so a waiter never misses one.
+        # Concurrent increments can count once, which still changes it for every waiter
+        self.__generation = mp.Value("Q", 0, lock=False)
+        # Set on every change, the waiter which takes it passes it on
+        self.__wakeup = mp.BoundedSemaphore(1)
+
+    def notify(self) -> None:
+        """
+        Signals that an item was put or taken.
+        """
+        self.__generation.value += 1
+        self.__set_wakeup()
+
+    def get_generation(self) -> int:
+        """
+        Current generation, read before checking the queues.
+        """
+        return self.__generation.value
+
+    def wait(self, generation: int, timeout: "float | None") -> bool:
+        """
+        Waits until a put or get happens after the generation was read.
+
+        Returns False on timeout.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        while self.__generation.value == generation:
+            wait_s = self.__WAIT_POLL_PERIOD_S
+            if endtime is not None:
+                remaining = endtime - time.monotonic()
+                if remaining <= 0.0:
+                    return False
+
+                wait_s = min(wait_s, remaining)
+
+            # A wakeup of a change already seen is dropped
+            self.__wakeup.acquire(timeout=wait_s)
+
+        # Wake any other waiter of this change
+        self.__set_wakeup()
+        return True
+
+    def __set_wakeup(self) -> None:
+        """
+        Wakes a waiter, if not already set.
+        """
+        try:
+            self.__wakeup.release()
+        except ValueError:
+            pass
+
+
+class NotifyingQueue(queue_layer.QueueLayer):
+    """
+    Notifies after every put, for consumers, and every get, for producers waiting for space.
+    """
+
+    def __init__(self, inner: object, notifier: QueueNotifier) -> None:
+        """
+        inner: Queue being watched.
+        notifier: Signalled after each put and get.
+        """
+        super().__init__(inner)
+        self.__notifier = notifier
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item and notifies.
+        """
+        self._inner.put(item, block, timeout)  # type: ignore
+        self.__notifier.notify()
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts items and notifies once.
+        """
+        count = queue_layer.put_many(self._inner, items, block, timeout)
+        if count > 0:
+            self.__notifier.notify()
+
+        return count
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Gets an item and notifies.
+        """
+        item = self._inner.get(block, timeout)  # type: ignore
+        self.__notifier.notify()
+        return item
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Gets items and notifies once.
+        """
+        items = queue_layer.get_many(self._inner, max_items, block, timeout)
+        if len(items) > 0:
+            self.__notifier.notify()
+
+        return items
+
+    def close(self) -> None:
+        """
+        Closes the queue and notifies, so that wait_any() wakes.
+        """
+        self._inner.close()  # type: ignore
+        self.__notifier.notify()
+
+
+def wait_any(queues: "list[object]", timeout: "float | None") -> "tuple[bool, object | None]":
+    """
+    Waits until any of the queues has an item, checked in order.
+    The queues must have been created with the same notifier.
+
+    queues: Queue wrappers, QueueProxyWrapper or PriorityQueueWrapper .
+    timeout: Time waiting in seconds before giving up, None waits forever.
+
+    Returns the first queue with an item, or False on timeout.
+    """
+    if len(queues) == 0:
+        return False, None
+
+    notifier = queues[0].notifier  # type: ignore
+    for wrapper in queues:
+        if wrapper.notifier is None or wrapper.notifier is not notifier:  # type: ignore
+            raise ValueError("Queues must share a notifier")
+
+    endtime = None if timeout is None else time.monotonic() + timeout
+    while True:
+        # Read before checking, so a put after the check still wakes the wait
+        generation = notifier.get_generation()
+        for wrapper in queues:
+            if not wrapper.queue.empty():  # type: ignore
+                return True, wrapper
+
+        remaining = None
+        if endtime is not None:
+            remaining = endtime - time.monotonic()
+            if remaining <= 0.0:
+                return False, None
+
+        notifier.wait(generation, remaining)
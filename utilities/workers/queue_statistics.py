@@ -0,0 +1,303 @@
+"""
+Queue occupancy and wait time instrumentation.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+from utilities.workers import queue_layer
+
+
+class QueueStatisticsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Statistics of a queue at one point in time.
+    """
+
+    def __init__(
+        self,
+        put_count: int,
+        get_count: int,
+        evicted_count: int,
+        high_water_mark: int,
+        put_blocked_total_s: float,
+        put_blocked_max_s: float,
+        get_blocked_total_s: float,
+        get_blocked_max_s: float,
+        wait_total_s: float,
+        wait_max_s: float,
+        wait_histogram: "list[tuple[float, int]]",
+        put_rate_per_s: float,
+        get_rate_per_s: float,
+    ) -> None:
+        """
+        put_count, get_count: Items put and gotten since the queue was created.
+        evicted_count: Items removed by an overflow policy or overwritten by the backend
+            instead of gotten by a consumer, not in get_count .
+        high_water_mark: Largest number of items in the queue at once.
+        put_blocked_total_s, put_blocked_max_s: Time producers spent in put.
+        get_blocked_total_s, get_blocked_max_s: Time consumers spent in get.
+        wait_total_s, wait_max_s: Time items spent in the queue.
+        wait_histogram: Pairs of bucket upper bound in seconds and count of items.
+        put_rate_per_s, get_rate_per_s: Throughput since the previous snapshot.
+        """
+        self.put_count = put_count
+        self.get_count = get_count
+        self.evicted_count = evicted_count
+        self.high_water_mark = high_water_mark
+        self.put_blocked_total_s = put_blocked_total_s
+        self.put_blocked_max_s = put_blocked_max_s
+        self.get_blocked_total_s = get_blocked_total_s
+        self.get_blocked_max_s = get_blocked_max_s
+        self.wait_total_s = wait_total_s
+        self.wait_max_s = wait_max_s
+        self.wait_histogram = wait_histogram
+        self.put_rate_per_s = put_rate_per_s
+        self.get_rate_per_s = get_rate_per_s
+
+    def get_mean_wait_s(self) -> float:
+        """
+        Returns the mean time items spent in the queue.
+        """
+        if self.get_count == 0:
+            return 0.0
+
+        return self.wait_total_s / self.get_count
+
+    def __str__(self) -> str:
+        histogram = ", ".join(
+            f"<={upper_bound_s:g}s: {count}" for upper_bound_s, count in self.wait_histogram
+        )
+        return (
+            f"put: {self.put_count} ({self.put_rate_per_s:.1f}/s), "
+            f"get: {self.get_count} ({self.get_rate_per_s:.1f}/s), "
+            f"evicted: {self.evicted_count}, "
+            f"high water: {self.high_water_mark}, "
+            f"put blocked: {self.put_blocked_total_s:.3f}s (max {self.put_blocked_max_s:.3f}s), "
+            f"get blocked: {self.get_blocked_total_s:.3f}s (max {self.get_blocked_max_s:.3f}s), "
+            f"wait: mean {self.get_mean_wait_s():.4f}s (max {self.wait_max_s:.4f}s), "
+            f"wait histogram: [{histogram}]"
+        )
+
+
+class QueueStatistics:
+    """
+    Counters shared by every process using the queue.
+    """
+
+    # Upper bounds of the wait time histogram buckets, the last bucket is unbounded
+    WAIT_BUCKETS_S = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, float("inf"))
+
+    # Indices into the shared counters
+    __PUT_COUNT = 0
+    __GET_COUNT = 1
+    __HIGH_WATER_MARK = 2
+    __PUT_BLOCKED_TOTAL = 3
+    __PUT_BLOCKED_MAX = 4
+    __GET_BLOCKED_TOTAL = 5
+    __GET_BLOCKED_MAX = 6
+    __WAIT_TOTAL = 7
+    __WAIT_MAX = 8
+    __EVICTED_COUNT = 9
+    __HISTOGRAM_START = 10
+
+    def __init__(self, maxsize: int) -> None:
+        """
+        maxsize: Maximum number of items in the queue, `maxsize <= 0` means infinite size.
+        """
+        self.__maxsize = maxsize
+        # Integer counts are stored exactly as doubles up to 2^53
+        self.__counters = mp.Array("d", self.__HISTOGRAM_START + len(self.WAIT_BUCKETS_S))
+
+        # Only used by the polling process
+        self.__previous_time = time.monotonic()
+        self.__previous_put_count = 0
+        self.__previous_get_count = 0
+
+    def record_put(self, count: int, blocked_s: float) -> None:
+        """
+        Records items entering the queue.
+
+        count: Number of items put.
+        blocked_s: Time the producer spent putting.
+        """
+        counters = self.__counters
+        with counters.get_lock():
+            counters[self.__PUT_COUNT] += count
+            counters[self.__PUT_BLOCKED_TOTAL] += blocked_s
+            counters[self.__PUT_BLOCKED_MAX] = max(counters[self.__PUT_BLOCKED_MAX], blocked_s)
+
+            occupancy = (
+                counters[self.__PUT_COUNT]
+                - counters[self.__GET_COUNT]
+                - counters[self.__EVICTED_COUNT]
+            )
+            # Backends which overwrite never hold more than maxsize
+            if self.__maxsize > 0:
+                occupancy = min(occupancy, self.__maxsize)
+            counters[self.__HIGH_WATER_MARK] = max(counters[self.__HIGH_WATER_MARK], occupancy)
+
+    def record_get(self, waits_s: "list[float]", blocked_s: float) -> None:
+        """
+        Records items leaving the queue.
+
+        waits_s: Time each item spent in the queue.
+        blocked_s: Time the consumer spent getting.
+        """
+        counters = self.__counters
+        with counters.get_lock():
+            counters[self.__GET_COUNT] += len(waits_s)
+            counters[self.__GET_BLOCKED_TOTAL] += blocked_s
+            counters[self.__GET_BLOCKED_MAX] = max(counters[self.__GET_BLOCKED_MAX], blocked_s)
+
+            for wait_s in waits_s:
+                counters[self.__WAIT_TOTAL] += wait_s
+                counters[self.__WAIT_MAX] = max(counters[self.__WAIT_MAX], wait_s)
+                for i, upper_bound_s in enumerate(self.WAIT_BUCKETS_S):
+                    if wait_s <= upper_bound_s:
+                        counters[self.__HISTOGRAM_START + i] += 1
+                        break
+
+    def record_evict(self, count: int) -> None:
+        """
+        Records items removed to make room, which no consumer got, so they count towards
+        neither throughput nor wait time.
+
+        count: Number of items evicted.
+        """
+        with self.__counters.get_lock():
+            self.__counters[self.__EVICTED_COUNT] += count
+
+    def snapshot(
+        self, is_interval_reset: bool = True, superseded_count: int = 0
+    ) -> QueueStatisticsSnapshot:
+        """
+        Copies the counters. Rates are over the time since the previous snapshot.
+
+        is_interval_reset: Whether rates of the next snapshot start from this one,
+            False to poll without disturbing them.
+        superseded_count: Items the backend overwrote before any consumer got them,
+            counted as evicted since no put sees them go.
+        """
+        with self.__counters.get_lock():
+            counters = list(self.__counters)
+
+        now = time.monotonic()
+        elapsed_s = max(now - self.__previous_time, 1e-9)
+        put_count = int(counters[self.__PUT_COUNT])
+        get_count = int(counters[self.__GET_COUNT])
+        put_rate_per_s = (put_count - self.__previous_put_count) / elapsed_s
+        get_rate_per_s = (get_count - self.__previous_get_count) / elapsed_s
+
+        if is_interval_reset:
+            self.__previous_time = now
+            self.__previous_put_count = put_count
+            self.__previous_get_count = get_count
+
+        histogram = [
+            (upper_bound_s, int(counters[self.__HISTOGRAM_START + i]))
+            for i, upper_bound_s in enumerate(self.WAIT_BUCKETS_S)
+        ]
+
+        return QueueStatisticsSnapshot(
+            put_count,
+            get_count,
+            int(counters[self.__EVICTED_COUNT]) + superseded_count,
+            int(counters[self.__HIGH_WATER_MARK]),
+            counters[self.__PUT_BLOCKED_TOTAL],
+            counters[self.__PUT_BLOCKED_MAX],
+            counters[self.__GET_BLOCKED_TOTAL],
+            counters[self.__GET_BLOCKED_MAX],
+            counters[self.__WAIT_TOTAL],
+            counters[self.__WAIT_MAX],
+            histogram,
+            put_rate_per_s,
+            get_rate_per_s,
+        )
+
+
+class InstrumentedQueue(queue_layer.QueueLayer):
+    """
+    Timestamps items on enqueue and records statistics for every operation.
+    """
+
+    def __init__(self, inner: object, statistics: QueueStatistics) -> None:
+        """
+        inner: Queue being instrumented.
+        statistics: Where the measurements are recorded.
+        """
+        super().__init__(inner)
+        self.__statistics = statistics
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts the item with its enqueue time.
+        """
+        start = time.monotonic()
+        try:
+            self._inner.put((start, item), block, timeout)  # type: ignore
+        except queue.Full:
+            # Blocked time counts even if the put gave up
+            self.__statistics.record_put(0, time.monotonic() - start)
+            raise
+
+        self.__statistics.record_put(1, time.monotonic() - start)
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Gets an item and records how long it waited in the queue.
+        """
+        start = time.monotonic()
+        try:
+            envelope = self._inner.get(block, timeout)  # type: ignore
+        except queue.Empty:
+            # Blocked time counts even if the get gave up
+            self.__statistics.record_get([], time.monotonic() - start)
+            raise
+
+        # Closed queues return sentinel without an envelope
+        if envelope is None:
+            return None
+
+        enqueue_time, item = envelope
+        now = time.monotonic()
+        self.__statistics.record_get([now - enqueue_time], now - start)
+        return item
+
+    def evict_nowait(self) -> object:
+        """
+        Removes the oldest item without waiting, recorded as evicted instead of gotten.
+        """
+        envelope = self._inner.get_nowait()  # type: ignore
+        # Closed queues return sentinel without an envelope
+        if envelope is None:
+            return None
+
+        self.__statistics.record_evict(1)
+        return envelope[1]
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts the items with their enqueue time.
+        """
+        start = time.monotonic()
+        count = queue_layer.put_many(self._inner, [(start, item) for item in items], block, timeout)
+        self.__statistics.record_put(count, time.monotonic() - start)
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Gets items and records how long each waited in the queue.
+        """
+        start = time.monotonic()
+        envelopes = queue_layer.get_many(self._inner, max_items, block, timeout)
+        now = time.monotonic()
+        self.__statistics.record_get(
+            [now - envelope[0] for envelope in envelopes if envelope is not None], now - start
+        )
+        # Closed queues return sentinel without an envelope
+        return [None if envelope is None else envelope[1] for envelope in envelopes]
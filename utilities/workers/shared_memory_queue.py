@@ -0,0 +1,344 @@
+"""
+Fixed-slot ring buffer queue in shared memory.
+"""
+
+import multiprocessing as mp
+import pickle
+import queue
+import struct
+import time
+import weakref
+from multiprocessing import shared_memory
+
+
+class SharedMemoryQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Interprocess queue backed by `multiprocessing.shared_memory`.
+
+    Items are pickled into fixed size slots of a ring buffer, so a put or get
+    only costs a lock and a copy instead of a round trip to a manager process.
+    Has the same interface and exceptions as `queue.Queue` .
+
+    In overwrite mode a put on a full queue evicts the oldest item instead of blocking,
+    so consumers always read the newest items.
+
+    Once closed, gets return sentinel (None) and puts are dropped, without waiting.
+
+    Must be passed to workers as a process argument, like `mp.Queue` .
+    """
+
+    DEFAULT_SLOT_SIZE = 1024  # bytes
+    # A ring buffer cannot grow, so infinite size is approximated
+    DEFAULT_CAPACITY = 1024  # slots
+
+    # Header: head index, tail index, overwritten count
+    __INDEX_FORMAT = "=QQ"
+    __COUNT_FORMAT = "=Q"
+    __COUNT_OFFSET = struct.calcsize(__INDEX_FORMAT)
+    __HEADER_SIZE = __COUNT_OFFSET + struct.calcsize(__COUNT_FORMAT)
+    # Time an overwriting put waits for a consumer that holds the only item
+    __EVICT_RETRY_DELAY = 0.001  # seconds
+    # Slot: payload length followed by payload
+    __LENGTH_FORMAT = "=I"
+    __LENGTH_SIZE = struct.calcsize(__LENGTH_FORMAT)
+
+    def __init__(
+        self, maxsize: int = 0, slot_size: int = DEFAULT_SLOT_SIZE, overwrite: bool = False
+    ) -> None:
+        """
+        maxsize: Number of slots, `maxsize <= 0` uses the default capacity.
+        slot_size: Size of each slot in bytes, the largest pickled item allowed.
+        overwrite: Whether a put on a full queue evicts the oldest item.
+        """
+        self.__capacity = maxsize if maxsize > 0 else self.DEFAULT_CAPACITY
+        self.__slot_size = slot_size
+        self.__stride = self.__LENGTH_SIZE + slot_size
+        self.__overwrite = overwrite
+
+        self.__memory = shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + self.__capacity * self.__stride,
+        )
+        self.__memory.buf[: self.__HEADER_SIZE] = bytes(self.__HEADER_SIZE)
+
+        # The creator owns the memory and unlinks it once the queue is no longer used
+        weakref.finalize(self, SharedMemoryQueue.__release, self.__memory)
+
+        self.__lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(self.__capacity)
+        self.__filled_slots = mp.Semaphore(0)
+        self.__closed = mp.RawValue("B", 0)
+
+    @staticmethod
+    def __release(memory: shared_memory.SharedMemory) -> None:
+        """
+        Closes and unlinks the shared memory.
+        """
+        memory.close()
+        try:
+            memory.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __encode(self, item: object) -> bytes:
+        """
+        Pickles the item and checks that it fits in a slot.
+        """
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.__slot_size:
+            raise ValueError(
+                f"Item of {len(payload)} bytes does not fit in slot of {self.__slot_size} bytes"
+            )
+
+        return payload
+
+    def __write(self, payloads: "list[bytes]") -> None:
+        """
+        Writes payloads at the tail. Caller holds the lock and free slots.
+        """
+        buf = self.__memory.buf
+        head, tail = struct.unpack_from(self.__INDEX_FORMAT, buf, 0)
+        for payload in payloads:
+            offset = self.__HEADER_SIZE + (tail % self.__capacity) * self.__stride
+            struct.pack_into(self.__LENGTH_FORMAT, buf, offset, len(payload))
+            start = offset + self.__LENGTH_SIZE
+            buf[start : start + len(payload)] = payload
+            tail += 1
+
+        struct.pack_into(self.__INDEX_FORMAT, buf, 0, head, tail)
+
+    def __read(self, count: int) -> "list[bytes]":
+        """
+        Reads payloads at the head. Caller holds the lock and filled slots.
+        """
+        buf = self.__memory.buf
+        head, tail = struct.unpack_from(self.__INDEX_FORMAT, buf, 0)
+        payloads = []
+        for _ in range(count):
+            offset = self.__HEADER_SIZE + (head % self.__capacity) * self.__stride
+            (length,) = struct.unpack_from(self.__LENGTH_FORMAT, buf, offset)
+            start = offset + self.__LENGTH_SIZE
+            payloads.append(bytes(buf[start : start + length]))
+            head += 1
+
+        struct.pack_into(self.__INDEX_FORMAT, buf, 0, head, tail)
+        return payloads
+
+    def __evict(self) -> None:
+        """
+        Drops the item at the head and counts it. Caller holds the lock and its filled slot.
+        """
+        buf = self.__memory.buf
+        head, tail = struct.unpack_from(self.__INDEX_FORMAT, buf, 0)
+        (count,) = struct.unpack_from(self.__COUNT_FORMAT, buf, self.__COUNT_OFFSET)
+        struct.pack_into(self.__INDEX_FORMAT, buf, 0, head + 1, tail)
+        struct.pack_into(self.__COUNT_FORMAT, buf, self.__COUNT_OFFSET, count + 1)
+
+    def __put_overwrite(self, payload: bytes) -> None:
+        """
+        Writes the payload, evicting the oldest item if there is no free slot.
+        """
+        while True:
+            if self.__free_slots.acquire(False):
+                with self.__lock:
+                    self.__write([payload])
+                break
+
+            # Take over the filled slot of the oldest item
+            if self.__filled_slots.acquire(False):
+                with self.__lock:
+                    self.__evict()
+                    self.__write([payload])
+                break
+
+            # A consumer is taking the only item, so a slot frees up shortly
+            if self.__free_slots.acquire(True, self.__EVICT_RETRY_DELAY):
+                with self.__lock:
+                    self.__write([payload])
+                break
+
+        self.__filled_slots.release()
+
+    def put(self, item: object, block: bool = True, timeout: "float | None" = None) -> None:
+        """
+        Puts an item into the queue.
+
+        Raises queue.Full if no slot became free in time, never in overwrite mode.
+        Raises ValueError if the pickled item is larger than a slot.
+        """
+        if self.__closed.value:
+            return
+
+        payload = self.__encode(item)
+
+        if self.__overwrite:
+            self.__put_overwrite(payload)
+            return
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        if self.__closed.value:
+            # Pass the wakeup on to the next waiting producer
+            self.__free_slots.release()
+            return
+
+        with self.__lock:
+            self.__write([payload])
+
+        self.__filled_slots.release()
+
+    def get(self, block: bool = True, timeout: "float | None" = None) -> object:
+        """
+        Removes and returns an item from the queue.
+
+        Raises queue.Empty if no item became available in time.
+        """
+        if self.__closed.value:
+            return None
+
+        if not self.__filled_slots.acquire(block, timeout):
+            raise queue.Empty
+
+        if self.__closed.value:
+            # Pass the wakeup on to the next waiting consumer
+            self.__filled_slots.release()
+            return None
+
+        with self.__lock:
+            payload = self.__read(1)[0]
+
+        self.__free_slots.release()
+
+        return pickle.loads(payload)
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: "float | None" = None
+    ) -> int:
+        """
+        Puts items into the queue in order, writing every run of free slots under one lock.
+
+        Returns the number of items put, which is less than the number of items
+        only if the queue stayed full past the timeout (or immediately if not blocking).
+        Raises ValueError if a pickled item is larger than a slot, before putting any.
+        """
+        if self.__closed.value:
+            return 0
+
+        payloads = [self.__encode(item) for item in items]
+        if self.__overwrite:
+            for payload in payloads:
+                self.__put_overwrite(payload)
+
+            return len(payloads)
+
+        endtime = None if timeout is None else time.monotonic() + timeout
+
+        count = 0
+        while count < len(payloads):
+            remaining = None if endtime is None else max(0.0, endtime - time.monotonic())
+            if not self.__free_slots.acquire(block, remaining):
+                break
+
+            if self.__closed.value:
+                self.__free_slots.release()
+                break
+
+            # Claim every other slot that is already free
+            reserved = 1
+            while count + reserved < len(payloads) and self.__free_slots.acquire(False):
+                reserved += 1
+
+            with self.__lock:
+                self.__write(payloads[count : count + reserved])
+
+            for _ in range(reserved):
+                self.__filled_slots.release()
+
+            count += reserved
+
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: "float | None" = None
+    ) -> "list[object]":
+        """
+        Waits for at least 1 item and then removes up to max_items available items in order.
+
+        Returns the items, which is empty if nothing arrived before the timeout.
+        """
+        if self.__closed.value:
+            return [None]
+
+        if max_items <= 0 or not self.__filled_slots.acquire(block, timeout):
+            return []
+
+        if self.__closed.value:
+            self.__filled_slots.release()
+            return [None]
+
+        # Claim every other item that is already available
+        reserved = 1
+        while reserved < max_items and self.__filled_slots.acquire(False):
+            reserved += 1
+
+        with self.__lock:
+            payloads = self.__read(reserved)
+
+        for _ in range(reserved):
+            self.__free_slots.release()
+
+        return [pickle.loads(payload) for payload in payloads]
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        with self.__lock:
+            head, tail = struct.unpack_from(self.__INDEX_FORMAT, self.__memory.buf, 0)
+
+        return tail - head
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is approximately empty.
+        """
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is approximately full.
+        """
+        return self.qsize() >= self.__capacity
+
+    def close(self) -> None:
+        """
+        Wakes every waiting producer and consumer, and makes later calls return immediately.
+        """
+        self.__closed.value = 1
+        # Each woken process passes the wakeup on to the next
+        self.__free_slots.release()
+        self.__filled_slots.release()
+
+    def get_overwritten_count(self) -> int:
+        """
+        Returns the number of items evicted by puts in overwrite mode.
+        """
+        with self.__lock:
+            (count,) = struct.unpack_from(
+                self.__COUNT_FORMAT, self.__memory.buf, self.__COUNT_OFFSET
+            )
+
+        return count
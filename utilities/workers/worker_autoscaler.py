@@ -0,0 +1,194 @@
+"""
+For scaling workers with the load on their input queue.
+"""
+
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_manager
+
+
+class WorkerAutoscaler:  # pylint: disable=too-many-instance-attributes
+    """
+    Adds workers while their input queue stays deep or items wait long in it,
+    and removes one while the others could keep up without it.
+
+    Either condition must hold for several checks in a row, and the thresholds to add
+    are well above those to remove, so that the count does not flap.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        manager: worker_manager.WorkerManager,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        scale_up_depth: int,
+        scale_up_wait_s: float,
+        scale_down_depth: int,
+        scale_down_utilization: float,
+        stable_check_count: int,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerAutoscaler | None]":
+        """
+        Creates an autoscaler, call check() periodically once the workers are started.
+
+        manager: Manager of the workers, created with a maximum worker count.
+        input_queue: Queue the workers take from. Without statistics only its depth is used.
+        scale_up_depth: Items in the queue at which a worker is added.
+        scale_up_wait_s: Mean time items spent in the queue at which a worker is added.
+        scale_down_depth: Items in the queue at or below which a worker may be removed.
+        scale_down_utilization: Highest fraction of time the remaining workers would be busy
+            for a worker to be removed, from the time they spent waiting on the queue.
+        stable_check_count: Checks in a row which must agree before scaling.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerAutoscaler object.
+        """
+        if scale_down_depth >= scale_up_depth:
+            local_logger.error("Scale down depth must be less than scale up depth", True)
+            return False, None
+
+        if not 0.0 < scale_down_utilization < 1.0:
+            local_logger.error("Scale down utilization must be between 0 and 1", True)
+            return False, None
+
+        if stable_check_count <= 0:
+            local_logger.error("Stable check count must be greater than zero", True)
+            return False, None
+
+        return True, WorkerAutoscaler(
+            cls.__create_key,
+            manager,
+            input_queue,
+            scale_up_depth,
+            scale_up_wait_s,
+            scale_down_depth,
+            scale_down_utilization,
+            stable_check_count,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        manager: worker_manager.WorkerManager,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        scale_up_depth: int,
+        scale_up_wait_s: float,
+        scale_down_depth: int,
+        scale_down_utilization: float,
+        stable_check_count: int,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerAutoscaler.__create_key, "Use create() method"
+
+        self.__manager = manager
+        self.__input_queue = input_queue
+        self.__scale_up_depth = scale_up_depth
+        self.__scale_up_wait_s = scale_up_wait_s
+        self.__scale_down_depth = scale_down_depth
+        self.__scale_down_utilization = scale_down_utilization
+        self.__stable_check_count = stable_check_count
+        self.__local_logger = local_logger
+
+        self.__overloaded_checks = 0
+        self.__underloaded_checks = 0
+
+        # Totals at the previous check
+        self.__previous_time = time.monotonic()
+        self.__previous_get_count = 0
+        self.__previous_wait_total_s = 0.0
+        self.__previous_get_blocked_total_s = 0.0
+
+    def __get_waits(self) -> "tuple[float | None, float | None]":
+        """
+        Mean time items spent in the queue and fraction of time the workers were busy,
+        since the previous check. None if unknown.
+        """
+        result, statistics = self.__input_queue.get_statistics(False)
+        if not result:
+            return None, None
+
+        # Get Pylance to stop complaining
+        assert statistics is not None
+
+        now = time.monotonic()
+        elapsed_s = max(now - self.__previous_time, 1e-9)
+        get_count = statistics.get_count - self.__previous_get_count
+        wait_total_s = statistics.wait_total_s - self.__previous_wait_total_s
+        get_blocked_total_s = statistics.get_blocked_total_s - self.__previous_get_blocked_total_s
+
+        self.__previous_time = now
+        self.__previous_get_count = statistics.get_count
+        self.__previous_wait_total_s = statistics.wait_total_s
+        self.__previous_get_blocked_total_s = statistics.get_blocked_total_s
+
+        mean_wait_s = None
+        if get_count > 0:
+            mean_wait_s = wait_total_s / get_count
+
+        # Time not spent waiting for items is spent working on them
+        worker_count = self.__manager.get_worker_count()
+        utilization = max(0.0, 1.0 - get_blocked_total_s / (elapsed_s * worker_count))
+
+        return mean_wait_s, utilization
+
+    def check(self) -> int:
+        """
+        Adds or removes a worker if the load has called for it for enough checks.
+
+        Returns the worker count.
+        """
+        depth = self.__input_queue.queue.qsize()
+        mean_wait_s, utilization = self.__get_waits()
+        worker_count = self.__manager.get_worker_count()
+
+        is_overloaded = depth >= self.__scale_up_depth or (
+            mean_wait_s is not None and mean_wait_s >= self.__scale_up_wait_s
+        )
+        is_underloaded = (
+            depth <= self.__scale_down_depth
+            and worker_count > 1
+            and (
+                utilization is None
+                or utilization * worker_count / (worker_count - 1) <= self.__scale_down_utilization
+            )
+        )
+
+        if is_overloaded:
+            self.__overloaded_checks += 1
+            self.__underloaded_checks = 0
+        elif is_underloaded:
+            self.__overloaded_checks = 0
+            self.__underloaded_checks += 1
+        else:
+            self.__overloaded_checks = 0
+            self.__underloaded_checks = 0
+
+        if self.__overloaded_checks >= self.__stable_check_count:
+            self.__overloaded_checks = 0
+            if self.__manager.add_worker():
+                worker_count += 1
+                self.__local_logger.info(
+                    f"Added {self.__manager.get_target_name()} worker, now {worker_count}, "
+                    f"queue depth {depth}",
+                    True,
+                )
+
+        if self.__underloaded_checks >= self.__stable_check_count:
+            self.__underloaded_checks = 0
+            if self.__manager.remove_worker():
+                worker_count -= 1
+                self.__local_logger.info(
+                    f"Removed {self.__manager.get_target_name()} worker, now {worker_count}, "
+                    f"queue depth {depth}",
+                    True,
+                )
+
+        return worker_count
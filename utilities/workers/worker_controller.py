@@ -6,62 +6,181 @@ import multiprocessing as mp
 import time
 
 
-class WorkerController:
+class WorkerController:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Requests are flags in shared memory, so the checks in the worker loop
+    are a memory read each and only a paused worker waits on a kernel object.
+    Waiting workers are woken through semaphores rather than events, since a worker killed
+    while waiting on an event leaves it unable to be set.
+
+    Shutdown: main requests exit, which also wakes paused workers and workers in
+    wait_for_exit() . Each worker calls acknowledge_exit() as it leaves its loop.
+
+    Groups: get_group_controller() returns a controller for a subset of workers,
+    which can be paused or stopped on its own. Requests to this controller still reach them.
+
+    Progress: the worker records the time of every check_pause() , so main can notice a worker
+    which is stuck, see get_progress_time() .
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    def __init__(self, parent: "WorkerController | None" = None) -> None:
+        """
+        Constructor creates the shared flags and the semaphores.
 
-    def __init__(self) -> None:
+        parent: Controller whose requests also apply, use get_group_controller() instead.
         """
-        Constructor creates internal queue and semaphore.
+        # Written by main under the lock, read by workers without it
+        self.__lock = mp.Lock()
+        self.__exit = mp.RawValue("B", 0)
+        # Incremented on every pause and resume, so odd means paused
+        self.__pause_generation = mp.RawValue("Q", 0)
+        # Released once per request, each woken worker releases it again for the next
+        self.__resume_wakeup = mp.Semaphore(0)
+        self.__exit_wakeup = mp.Semaphore(0)
+        self.__exit_acknowledged_count = mp.RawValue("Q", 0)
+        # Written by the worker, 0 until the worker first reports progress
+        self.__progress_time = mp.RawValue("d", 0.0)
+
+        self.__parent = parent
+        # Only used by main, which makes all requests
+        self.__groups: "dict[str, WorkerController]" = {}
+
+    def get_group_controller(self, name: str) -> "WorkerController":
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        Returns the controller of the group, creating it on first use.
+        Must be called before the workers of the group are created.
+
+        name: Group name, the same name returns the same controller.
+        """
+        if name not in self.__groups:
+            group = WorkerController(self)
+            # A group created after exit was requested starts exiting too
+            if self.is_exit_requested():
+                group.request_exit()
+            self.__groups[name] = group
+
+        return self.__groups[name]
 
     def request_pause(self) -> None:
         """
         Requests worker processes to pause.
+        Does nothing if already paused.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        with self.__lock:
+            if self.__pause_generation.value % 2 == 1:
+                return
+
+            # Wakeups of the previous resume are spent, so a worker that sees the new
+            # generation always waits
+            drain_wakeups(self.__resume_wakeup)
+            self.__pause_generation.value += 1
 
     def request_resume(self) -> None:
         """
         Requests worker processes to resume.
+        Does nothing if not paused.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        with self.__lock:
+            if self.__pause_generation.value % 2 == 0:
+                return
+
+            self.__pause_generation.value += 1
+            self.__resume_wakeup.release()
 
     def check_pause(self) -> None:
         """
-        Blocks worker if main has requested it to pause, otherwise continues.
+        Blocks worker if main has requested it or its group to pause, otherwise continues.
+        Also returns once exit is requested, so that a paused worker can exit.
+        Reports progress, so call it once per loop.
+        """
+        self.__wait_while_paused()
+        # After any pause, so that a resumed worker is not seen as stuck
+        self.report_progress()
+
+    def __wait_while_paused(self) -> None:
+        """
+        Blocks while this controller or its parent is paused.
+        """
+        if self.__parent is not None:
+            # Same class, only the worker's own controller reports progress
+            # pylint: disable-next=protected-access
+            self.__parent.__wait_while_paused()
+
+        # Exiting workers are not paused
+        while self.__pause_generation.value % 2 == 1 and self.__exit.value == 0:
+            self.__resume_wakeup.acquire()
+
+            # Otherwise left over from before request_pause() , and dropped
+            if self.__pause_generation.value % 2 == 0 or self.__exit.value != 0:
+                # Passed on to the next waiting worker
+                self.__resume_wakeup.release()
+
+    def is_paused(self) -> bool:
+        """
+        Returns whether main has requested the worker or its group to pause.
+        """
+        if self.__parent is not None and self.__parent.is_paused():
+            return True
+
+        return self.__pause_generation.value % 2 == 1
+
+    def report_progress(self) -> None:
+        """
+        Records that the worker made progress now, already done by check_pause() .
+        Call it within steps of a loop that take longer than the loop usually does.
+        """
+        self.__progress_time.value = time.monotonic()
+
+    def get_progress_time(self) -> float:
+        """
+        Returns the `time.monotonic()` of the last progress, 0 if there was none.
+        The clock is shared by all processes.
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        return self.__progress_time.value
+
+    def get_pause_generation(self) -> int:
+        """
+        Returns the number of pause and resume requests so far,
+        a worker can compare it between iterations to notice that it was paused.
+        Includes the requests to the parent of a group.
+        """
+        if self.__parent is not None:
+            return self.__pause_generation.value + self.__parent.get_pause_generation()
+
+        return self.__pause_generation.value
 
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        with self.__lock:
+            if self.__exit.value == 0:
+                self.__exit.value = 1
+                self.__exit_wakeup.release()
+                # Paused workers wake up to see the request
+                self.__resume_wakeup.release()
+
+        for group in self.__groups.values():
+            group.request_exit()
 
     def clear_exit(self) -> None:
         """
-        Clears the exit request condition.
+        Clears the exit request condition and the acknowledgements.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        with self.__lock:
+            self.__exit.value = 0
+            drain_wakeups(self.__exit_wakeup)
+            self.__exit_acknowledged_count.value = 0
+            if self.__pause_generation.value % 2 == 1:
+                drain_wakeups(self.__resume_wakeup)
+
+        for group in self.__groups.values():
+            group.clear_exit()
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +188,50 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        # Exit of the parent is forwarded to the group, so only the group flag is read
+        return self.__exit.value != 0
+
+    def wait_for_exit(self, timeout: "float | None") -> bool:
+        """
+        Sleeps for the timeout, waking as soon as exit is requested.
+        Use instead of `time.sleep()` in worker loops.
+
+        Returns whether exit was requested.
+        """
+        endtime = None if timeout is None else time.monotonic() + timeout
+        while self.__exit.value == 0:
+            remaining = None if endtime is None else max(0.0, endtime - time.monotonic())
+            if not self.__exit_wakeup.acquire(True, remaining):
+                return self.__exit.value != 0
+
+            # Otherwise left over from before clear_exit() , and dropped
+            if self.__exit.value != 0:
+                # Passed on to the next waiting worker
+                self.__exit_wakeup.release()
+
+        return True
+
+    def acknowledge_exit(self) -> None:
+        """
+        Called by a worker once it has left its loop.
+        Also counted by the parent of a group.
+        """
+        with self.__lock:
+            self.__exit_acknowledged_count.value += 1
+
+        if self.__parent is not None:
+            self.__parent.acknowledge_exit()
+
+    def get_exit_acknowledged_count(self) -> int:
+        """
+        Returns the number of workers which acknowledged exit since the last clear.
+        """
+        return self.__exit_acknowledged_count.value
+
+
+def drain_wakeups(wakeup: "mp.synchronize.Semaphore") -> None:
+    """
+    Takes every wakeup already released, so that the next wait sleeps until a new one.
+    """
+    while wakeup.acquire(False):
+        pass
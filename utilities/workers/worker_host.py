@@ -0,0 +1,454 @@
+"""
+For running workers as threads of a shared process.
+"""
+
+import enum
+import multiprocessing as mp
+import multiprocessing.connection
+import threading
+import time
+import traceback
+
+
+class ThreadState(enum.IntEnum):
+    """
+    State of a thread of a WorkerHost.
+    """
+
+    IDLE = 0
+    START_REQUESTED = 1
+    RUNNING = 2
+    EXITED = 3
+
+
+class WorkerHost:  # pylint: disable=too-many-instance-attributes
+    """
+    Process which runs workers as threads, instead of a process for each.
+
+    Meant for workers which mostly sleep or wait on I/O, like the heartbeat sender.
+    Threads share the interpreter lock, so workers which use the CPU should stay processes.
+    Each thread gets the same arguments, controller and queues as a process would.
+
+    Workers are added before the host first starts, since their arguments are passed to
+    the host process as it starts. The host process exits once all of its threads have,
+    and starts again when one of them is restarted.
+
+    The host process can be killed at any point, so nothing shared with it may be left
+    waited on or held: threads are woken through pipes instead of a condition, and the lock
+    and pipes are new for every host process.
+    """
+
+    # Longest wait before checking whether the host process died
+    __POLL_PERIOD_S = 0.1
+
+    def __init__(self, name: str = "WorkerHost") -> None:
+        """
+        name: Name of the host process.
+        """
+        self.__name = name
+        self.__workers: "list[tuple[(...) -> object, tuple]]" = []  # type: ignore
+
+        # Guards the states, which are shared with the host process
+        self.__lock = mp.Lock()
+        # Only 1 thread of this process takes the lock at a time, see __acquire()
+        self.__local_lock = threading.Lock()
+        # Readable when a start is requested or a thread exits
+        self.__host_wake_reader, self.__host_wake_writer = mp.Pipe(duplex=False)
+        # Readable when a thread exits
+        self.__wake_reader, self.__wake_writer = mp.Pipe(duplex=False)
+        # Created at the first start, once the number of workers is known
+        self.__states: "mp.sharedctypes.SynchronizedArray | None" = None
+        self.__exitcodes: "mp.sharedctypes.SynchronizedArray | None" = None
+        # Written by each thread as it starts, 0 until then
+        self.__thread_ids: "mp.sharedctypes.SynchronizedArray | None" = None
+        # Cleared by the host process just before it exits
+        self.__is_host_running = mp.RawValue("B", 0)
+        self.__process: "mp.Process | None" = None
+
+    def add_worker(
+        self,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> "tuple[bool, ThreadWorker | None]":
+        """
+        Adds a worker which runs as a thread once started.
+        A worker which is the same as an exited one takes its place, like a restarted process.
+
+        target: Function.
+        args: Target function arguments.
+
+        Returns False if the host has started and no exited worker is the same.
+        """
+        lock = self.__acquire()
+        try:
+            if self.__states is not None:
+                for slot, (slot_target, slot_args) in enumerate(self.__workers):
+                    if (
+                        slot_target == target
+                        and slot_args == args
+                        and self.__states[slot] == ThreadState.EXITED
+                    ):
+                        # Claimed, so that another restart takes a different slot
+                        self.__states[slot] = ThreadState.IDLE
+                        return True, ThreadWorker(self, slot, target.__name__)
+
+                return False, None
+
+            self.__workers.append((target, args))
+            return True, ThreadWorker(self, len(self.__workers) - 1, target.__name__)
+        finally:
+            self.__release(lock)
+
+    def __acquire(self) -> "mp.synchronize.Lock":
+        """
+        Takes the lock of the states, returns it for __release() .
+        """
+        # Released by __release()
+        # pylint: disable-next=consider-using-with
+        self.__local_lock.acquire()
+        while not self.__lock.acquire(timeout=self.__POLL_PERIOD_S):
+            # A host process killed while holding the lock leaves it held,
+            # no other process has it once the host is dead
+            if self.__process is not None and not self.__process.is_alive():
+                self.__lock = mp.Lock()
+
+        return self.__lock
+
+    def __release(self, lock: "mp.synchronize.Lock") -> None:
+        """
+        Releases the lock taken by __acquire() .
+        """
+        lock.release()
+        self.__local_lock.release()
+
+    def __check_process(self) -> None:
+        """
+        Marks every thread as exited if the host process died, the lock must be held.
+        """
+        # Threads send a wakeup on exit whether or not anything joins, so the pipe cannot fill
+        drain_wakeups(self.__wake_reader)
+
+        if self.__process is None or self.__process.is_alive():
+            return
+
+        # Get Pylance to stop complaining
+        assert self.__states is not None
+        assert self.__exitcodes is not None
+
+        for slot in range(len(self.__workers)):
+            if self.__states[slot] in (ThreadState.START_REQUESTED, ThreadState.RUNNING):
+                self.__states[slot] = ThreadState.EXITED
+                self.__exitcodes[slot] = self.__process.exitcode
+
+        self.__is_host_running.value = 0
+
+    def __is_worker_running(self, slot: int) -> bool:
+        """
+        Whether the worker is starting or running, the lock must be held.
+        """
+        if self.__states is None:
+            return False
+
+        self.__check_process()
+        return self.__states[slot] in (ThreadState.START_REQUESTED, ThreadState.RUNNING)
+
+    def start_worker(self, slot: int) -> None:
+        """
+        Starts the thread of the worker, and the host process if it is not running.
+        """
+        lock = self.__acquire()
+        try:
+            if self.__states is None:
+                self.__states = mp.RawArray("B", len(self.__workers))
+                self.__exitcodes = mp.RawArray("i", len(self.__workers))
+                self.__thread_ids = mp.RawArray("q", len(self.__workers))
+
+            self.__check_process()
+            self.__states[slot] = ThreadState.START_REQUESTED
+            if self.__is_host_running.value != 0:
+                self.__host_wake_writer.send_bytes(b"")
+                return
+
+            # Reap the previous host process, which has exited or is about to
+            if self.__process is not None:
+                self.__process.join()
+
+            # Nothing left behind by the previous host process, stale wakeups included
+            self.__lock = mp.Lock()
+            self.__host_wake_reader, self.__host_wake_writer = mp.Pipe(duplex=False)
+            self.__wake_reader, self.__wake_writer = mp.Pipe(duplex=False)
+
+            self.__is_host_running.value = 1
+            self.__process = mp.Process(
+                target=worker_host_main,
+                args=(
+                    self.__workers,
+                    self.__states,
+                    self.__exitcodes,
+                    self.__thread_ids,
+                    self.__lock,
+                    self.__host_wake_reader,
+                    self.__host_wake_writer,
+                    self.__wake_writer,
+                    self.__is_host_running,
+                ),
+                name=self.__name,
+            )
+            self.__process.start()
+        finally:
+            self.__release(lock)
+
+    def join_worker(self, slot: int, timeout: "float | None") -> None:
+        """
+        Waits for the thread of the worker to exit, and for the host process once all have.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            lock = self.__acquire()
+            try:
+                if not self.__is_worker_running(slot):
+                    is_any_running = any(
+                        self.__is_worker_running(other_slot)
+                        for other_slot in range(len(self.__workers))
+                    )
+                    break
+
+                wake_reader = self.__wake_reader
+            finally:
+                self.__release(lock)
+
+            wait_s = self.__POLL_PERIOD_S
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    return
+
+                wait_s = min(wait_s, remaining)
+
+            if wake_reader.poll(wait_s):
+                drain_wakeups(wake_reader)
+
+        if self.__process is None or is_any_running:
+            return
+
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        self.__process.join(remaining)
+
+    def is_worker_alive(self, slot: int) -> bool:
+        """
+        Returns whether the thread of the worker is starting or running.
+        """
+        lock = self.__acquire()
+        try:
+            return self.__is_worker_running(slot)
+        finally:
+            self.__release(lock)
+
+    def get_exitcode(self, slot: int) -> "int | None":
+        """
+        Returns the exit code of the thread of the worker, None if it has not exited.
+        Uncaught exceptions are 1, and a dead host process gives its exit code to every thread.
+        """
+        lock = self.__acquire()
+        try:
+            if self.__states is None or self.__is_worker_running(slot):
+                return None
+
+            # Get Pylance to stop complaining
+            assert self.__exitcodes is not None
+
+            return self.__exitcodes[slot]
+        finally:
+            self.__release(lock)
+
+    def terminate(self) -> None:
+        """
+        Terminates the host process, a thread cannot be stopped on its own.
+        """
+        if self.__process is not None:
+            self.__process.terminate()
+
+    def kill(self) -> None:
+        """
+        Kills the host process, a thread cannot be stopped on its own.
+        """
+        if self.__process is not None:
+            self.__process.kill()
+
+    def get_pid(self) -> "int | None":
+        """
+        Returns the process ID of the host process, None if it never started.
+        """
+        if self.__process is None:
+            return None
+
+        return self.__process.pid
+
+    def get_thread_id(self, slot: int) -> "int | None":
+        """
+        Returns the native ID of the latest thread of the worker, None if it never started.
+        Like a process ID, it names the thread in /proc .
+        """
+        if self.__thread_ids is None or self.__thread_ids[slot] == 0:
+            return None
+
+        return self.__thread_ids[slot]
+
+
+class ThreadWorker:
+    """
+    Worker in a thread of a WorkerHost, with the methods of `mp.Process` that
+    WorkerManager uses.
+    """
+
+    def __init__(self, host: WorkerHost, slot: int, name: str) -> None:
+        """
+        host: Host running the thread.
+        slot: Index of the worker in the host.
+        name: Name of the worker.
+        """
+        self.__host = host
+        self.__slot = slot
+        self.name = f"{name}-thread-{slot}"
+
+    def start(self) -> None:
+        """
+        Starts the thread.
+        """
+        self.__host.start_worker(self.__slot)
+
+    def join(self, timeout: "float | None" = None) -> None:
+        """
+        Waits for the thread to exit.
+        """
+        self.__host.join_worker(self.__slot, timeout)
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether the thread is running.
+        """
+        return self.__host.is_worker_alive(self.__slot)
+
+    def terminate(self) -> None:
+        """
+        Terminates the host process, and so every thread in it.
+        """
+        self.__host.terminate()
+
+    def kill(self) -> None:
+        """
+        Kills the host process, and so every thread in it.
+        """
+        self.__host.kill()
+
+    @property
+    def exitcode(self) -> "int | None":
+        """
+        Exit code of the thread, None if it has not exited.
+        """
+        return self.__host.get_exitcode(self.__slot)
+
+    @property
+    def pid(self) -> "int | None":
+        """
+        Process ID of the host process, shared by every thread in it.
+        """
+        return self.__host.get_pid()
+
+    def get_thread_id(self) -> "int | None":
+        """
+        Returns the native ID of the thread, None if it never started.
+        """
+        return self.__host.get_thread_id(self.__slot)
+
+
+def drain_wakeups(reader: multiprocessing.connection.Connection) -> None:
+    """
+    Reads every wakeup already sent, so that the next wait sleeps until a new one.
+    """
+    while reader.poll():
+        reader.recv_bytes()
+
+
+def run_worker_thread(
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+    slot: int,
+    states: "mp.sharedctypes.SynchronizedArray",
+    exitcodes: "mp.sharedctypes.SynchronizedArray",
+    thread_ids: "mp.sharedctypes.SynchronizedArray",
+    lock: "mp.synchronize.Lock",
+    wake_writers: "list[multiprocessing.connection.Connection]",
+) -> None:
+    """
+    Thread of the host process, which runs a worker and records how it exited.
+    """
+    thread_ids[slot] = threading.get_native_id()
+    exitcode = 0
+    try:
+        target(*args)
+    # Catching all exceptions, like a process would
+    # pylint: disable-next=broad-exception-caught
+    except BaseException:
+        traceback.print_exc()
+        exitcode = 1
+
+    with lock:
+        exitcodes[slot] = exitcode
+        states[slot] = ThreadState.EXITED
+        for wake_writer in wake_writers:
+            wake_writer.send_bytes(b"")
+
+
+def worker_host_main(
+    workers: "list[tuple[(...) -> object, tuple]]",  # type: ignore
+    states: "mp.sharedctypes.SynchronizedArray",
+    exitcodes: "mp.sharedctypes.SynchronizedArray",
+    thread_ids: "mp.sharedctypes.SynchronizedArray",
+    lock: "mp.synchronize.Lock",
+    host_wake_reader: multiprocessing.connection.Connection,
+    host_wake_writer: multiprocessing.connection.Connection,
+    wake_writer: multiprocessing.connection.Connection,
+    is_host_running: "mp.sharedctypes.Synchronized",
+) -> None:
+    """
+    Host process, which starts threads as they are requested until none are running.
+    """
+    threads = []
+    while True:
+        with lock:
+            for slot, (target, args) in enumerate(workers):
+                if states[slot] != ThreadState.START_REQUESTED:
+                    continue
+
+                states[slot] = ThreadState.RUNNING
+                thread = threading.Thread(
+                    target=run_worker_thread,
+                    args=(
+                        target,
+                        args,
+                        slot,
+                        states,
+                        exitcodes,
+                        thread_ids,
+                        lock,
+                        [host_wake_writer, wake_writer],
+                    ),
+                    name=f"{target.__name__}-thread-{slot}",
+                )
+                thread.start()
+                threads.append(thread)
+
+            # Decided under the lock, so a start requested after this starts a new host
+            if all(
+                state not in (ThreadState.START_REQUESTED, ThreadState.RUNNING) for state in states
+            ):
+                is_host_running.value = 0
+                break
+
+        # Wakeups are sent under the lock after the states change, so none are missed
+        host_wake_reader.poll(None)
+        drain_wakeups(host_wake_reader)
+
+    for thread in threads:
+        thread.join()
@@ -3,13 +3,48 @@ For managing workers.
 """
 
 import multiprocessing as mp
+import multiprocessing.forkserver
+import threading
+import time
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
+from utilities.workers import worker_host
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_scheduling
+from utilities.workers import worker_watchdog
 
 
-class WorkerProperties:
+def set_start_method(
+    start_method: str, preload_modules: "list[str]", local_logger: logger.Logger
+) -> bool:
+    """
+    Sets how workers are started by default, call before creating any queue or controller.
+    Locks and semaphores can only be passed to spawn and forkserver workers if they were
+    created after one of those was set.
+
+    start_method: "fork", "spawn" or "forkserver".
+    preload_modules: Modules the forkserver imports once, so that workers forked from it
+        start with them imported. Unused by the other start methods.
+    local_logger: Existing logger from process.
+
+    Returns whether the start method was set.
+    """
+    try:
+        mp.set_start_method(start_method, force=True)
+    except ValueError as e:
+        local_logger.error(f"Invalid start method {start_method}: {e}", True)
+        return False
+
+    if start_method == "forkserver":
+        mp.set_forkserver_preload(preload_modules)
+        # Started now, so that the first worker does not wait for the imports
+        multiprocessing.forkserver.ensure_running()
+
+    return True
+
+
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
@@ -26,17 +61,33 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        group: "str | None" = None,
+        start_method: "str | None" = None,
+        max_count: "int | None" = None,
+        scheduling: "worker_scheduling.WorkerScheduling | None" = None,
+        host: "worker_host.WorkerHost | None" = None,
+        watchdog: "worker_watchdog.WorkerWatchdog | None" = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
 
-        count: Number of workers.
+        count: Number of workers, the minimum if scaled.
         target: Function.
         work_arguments: Arguments for worker internals.
         input_queues: Input queues.
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        group: Name of the controller group of these workers, None for no group.
+            See WorkerController.get_group_controller() .
+        start_method: "fork", "spawn" or "forkserver", None for the default.
+            See set_start_method() .
+        max_count: Most workers when scaled, None to keep the count fixed.
+            See WorkerManager.add_worker() .
+        scheduling: CPU set and priority of the workers, None to inherit them from main.
+        host: Runs the workers as threads of its process, None for a process each.
+        watchdog: How long the workers may go without progress, None to not check.
+            Workers in a host can only log stalls. See WorkerManager.check_stalled_workers() .
 
         Returns the WorkerProperties object.
         """
@@ -47,25 +98,97 @@ class WorkerProperties:
             )
             return False, None
 
+        if max_count is None:
+            max_count = count
+
+        if max_count < count:
+            local_logger.error(
+                f"Maximum worker count {max_count} is less than the worker count {count}", True
+            )
+            return False, None
+
+        # A pipe interleaves and splits messages with more than 1 process at either end
+        if max_count > 1:
+            for input_queue in input_queues:
+                if input_queue.backend == queue_proxy_wrapper.QueueBackend.PIPE:
+                    local_logger.error(
+                        f"Pipe input queue cannot have {max_count} consumers, use another backend",
+                        True,
+                    )
+                    return False, None
+
+            for output_queue in output_queues:
+                if output_queue.backend == queue_proxy_wrapper.QueueBackend.PIPE:
+                    local_logger.error(
+                        f"Pipe output queue cannot have {max_count} producers, use another backend",
+                        True,
+                    )
+                    return False, None
+
+        if start_method is not None:
+            if start_method not in mp.get_all_start_methods():
+                local_logger.error(f"Start method {start_method} is not available", True)
+                return False, None
+
+            # Fork inherits everything, the others need locks created outside of a fork context
+            if start_method != "fork" and mp.get_context().get_start_method() == "fork":
+                local_logger.error(
+                    f"Start method {start_method} needs set_start_method() to be called first",
+                    True,
+                )
+                return False, None
+
+        if host is not None:
+            # Threads are added to the host before it starts, so they cannot be scaled
+            if max_count > count:
+                local_logger.error("Workers in a host cannot be scaled", True)
+                return False, None
+
+            if start_method is not None:
+                local_logger.error("Workers in a host are started with the host process", True)
+                return False, None
+
+            # Terminating the host process would also stop the other workers in it
+            if (
+                watchdog is not None
+                and watchdog.get_action() == worker_watchdog.StallAction.RESTART
+            ):
+                local_logger.error("Stalled workers in a host cannot be restarted, log them", True)
+                return False, None
+
+        # Workers in a group are controlled by the group and by the controller itself
+        if group is not None:
+            controller = controller.get_group_controller(group)
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
+            max_count,
             target,
             work_arguments,
             input_queues,
             output_queues,
             controller,
+            start_method,
+            scheduling,
+            host,
+            watchdog,
         )
 
     def __init__(
         self,
         class_private_create_key: object,
         count: int,
+        max_count: int,
         target: "(...) -> object",  # type: ignore
         work_arguments: "tuple",
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        start_method: "str | None",
+        scheduling: "worker_scheduling.WorkerScheduling | None",
+        host: "worker_host.WorkerHost | None",
+        watchdog: "worker_watchdog.WorkerWatchdog | None",
     ) -> None:
         """
         Private constructor, use create() method.
@@ -73,23 +196,35 @@ class WorkerProperties:
         assert class_private_create_key is WorkerProperties.__create_key, "Use create() method"
 
         self.__count = count
+        self.__max_count = max_count
         self.__target = target
         self.__work_arguments = work_arguments
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
-
-    def get_worker_arguments(self) -> "tuple":
+        self.__start_method = start_method
+        self.__scheduling = scheduling
+        self.__host = host
+        self.__watchdog = watchdog
+
+    def get_worker_arguments(
+        self, controller: "worker_controller.WorkerController | None" = None
+    ) -> "tuple":
         """
         Concatenates the worker properties into a tuple.
 
+        controller: Replaces the controller of the properties, None to keep it.
+
         Returns the worker properties as a tuple.
         """
+        if controller is None:
+            controller = self.__controller
+
         return (
             self.__work_arguments
             + tuple(self.__input_queues)
             + tuple(self.__output_queues)
-            + (self.__controller,)
+            + (controller,)
         )
 
     def get_worker_count(self) -> int:
@@ -98,6 +233,18 @@ class WorkerProperties:
         """
         return self.__count
 
+    def get_max_worker_count(self) -> int:
+        """
+        Returns the most workers, the same as the worker count if not scaled.
+        """
+        return self.__max_count
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the controller, which is the group controller for workers in a group.
+        """
+        return self.__controller
+
     def get_worker_target(self) -> "(...) -> object":  # type: ignore
         """
         Returns the worker target.
@@ -110,6 +257,30 @@ class WorkerProperties:
         """
         return self.__input_queues
 
+    def get_start_method(self) -> "str | None":
+        """
+        Returns the start method, None for the default.
+        """
+        return self.__start_method
+
+    def get_scheduling(self) -> "worker_scheduling.WorkerScheduling | None":
+        """
+        Returns the scheduling settings, None to inherit them.
+        """
+        return self.__scheduling
+
+    def get_host(self) -> "worker_host.WorkerHost | None":
+        """
+        Returns the host running the workers as threads, None if they are processes.
+        """
+        return self.__host
+
+    def get_watchdog(self) -> "worker_watchdog.WorkerWatchdog | None":
+        """
+        Returns the watchdog settings, None if the workers are not checked for progress.
+        """
+        return self.__watchdog
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -117,14 +288,22 @@ class WorkerProperties:
         return self.__target.__name__
 
 
-class WorkerManager:
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Scaled workers (see WorkerProperties.create() max_count) each get a group controller
+    of their own, so that one of them can be asked to exit without a sentinel in the queue.
+    Watched workers (see WorkerProperties.create() watchdog) get one too,
+    so that each reports its own progress.
     """
 
     __create_key = object()
 
+    # Time a terminated worker has to exit before it is killed
+    __TERMINATE_TIMEOUT = 1.0  # seconds
+
     @classmethod
     def create(
         cls,
@@ -140,17 +319,25 @@ class WorkerManager:
         Returns whether the workers were able to be created and the Worker Manager.
         """
         workers = []
-        for _ in range(0, worker_properties.get_worker_count()):
+        for slot in range(0, worker_properties.get_worker_count()):
             result, worker = WorkerManager.__create_single_worker(
                 worker_properties.get_worker_target(),
-                worker_properties.get_worker_arguments(),
+                worker_properties.get_worker_arguments(
+                    WorkerManager.__get_slot_controller(worker_properties, slot)
+                ),
+                worker_properties.get_start_method(),
+                worker_properties.get_scheduling(),
+                worker_properties.get_host(),
                 local_logger,
             )
             if not result:
                 local_logger.error("Failed to create worker", True)
                 return False, None
 
-            workers.append(worker)
+            # Get Pylance to stop complaining
+            assert worker is not None
+
+            workers.append((slot, worker))
 
         return True, WorkerManager(
             cls.__create_key,
@@ -162,7 +349,7 @@ class WorkerManager:
     def __init__(
         self,
         class_private_create_key: object,
-        workers: "list[mp.Process]",
+        workers: "list[tuple[int, mp.Process | worker_host.ThreadWorker]]",
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
     ) -> None:
@@ -171,23 +358,67 @@ class WorkerManager:
         """
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
+        # Pairs of slot and worker, the slot picks the controller of a scaled worker
         self.__workers = workers
+        # Removed workers which have not exited yet, they still hold their slot
+        self.__retiring_workers: "list[tuple[int, mp.Process | worker_host.ThreadWorker]]" = []
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
 
+        # Workers are restarted and scaled from threads of main
+        self.__lock = threading.Lock()
+
+        # Slots seen stalled, so that a stall is logged once
+        self.__stalled_slots: "set[int]" = set()
+        # Pause generation of each slot at the last check, a change skips the check
+        self.__pause_generations: "dict[int, int]" = {}
+
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __get_slot_controller(
+        worker_properties: WorkerProperties, slot: int
+    ) -> "worker_controller.WorkerController | None":
+        """
+        Controller of the worker in the slot, None for the controller of the properties.
+        """
+        if (
+            worker_properties.get_max_worker_count() == worker_properties.get_worker_count()
+            and worker_properties.get_watchdog() is None
+        ):
+            return None
+
+        return worker_properties.get_controller().get_group_controller(
+            f"{worker_properties.get_target_name()}_{slot}"
+        )
+
+    @staticmethod
+    def __create_single_worker(target: "(...) -> object", args: "tuple", start_method: "str | None", scheduling: "worker_scheduling.WorkerScheduling | None", host: "worker_host.WorkerHost | None", local_logger: logger.Logger) -> "tuple[bool, mp.Process | worker_host.ThreadWorker | None]":  # type: ignore
         """
         Creates a single worker.
 
         target: Function.
         args: Target function arguments.
+        start_method: Start method, None for the default.
+        scheduling: Applied by the worker before running the target, None for none.
+        host: Runs the worker as a thread, None for a process.
         local_logger: Existing logger from process.
 
         Returns whether a worker was created and the worker.
         """
+        # The worker applies the settings to itself, so they do not leak into main
+        if scheduling is not None:
+            args = (scheduling, target, args)
+            target = worker_scheduling.scheduled_worker
+
+        if host is not None:
+            result, thread_worker = host.add_worker(target, args)
+            if not result:
+                local_logger.error("Host has started, only exited workers can be restarted", True)
+                return False, None
+
+            return True, thread_worker
+
         try:
-            worker = mp.Process(target=target, args=args)
+            worker = mp.get_context(start_method).Process(target=target, args=args)
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -200,48 +431,315 @@ class WorkerManager:
         """
         Start workers.
         """
-        for worker in self.__workers:
-            worker.start()
+        for slot, worker in self.__workers:
+            self.__start_worker(slot, worker)
 
-    def join_workers(self) -> None:
+    def __start_worker(self, slot: int, worker: "mp.Process | worker_host.ThreadWorker") -> None:
+        """
+        Starts a worker, which has until the stall timeout to make its first progress.
+        """
+        controller = WorkerManager.__get_slot_controller(self.__worker_properties, slot)
+        if controller is not None:
+            controller.report_progress()
+
+        worker.start()
+
+    def join_workers(self, deadline: "float | None" = None) -> bool:
         """
         Join workers.
+
+        deadline: `time.monotonic()` by which workers must have exited, None waits forever.
+            Workers still alive at the deadline are terminated, then killed.
+
+        Returns whether every worker exited by itself.
         """
-        for worker in self.__workers:
+        with self.__lock:
+            workers = [worker for _, worker in self.__workers + self.__retiring_workers]
+
+        is_clean = True
+        for worker in workers:
+            if deadline is None:
+                worker.join()
+                continue
+
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if not worker.is_alive():
+                continue
+
+            is_clean = False
+            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            self.__local_logger.warning(
+                f"Worker did not exit by the deadline, terminating {target_and_worker_name}",
+                True,
+            )
+            worker.terminate()
+            worker.join(self.__TERMINATE_TIMEOUT)
+            if not worker.is_alive():
+                continue
+
+            self.__local_logger.error(
+                f"Worker ignored terminate, killing {target_and_worker_name}", True
+            )
+            worker.kill()
             worker.join()
 
+        return is_clean
+
+    def get_dead_worker_count(self) -> int:
+        """
+        Returns the number of workers which have exited.
+        """
+        with self.__lock:
+            return sum(1 for _, worker in self.__workers if not worker.is_alive())
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers, not counting removed ones which are still exiting.
+        """
+        with self.__lock:
+            return len(self.__workers)
+
+    def get_target_name(self) -> str:
+        """
+        Returns the name of the target of the workers.
+        """
+        return self.__worker_properties.get_target_name()
+
+    def get_worker_tasks(self) -> "list[tuple[int, int | None]]":
+        """
+        Returns the process ID of every started worker, including removed ones which are
+        still exiting, paired with the thread ID for a worker in a host,
+        None for a worker which is the whole process.
+        """
+        with self.__lock:
+            workers = [worker for _, worker in self.__workers + self.__retiring_workers]
+
+        tasks = []
+        for worker in workers:
+            if worker.pid is None:
+                continue
+
+            if isinstance(worker, worker_host.ThreadWorker):
+                thread_id = worker.get_thread_id()
+                if thread_id is None:
+                    continue
+
+                tasks.append((worker.pid, thread_id))
+                continue
+
+            tasks.append((worker.pid, None))
+
+        return tasks
+
     def check_and_restart_dead_workers(self) -> bool:
         """
         Check and restart dead workers.
 
         Returns whether the dead workers were able to be restarted.
         """
+        with self.__lock:
+            return self.__restart_dead_workers()
+
+    def __restart_dead_workers(self) -> bool:
+        """
+        Restarts dead workers in their slot, the lock must be held.
+        """
+        is_restarted = True
         new_workers = []
-        for worker in self.__workers:
+        for slot, worker in self.__workers:
             if worker.is_alive():
-                new_workers.append(worker)
+                new_workers.append((slot, worker))
                 continue
 
             # Log dead worker
             target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
             self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
+                f"Worker died with exit code {worker.exitcode}, restarting {target_and_worker_name}",
                 True,
             )
 
             # Create a new worker
             result, new_worker = WorkerManager.__create_single_worker(
                 self.__worker_properties.get_worker_target(),
-                self.__worker_properties.get_worker_arguments(),
+                self.__worker_properties.get_worker_arguments(
+                    WorkerManager.__get_slot_controller(self.__worker_properties, slot)
+                ),
+                self.__worker_properties.get_start_method(),
+                self.__worker_properties.get_scheduling(),
+                self.__worker_properties.get_host(),
                 self.__local_logger,
             )
             if not result:
                 self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
-                return False
+                # Kept so that the next check tries again
+                new_workers.append((slot, worker))
+                is_restarted = False
+                continue
 
-            # Append the new worker
-            new_workers.append(new_worker)
+            # Get Pylance to stop complaining
+            assert new_worker is not None
+
+            # Reap the dead worker and start the new one in its place
+            worker.join()
+            self.__stalled_slots.discard(slot)
+            self.__start_worker(slot, new_worker)
+            new_workers.append((slot, new_worker))
 
         self.__workers = new_workers
 
+        return is_restarted
+
+    def __reap_retiring_workers(self) -> None:
+        """
+        Joins removed workers which have exited, the lock must be held.
+        """
+        retiring_workers = []
+        for slot, worker in self.__retiring_workers:
+            if worker.is_alive():
+                retiring_workers.append((slot, worker))
+                continue
+
+            worker.join()
+
+        self.__retiring_workers = retiring_workers
+
+    def add_worker(self) -> bool:
+        """
+        Starts another worker, up to the maximum count of the properties.
+
+        Returns whether a worker was started.
+        """
+        with self.__lock:
+            self.__reap_retiring_workers()
+            if len(self.__workers) >= self.__worker_properties.get_max_worker_count():
+                return False
+
+            # Clearing the exit of a slot below would undo a shutdown
+            if self.__worker_properties.get_controller().is_exit_requested():
+                return False
+
+            used_slots = {slot for slot, _ in self.__workers + self.__retiring_workers}
+            slot = 0
+            while slot in used_slots:
+                slot += 1
+
+            controller = WorkerManager.__get_slot_controller(self.__worker_properties, slot)
+            # Get Pylance to stop complaining
+            assert controller is not None
+
+            # The slot may have been used by a removed worker
+            controller.clear_exit()
+            result, worker = WorkerManager.__create_single_worker(
+                self.__worker_properties.get_worker_target(),
+                self.__worker_properties.get_worker_arguments(controller),
+                self.__worker_properties.get_start_method(),
+                self.__worker_properties.get_scheduling(),
+                self.__worker_properties.get_host(),
+                self.__local_logger,
+            )
+            if not result:
+                self.__local_logger.error(
+                    f"Failed to add {self.__worker_properties.get_target_name()} worker", True
+                )
+                return False
+
+            # Get Pylance to stop complaining
+            assert worker is not None
+
+            self.__stalled_slots.discard(slot)
+            self.__start_worker(slot, worker)
+            self.__workers.append((slot, worker))
+
+        return True
+
+    def remove_worker(self) -> bool:
+        """
+        Asks the newest worker to exit, down to the worker count of the properties.
+        It finishes the item in progress, and is joined later.
+
+        Returns whether a worker was removed.
+        """
+        with self.__lock:
+            self.__reap_retiring_workers()
+            if len(self.__workers) <= self.__worker_properties.get_worker_count():
+                return False
+
+            slot, worker = self.__workers.pop()
+            controller = WorkerManager.__get_slot_controller(self.__worker_properties, slot)
+            # Get Pylance to stop complaining
+            assert controller is not None
+
+            controller.request_exit()
+            self.__retiring_workers.append((slot, worker))
+
         return True
+
+    def check_stalled_workers(self) -> int:
+        """
+        Checks that every worker made progress within the stall timeout of the watchdog.
+        Call it periodically, like WorkerSupervisor does.
+
+        A stalled worker is logged once. If the watchdog restarts stalled workers,
+        it is terminated, or killed if still alive at a later check,
+        and then restarted like any dead worker.
+
+        Returns the number of stalled workers.
+        """
+        watchdog = self.__worker_properties.get_watchdog()
+        if watchdog is None:
+            return 0
+
+        stalled_count = 0
+        with self.__lock:
+            now = time.monotonic()
+            for slot, worker in self.__workers:
+                controller = WorkerManager.__get_slot_controller(self.__worker_properties, slot)
+                # Get Pylance to stop complaining
+                assert controller is not None
+
+                # Paused workers wait without progress,
+                # and just resumed workers may not have run yet
+                pause_generation = controller.get_pause_generation()
+                if controller.is_paused() or self.__pause_generations.get(slot) != pause_generation:
+                    self.__pause_generations[slot] = pause_generation
+                    continue
+
+                # Dead workers are restarted by check_and_restart_dead_workers()
+                if not worker.is_alive():
+                    continue
+
+                stalled_s = now - controller.get_progress_time()
+                if stalled_s < watchdog.get_stall_timeout():
+                    self.__stalled_slots.discard(slot)
+                    continue
+
+                stalled_count += 1
+                target_and_worker_name = (
+                    f"{self.__worker_properties.get_target_name()} {worker.name}"
+                )
+                if watchdog.get_action() == worker_watchdog.StallAction.LOG:
+                    if slot not in self.__stalled_slots:
+                        self.__local_logger.warning(
+                            f"Worker made no progress for {stalled_s:.3f}s: "
+                            f"{target_and_worker_name}",
+                            True,
+                        )
+                    self.__stalled_slots.add(slot)
+                    continue
+
+                if slot in self.__stalled_slots:
+                    self.__local_logger.error(
+                        f"Stalled worker ignored terminate, killing {target_and_worker_name}", True
+                    )
+                    worker.kill()
+                    continue
+
+                self.__local_logger.warning(
+                    f"Worker made no progress for {stalled_s:.3f}s, "
+                    f"terminating {target_and_worker_name}",
+                    True,
+                )
+                self.__stalled_slots.add(slot)
+                worker.terminate()
+
+        return stalled_count
@@ -0,0 +1,211 @@
+"""
+Resource usage of workers, read from /proc .
+"""
+
+import os
+import time
+
+from utilities.workers import worker_manager
+
+
+class WorkerResourceUsage:  # pylint: disable=too-many-instance-attributes
+    """
+    Resource usage of the workers of a target over the interval between 2 samples.
+    """
+
+    def __init__(
+        self,
+        target_name: str,
+        task_count: int,
+        cpu_s: float,
+        cpu_percent: float,
+        voluntary_switches: int,
+        involuntary_switches: int,
+        rss_kb: int,
+        open_fd_count: int,
+    ) -> None:
+        """
+        target_name: Target of the workers.
+        task_count: Worker processes and threads read.
+        cpu_s, cpu_percent: User and system CPU time used within the interval,
+            the percentage is of 1 CPU.
+        voluntary_switches: Context switches within the interval from waiting, like on a queue.
+        involuntary_switches: Context switches within the interval from being preempted,
+            many mean the workers want more CPU than they get.
+        rss_kb: Resident memory at the sample.
+        open_fd_count: Open file descriptors at the sample.
+        """
+        self.target_name = target_name
+        self.task_count = task_count
+        self.cpu_s = cpu_s
+        self.cpu_percent = cpu_percent
+        self.voluntary_switches = voluntary_switches
+        self.involuntary_switches = involuntary_switches
+        self.rss_kb = rss_kb
+        self.open_fd_count = open_fd_count
+
+    def __str__(self) -> str:
+        return (
+            f"{self.target_name}: {self.task_count} task(s), "
+            f"CPU: {self.cpu_s:.3f}s ({self.cpu_percent:.1f}%), "
+            f"switches: {self.voluntary_switches} voluntary, "
+            f"{self.involuntary_switches} involuntary, "
+            f"RSS: {self.rss_kb} kB, open FDs: {self.open_fd_count}"
+        )
+
+
+class TaskCounters:
+    """
+    Cumulative counters of a process or thread.
+    The switches of a process drop when one of its threads exits, since only living threads
+    are read.
+    """
+
+    def __init__(self, cpu_s: float, voluntary_switches: int, involuntary_switches: int) -> None:
+        """
+        cpu_s: User and system CPU time since the task started.
+        voluntary_switches, involuntary_switches: Context switches since the task started.
+        """
+        self.cpu_s = cpu_s
+        self.voluntary_switches = voluntary_switches
+        self.involuntary_switches = involuntary_switches
+
+
+def read_task_counters(task_path: str) -> "TaskCounters | None":
+    """
+    Reads the counters of a process or a thread.
+
+    task_path: /proc/<pid> for a process, including all of its threads,
+        or /proc/<pid>/task/<tid> for one thread.
+
+    Returns None if the task has exited.
+    """
+    try:
+        with open(f"{task_path}/stat", encoding="utf-8") as stat:
+            # The name in parentheses may contain spaces, the fields after it do not
+            fields = stat.read().rsplit(")", 1)[1].split()
+
+        # The stat of the thread group only counts the switches of its first thread
+        if os.path.basename(os.path.dirname(task_path)) == "task":
+            status_paths = [f"{task_path}/status"]
+        else:
+            status_paths = [
+                f"{task_path}/task/{thread_id}/status"
+                for thread_id in os.listdir(f"{task_path}/task")
+            ]
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+
+    voluntary_switches = 0
+    involuntary_switches = 0
+    for status_path in status_paths:
+        try:
+            with open(status_path, encoding="utf-8") as status:
+                for line in status:
+                    if line.startswith("voluntary_ctxt_switches:"):
+                        voluntary_switches += int(line.split()[1])
+                    elif line.startswith("nonvoluntary_ctxt_switches:"):
+                        involuntary_switches += int(line.split()[1])
+        # A thread which exited after it was listed is skipped, the others are still read
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+
+    # utime and stime, fields 14 and 15 counting from the pid
+    ticks = int(fields[11]) + int(fields[12])
+    return TaskCounters(ticks / os.sysconf("SC_CLK_TCK"), voluntary_switches, involuntary_switches)
+
+
+def read_process_memory(pid: int) -> "tuple[int, int] | None":
+    """
+    Reads the resident memory in kB and the number of open file descriptors of a process.
+
+    Returns None if the process has exited.
+    """
+    rss_kb = 0
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+
+        open_fd_count = len(os.listdir(f"/proc/{pid}/fd"))
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+
+    return rss_kb, open_fd_count
+
+
+class WorkerResourceSampler:
+    """
+    Samples the resources used by the workers of each manager, aggregated by target name,
+    so that the stage using the CPU under load can be found on the vehicle.
+    Linux only.
+
+    CPU time and context switches are counted over the interval since the previous sample.
+    Workers in a host are counted by their own thread, but share the memory and
+    file descriptors of the host, so those are of the whole host process.
+    """
+
+    def __init__(self, worker_managers: "list[worker_manager.WorkerManager]") -> None:
+        """
+        worker_managers: Managers of the workers to sample.
+        """
+        self.__worker_managers = worker_managers
+        # Counters of each task at the previous sample, to subtract from the next
+        self.__previous_counters: "dict[tuple[int, int | None], TaskCounters]" = {}
+        self.__previous_time = time.monotonic()
+
+    def sample(self) -> "list[WorkerResourceUsage]":
+        """
+        Reads every worker, call it periodically.
+
+        Returns the usage of each target, in the order of the managers.
+        """
+        now = time.monotonic()
+        interval_s = max(now - self.__previous_time, 1e-9)
+        self.__previous_time = now
+
+        counters = {}
+        usages: "dict[str, WorkerResourceUsage]" = {}
+        for manager in self.__worker_managers:
+            target_name = manager.get_target_name()
+            usage = usages.setdefault(
+                target_name, WorkerResourceUsage(target_name, 0, 0.0, 0.0, 0, 0, 0, 0)
+            )
+            pids = set()
+            for pid, thread_id in manager.get_worker_tasks():
+                task_path = f"/proc/{pid}" if thread_id is None else f"/proc/{pid}/task/{thread_id}"
+                task_counters = read_task_counters(task_path)
+                if task_counters is None:
+                    continue
+
+                # A new task counts from its start
+                previous = self.__previous_counters.get((pid, thread_id), TaskCounters(0.0, 0, 0))
+                counters[(pid, thread_id)] = task_counters
+                usage.task_count += 1
+                usage.cpu_s += task_counters.cpu_s - previous.cpu_s
+                # Not below 0 when a thread of the process exited
+                usage.voluntary_switches += max(
+                    task_counters.voluntary_switches - previous.voluntary_switches, 0
+                )
+                usage.involuntary_switches += max(
+                    task_counters.involuntary_switches - previous.involuntary_switches, 0
+                )
+                pids.add(pid)
+
+            for pid in pids:
+                memory = read_process_memory(pid)
+                if memory is None:
+                    continue
+
+                rss_kb, open_fd_count = memory
+                usage.rss_kb += rss_kb
+                usage.open_fd_count += open_fd_count
+
+        # Exited tasks are forgotten
+        self.__previous_counters = counters
+
+        for usage in usages.values():
+            usage.cpu_percent = usage.cpu_s / interval_s * 100
+
+        return list(usages.values())
@@ -0,0 +1,161 @@
+"""
+CPU placement and scheduling priority of workers.
+"""
+
+import enum
+import os
+import pathlib
+
+from modules.common.modules.logger import logger
+
+
+class RealtimePolicy(enum.Enum):
+    """
+    Linux realtime scheduling policies, which run before any normal process.
+    """
+
+    # Runs until it blocks or a higher priority process is ready
+    FIFO = 0
+    # Like FIFO, but takes turns with processes of the same priority
+    RR = 1
+
+
+class WorkerScheduling:
+    """
+    Settings applied by each worker process to itself before the target runs.
+    See WorkerProperties.create() .
+
+    Settings which cannot be applied, usually for lack of permission, are logged by
+    the worker and skipped, and the worker runs anyway.
+    """
+
+    __create_key = object()
+
+    # Range of nice values, lower runs first
+    __NICE_MIN = -20
+    __NICE_MAX = 19
+
+    @classmethod
+    def create(
+        cls,
+        cpus: "set[int] | None",
+        nice: "int | None",
+        realtime_policy: "RealtimePolicy | None",
+        realtime_priority: int,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerScheduling | None]":
+        """
+        Creates scheduling settings.
+
+        cpus: CPUs the worker may run on, None for any.
+        nice: Nice value, None to inherit it. Only raising it is allowed without CAP_SYS_NICE.
+        realtime_policy: Realtime policy, None for normal scheduling.
+            Needs CAP_SYS_NICE or an RLIMIT_RTPRIO of at least the priority.
+        realtime_priority: Realtime priority from 1 to 99, higher runs first.
+            Unused without a realtime policy.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerScheduling object.
+        """
+        if cpus is not None and len(cpus) == 0:
+            local_logger.error("CPU set must not be empty, use None for any CPU", True)
+            return False, None
+
+        if cpus is not None and any(cpu < 0 for cpu in cpus):
+            local_logger.error(f"CPU set {sorted(cpus)} has a negative CPU", True)
+            return False, None
+
+        if nice is not None and not cls.__NICE_MIN <= nice <= cls.__NICE_MAX:
+            local_logger.error(
+                f"Nice value {nice} is outside of {cls.__NICE_MIN} to {cls.__NICE_MAX}", True
+            )
+            return False, None
+
+        if realtime_policy is not None and not isinstance(realtime_policy, RealtimePolicy):
+            local_logger.error(f"Unknown realtime policy {realtime_policy}", True)
+            return False, None
+
+        if realtime_policy is not None and not 1 <= realtime_priority <= 99:
+            local_logger.error(f"Realtime priority {realtime_priority} is outside of 1 to 99", True)
+            return False, None
+
+        return True, WorkerScheduling(
+            cls.__create_key, cpus, nice, realtime_policy, realtime_priority
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        cpus: "set[int] | None",
+        nice: "int | None",
+        realtime_policy: "RealtimePolicy | None",
+        realtime_priority: int,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerScheduling.__create_key, "Use create() method"
+
+        self.__cpus = cpus
+        self.__nice = nice
+        self.__realtime_policy = realtime_policy
+        self.__realtime_priority = realtime_priority
+
+    def apply(self) -> "list[str]":
+        """
+        Applies the settings to the calling process, each independently of the others.
+
+        Returns a description of every setting which could not be applied.
+        """
+        failures = []
+
+        if self.__cpus is not None:
+            try:
+                os.sched_setaffinity(0, self.__cpus)
+            except (AttributeError, OSError) as e:
+                failures.append(f"CPU set {sorted(self.__cpus)}: {e}")
+
+        if self.__realtime_policy is not None:
+            try:
+                policy = (
+                    os.SCHED_FIFO if self.__realtime_policy == RealtimePolicy.FIFO else os.SCHED_RR
+                )
+                os.sched_setscheduler(0, policy, os.sched_param(self.__realtime_priority))
+            except (AttributeError, OSError) as e:
+                failures.append(
+                    f"{self.__realtime_policy.name} priority {self.__realtime_priority}: {e}"
+                )
+
+        # Ignored under a realtime policy, but set anyway in case the policy could not be
+        if self.__nice is not None:
+            try:
+                os.setpriority(os.PRIO_PROCESS, 0, self.__nice)
+            except (AttributeError, OSError) as e:
+                failures.append(f"Nice {self.__nice}: {e}")
+
+        return failures
+
+
+def scheduled_worker(
+    scheduling: WorkerScheduling,
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+) -> None:
+    """
+    Process target which applies the scheduling settings, then runs the worker target.
+    """
+    failures = scheduling.apply()
+    if len(failures) > 0:
+        worker_name = pathlib.Path(__file__).stem
+        process_id = os.getpid()
+        result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+        if result:
+            # Get Pylance to stop complaining
+            assert local_logger is not None
+
+            for failure in failures:
+                local_logger.warning(
+                    f"Could not apply to {target.__name__}, skipped: {failure}", True
+                )
+
+    target(*args)
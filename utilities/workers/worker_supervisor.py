@@ -0,0 +1,252 @@
+"""
+For keeping workers running.
+"""
+
+import collections
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class RestartReport:
+    """
+    Outcome of restarting the dead workers of a manager.
+    """
+
+    def __init__(
+        self,
+        target_name: str,
+        worker_count: int,
+        attempt: int,
+        backoff_s: float,
+        time_to_recover_s: float,
+        is_restarted: bool,
+    ) -> None:
+        """
+        target_name: Target of the workers.
+        worker_count: Number of dead workers restarted.
+        attempt: Consecutive restarts without a stable period, starting at 1.
+        backoff_s: Delay before this restart.
+        time_to_recover_s: From the last poll that saw every worker alive until the restart,
+            an upper bound on the time without these workers.
+        is_restarted: Whether every dead worker was restarted.
+        """
+        self.target_name = target_name
+        self.worker_count = worker_count
+        self.attempt = attempt
+        self.backoff_s = backoff_s
+        self.time_to_recover_s = time_to_recover_s
+        self.is_restarted = is_restarted
+
+    def __str__(self) -> str:
+        return (
+            f"{self.target_name}: restarted {self.worker_count} worker(s) "
+            f"in {self.time_to_recover_s:.3f}s, attempt {self.attempt}, "
+            f"backoff {self.backoff_s:.3f}s" + ("" if self.is_restarted else ", failed")
+        )
+
+
+class WorkerSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Polls worker managers from a thread of main and restarts dead workers.
+    Stalled workers are checked for on every poll too, see WorkerManager.check_stalled_workers() .
+
+    Consecutive restarts of the same workers back off exponentially.
+    Workers which use up the restart budget within the window are crash looping,
+    and are no longer restarted.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        poll_period_s: float,
+        initial_backoff_s: float,
+        max_backoff_s: float,
+        restart_budget: int,
+        budget_window_s: float,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerSupervisor | None]":
+        """
+        Creates a supervisor, call start() once the workers are started.
+
+        worker_managers: Managers to supervise.
+        poll_period_s: Time between checks for dead workers.
+        initial_backoff_s: Delay before the second consecutive restart, the first is immediate.
+        max_backoff_s: Longest delay between consecutive restarts.
+        restart_budget: Most restarts of a manager within the window.
+        budget_window_s: Window of the restart budget, also the time workers must stay
+            alive for their backoff to reset.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerSupervisor object.
+        """
+        if poll_period_s <= 0.0:
+            local_logger.error("Supervisor poll period must be greater than zero", True)
+            return False, None
+
+        if restart_budget <= 0:
+            local_logger.error("Supervisor restart budget must be greater than zero", True)
+            return False, None
+
+        return True, WorkerSupervisor(
+            cls.__create_key,
+            worker_managers,
+            poll_period_s,
+            initial_backoff_s,
+            max_backoff_s,
+            restart_budget,
+            budget_window_s,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        worker_managers: "list[worker_manager.WorkerManager]",
+        poll_period_s: float,
+        initial_backoff_s: float,
+        max_backoff_s: float,
+        restart_budget: int,
+        budget_window_s: float,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerSupervisor.__create_key, "Use create() method"
+
+        self.__worker_managers = worker_managers
+        self.__poll_period_s = poll_period_s
+        self.__initial_backoff_s = initial_backoff_s
+        self.__max_backoff_s = max_backoff_s
+        self.__restart_budget = restart_budget
+        self.__budget_window_s = budget_window_s
+        self.__local_logger = local_logger
+
+        # State per manager, in the same order
+        now = time.monotonic()
+        count = len(worker_managers)
+        self.__last_alive_times = [now] * count
+        self.__consecutive_restarts = [0] * count
+        self.__next_restart_times: "list[float | None]" = [None] * count
+        self.__restart_times = [collections.deque() for _ in range(count)]
+        self.__is_crash_looping = [False] * count
+
+        # Shared with the supervisor thread
+        self.__lock = threading.Lock()
+        self.__reports: "list[RestartReport]" = []
+        self.__stop_requested = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    def __get_backoff(self, consecutive_restarts: int) -> float:
+        """
+        Delay before the next restart.
+        """
+        if consecutive_restarts == 0:
+            return 0.0
+
+        return min(self.__max_backoff_s, self.__initial_backoff_s * 2 ** (consecutive_restarts - 1))
+
+    def __check(self, index: int, now: float) -> None:
+        """
+        Restarts the dead workers of a manager if due.
+        """
+        manager = self.__worker_managers[index]
+        if manager.get_dead_worker_count() == 0:
+            self.__last_alive_times[index] = now
+            restart_times = self.__restart_times[index]
+            if len(restart_times) > 0 and now - restart_times[-1] >= self.__budget_window_s:
+                self.__consecutive_restarts[index] = 0
+            return
+
+        if self.__is_crash_looping[index]:
+            return
+
+        backoff_s = self.__get_backoff(self.__consecutive_restarts[index])
+        next_restart_time = self.__next_restart_times[index]
+        if next_restart_time is None:
+            next_restart_time = now + backoff_s
+            self.__next_restart_times[index] = next_restart_time
+
+        if now < next_restart_time:
+            return
+
+        restart_times = self.__restart_times[index]
+        while len(restart_times) > 0 and now - restart_times[0] > self.__budget_window_s:
+            restart_times.popleft()
+
+        if len(restart_times) >= self.__restart_budget:
+            self.__is_crash_looping[index] = True
+            self.__local_logger.error(
+                f"{manager.get_target_name()} is crash looping, {len(restart_times)} restarts "
+                f"within {self.__budget_window_s}s, no longer restarting",
+                True,
+            )
+            return
+
+        worker_count = manager.get_dead_worker_count()
+        is_restarted = manager.check_and_restart_dead_workers()
+        restart_time = time.monotonic()
+        restart_times.append(restart_time)
+        self.__consecutive_restarts[index] += 1
+        self.__next_restart_times[index] = None
+
+        report = RestartReport(
+            manager.get_target_name(),
+            worker_count,
+            self.__consecutive_restarts[index],
+            backoff_s,
+            restart_time - self.__last_alive_times[index],
+            is_restarted,
+        )
+        self.__local_logger.info(str(report), True)
+        with self.__lock:
+            self.__reports.append(report)
+
+    def __run(self) -> None:
+        """
+        Supervisor thread.
+        """
+        while not self.__stop_requested.wait(self.__poll_period_s):
+            for manager in self.__worker_managers:
+                manager.check_stalled_workers()
+
+            now = time.monotonic()
+            for index in range(len(self.__worker_managers)):
+                self.__check(index, now)
+
+    def start(self) -> None:
+        """
+        Starts polling.
+        """
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops polling, call before requesting workers to exit so they are not restarted.
+        """
+        self.__stop_requested.set()
+        if self.__thread.is_alive():
+            self.__thread.join()
+
+    def get_restart_reports(self) -> "list[RestartReport]":
+        """
+        Returns every restart so far, oldest first.
+        """
+        with self.__lock:
+            return list(self.__reports)
+
+    def get_crash_looping_targets(self) -> "list[str]":
+        """
+        Returns the target names of workers no longer restarted.
+        """
+        return [
+            manager.get_target_name()
+            for manager, is_crash_looping in zip(self.__worker_managers, self.__is_crash_looping)
+            if is_crash_looping
+        ]
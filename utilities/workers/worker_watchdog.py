@@ -0,0 +1,92 @@
+"""
+Settings for noticing workers which are alive but stuck.
+"""
+
+import enum
+
+from modules.common.modules.logger import logger
+
+
+class StallAction(enum.Enum):
+    """
+    What the worker manager does with a stalled worker.
+    """
+
+    # Logged once per stall, for workers which may wait a long time on purpose
+    LOG = 0
+    # Logged and terminated, then restarted like a dead worker
+    RESTART = 1
+
+
+class WorkerWatchdog:
+    """
+    Settings for a worker manager to notice stalled workers.
+    See WorkerProperties.create() and WorkerManager.check_stalled_workers() .
+
+    A worker makes progress every time its loop calls `controller.check_pause()` .
+    A worker which is alive, not paused, and has made no progress for a number of
+    its periods is stalled, like one stuck in `recv_match()` or a `put()` that never returns.
+
+    Workers in a host are threads of its process, which cannot be stopped one at a time,
+    so their stalls can only be logged.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        period_s: float,
+        stall_period_count: float,
+        action: StallAction,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, WorkerWatchdog | None]":
+        """
+        Creates watchdog settings.
+
+        period_s: Longest time a loop of the worker is expected to take,
+            like its receive timeout or sleep.
+        stall_period_count: Periods without progress before the worker is stalled,
+            more than 1 so that a slow loop is not mistaken for a stall.
+        action: What to do with a stalled worker.
+        local_logger: Existing logger from process.
+
+        Returns the WorkerWatchdog object.
+        """
+        if period_s <= 0.0:
+            local_logger.error("Watchdog period must be greater than zero", True)
+            return False, None
+
+        if stall_period_count <= 1.0:
+            local_logger.error(
+                f"Watchdog stall period count {stall_period_count} must be greater than 1", True
+            )
+            return False, None
+
+        return True, WorkerWatchdog(cls.__create_key, period_s * stall_period_count, action)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        stall_timeout_s: float,
+        action: StallAction,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerWatchdog.__create_key, "Use create() method"
+
+        self.__stall_timeout_s = stall_timeout_s
+        self.__action = action
+
+    def get_stall_timeout(self) -> float:
+        """
+        Returns the time without progress after which a worker is stalled, in seconds.
+        """
+        return self.__stall_timeout_s
+
+    def get_action(self) -> StallAction:
+        """
+        Returns what to do with a stalled worker.
+        """
+        return self.__action